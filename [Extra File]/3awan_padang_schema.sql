@@ -4,7 +4,7 @@
 -- =========================================================
 
 -- Drop existing tables (for clean import)
-DROP TABLE IF EXISTS order_status_history, reviews, discounts, payments, order_items, orders, carts, menu_addons, menus, categories, customers, users CASCADE;
+DROP TABLE IF EXISTS idempotency_keys, rollup_state, daily_menu_sales, daily_revenue, order_status_history, reviews, discounts, payments, order_items, orders, carts, menu_addons, menus, categories, customers, users CASCADE;
 
 -- ======================
 -- USERS (Admin/Petugas)
@@ -47,7 +47,10 @@ CREATE TABLE menus (
     image_url TEXT,
     description TEXT,
     is_available BOOLEAN DEFAULT TRUE,
-    average_rating NUMERIC(3,2) DEFAULT 0
+    average_rating NUMERIC(3,2) DEFAULT 0,
+    -- running review aggregates (app/ratings.py)
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    rating_count INTEGER NOT NULL DEFAULT 0
 );
 
 -- ======================
@@ -68,6 +71,7 @@ CREATE TABLE carts (
     customer_id INTEGER REFERENCES customers(id) ON DELETE CASCADE,
     menu_id INTEGER REFERENCES menus(id),
     quantity INTEGER DEFAULT 1,
+    addon_ids VARCHAR NOT NULL DEFAULT '',
     created_at TIMESTAMP DEFAULT NOW()
 );
 
@@ -112,6 +116,7 @@ CREATE TABLE payments (
 CREATE TABLE discounts (
     id SERIAL PRIMARY KEY,
     name VARCHAR(100) NOT NULL,
+    code VARCHAR,
     description TEXT,
     percentage NUMERIC(5,2) CHECK (percentage BETWEEN 0 AND 100),
     valid_until DATE
@@ -140,6 +145,62 @@ CREATE TABLE order_status_history (
     changed_at TIMESTAMP DEFAULT NOW()
 );
 
+-- ======================
+-- REPORTING ROLLUPS (maintained by app/reporting.py)
+-- ======================
+CREATE TABLE daily_revenue (
+    day DATE PRIMARY KEY,
+    orders_created INTEGER NOT NULL DEFAULT 0,
+    orders_completed INTEGER NOT NULL DEFAULT 0,
+    revenue NUMERIC(12,2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE daily_menu_sales (
+    day DATE NOT NULL,
+    menu_id INTEGER NOT NULL REFERENCES menus(id),
+    category_id INTEGER REFERENCES categories(id),
+    quantity INTEGER NOT NULL DEFAULT 0,
+    revenue NUMERIC(12,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, menu_id)
+);
+
+CREATE TABLE rollup_state (
+    name VARCHAR(50) PRIMARY KEY,
+    last_history_id INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP
+);
+
+-- ======================
+-- IDEMPOTENCY KEYS (first response of retried POSTs)
+-- ======================
+CREATE TABLE idempotency_keys (
+    scope VARCHAR NOT NULL,
+    key VARCHAR NOT NULL,
+    request_hash VARCHAR NOT NULL,
+    status_code INTEGER,
+    response_body TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (scope, key)
+);
+
+-- ======================
+-- INDEXES (filter / join columns)
+-- ======================
+CREATE INDEX ix_menus_category_id ON menus (category_id);
+CREATE INDEX ix_menu_addons_menu_id ON menu_addons (menu_id);
+CREATE INDEX ix_carts_customer_id ON carts (customer_id);
+CREATE UNIQUE INDEX ix_discounts_code ON discounts (code);
+CREATE INDEX ix_orders_customer_id ON orders (customer_id);
+CREATE INDEX ix_orders_created_at ON orders (created_at);
+-- kitchen queue: WHERE current_status = ? ORDER BY created_at (also serves status-only lookups)
+CREATE INDEX ix_orders_status_created_at ON orders (current_status, created_at);
+CREATE INDEX ix_order_items_order_id ON order_items (order_id);
+CREATE INDEX ix_payments_order_id ON payments (order_id);
+CREATE INDEX ix_payments_paid_at ON payments (paid_at);
+CREATE INDEX ix_reviews_menu_id ON reviews (menu_id);
+CREATE INDEX ix_order_status_history_order_id ON order_status_history (order_id);
+CREATE INDEX ix_idempotency_keys_created_at ON idempotency_keys (created_at);
+
 -- =========================================
 -- SAMPLE DATA (Cita Rasa Padang)
 -- =========================================
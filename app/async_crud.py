@@ -0,0 +1,149 @@
+"""Async variants of the hot crud functions, used when ASYNC_DB is enabled.
+
+They mirror the signatures in crud.py but take an AsyncSession and must be awaited.
+Pricing rules are shared with the sync path via crud._compute_subtotals.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import kitchen
+from .catalog_cache import CatalogSnapshot, catalog, catalog_queries
+from .discounts import DiscountSnapshot, apply_discount, discount_index, discount_query, normalize_code
+from .fastjson import columns_for, rows_to_dicts
+from .crud import _compute_subtotals, order_expanded_dict, select_customers, select_order_expanded
+from .models import Category, Customer, Menu, MenuAddon, Order, OrderItem, OrderStatusHistory
+from .order_status import INITIAL_STATUS, history_rows
+from .schemas import CustomerRead, OrderCreate, OrderItemCreate
+
+
+# CATALOG
+async def get_catalog(session: AsyncSession) -> CatalogSnapshot:
+    """Return the cached catalog snapshot, reloading it asynchronously on a miss."""
+    snap = catalog.lookup()
+    if snap is not None:
+        return snap
+    version = catalog.version
+    categories, menus, addons = [rows_to_dicts(await session.exec(q)) for q in catalog_queries()]
+    return catalog.store(version, categories, menus, addons)
+
+
+async def get_discount_index(session: AsyncSession) -> DiscountSnapshot:
+    """Return the cached discount index, reloading it asynchronously on a miss."""
+    snap = discount_index.lookup()
+    if snap is not None:
+        return snap
+    version = discount_index.version
+    return discount_index.store(version, rows_to_dicts(await session.exec(discount_query())))
+
+
+# CATEGORY
+async def get_categories(session: AsyncSession) -> List[Category]:
+    """Return all categories."""
+    return (await session.exec(select(Category))).all()
+
+
+# MENU
+async def get_menus(session: AsyncSession, category_id: Optional[int] = None) -> List[Menu]:
+    """Return menus, optionally filtered by category_id."""
+    query = select(Menu)
+    if category_id:
+        query = query.where(Menu.category_id == category_id)
+    return (await session.exec(query)).all()
+
+
+async def get_menu(session: AsyncSession, menu_id: int) -> Optional[Menu]:
+    """Get a menu by id or return None if not found."""
+    return await session.get(Menu, menu_id)
+
+
+# ADDONS
+async def get_addons_by_menu(session: AsyncSession, menu_id: int) -> List[MenuAddon]:
+    """List addons for a given menu."""
+    return (await session.exec(select(MenuAddon).where(MenuAddon.menu_id == menu_id))).all()
+
+
+# CUSTOMERS
+async def get_customers(session: AsyncSession, limit: Optional[int] = None, after_id: Optional[int] = None) -> List[Customer]:
+    """Return customers ordered by id; with `limit`, one keyset page after `after_id`."""
+    return (await session.exec(select_customers(limit, after_id))).all()
+
+
+async def get_customer_rows(session: AsyncSession, limit: Optional[int] = None, after_id: Optional[int] = None) -> List[dict]:
+    """Like get_customers, but projects CustomerRead columns into plain dicts."""
+    query = select_customers(limit, after_id, columns=columns_for(Customer, CustomerRead))
+    return rows_to_dicts(await session.exec(query))
+
+
+async def get_customer(session: AsyncSession, customer_id: int) -> Optional[Customer]:
+    return await session.get(Customer, customer_id)
+
+
+# ORDER
+async def _load_price_table(
+    session: AsyncSession, items: List[OrderItemCreate]
+) -> Tuple[Dict[int, Menu], Dict[int, MenuAddon]]:
+    """Fetch every menu and addon referenced by `items` with one IN (...) query each."""
+    menu_ids = {i.menu_id for i in items}
+    addon_ids = {aid for i in items for aid in (i.addon_ids or [])}
+
+    menus: Dict[int, Menu] = {}
+    if menu_ids:
+        menus = {m.id: m for m in (await session.exec(select(Menu).where(Menu.id.in_(menu_ids)))).all()}
+    addons: Dict[int, MenuAddon] = {}
+    if addon_ids:
+        addons = {a.id: a for a in (await session.exec(select(MenuAddon).where(MenuAddon.id.in_(addon_ids)))).all()}
+    return menus, addons
+
+
+async def create_order(session: AsyncSession, order: OrderCreate) -> Order:
+    """Create an order and its items in one transaction (see crud.create_order)."""
+    discount = None
+    if order.discount_id is not None or normalize_code(order.discount_code):
+        discount = (await get_discount_index(session)).resolve(order.discount_id, order.discount_code)
+    if order.customer_id is not None:
+        cust = await session.get(Customer, order.customer_id)
+        if not cust:
+            raise ValueError("Customer not found")
+
+    menus, addons = await _load_price_table(session, order.items)
+    items = _compute_subtotals(order.items, menus, addons)
+
+    header = Order(
+        customer_id=order.customer_id,
+        discount_id=discount["id"] if discount else None,
+        total_after_discount=apply_discount(sum(item.subtotal for item in items), discount),
+    )
+    session.add(header)
+    await session.flush()
+
+    if items:
+        await session.execute(
+            insert(OrderItem),
+            [
+                {"order_id": header.id, "menu_id": item.menu_id, "quantity": item.quantity, "subtotal": item.subtotal}
+                for item in items
+            ],
+        )
+    await session.execute(insert(OrderStatusHistory), history_rows([header.id], INITIAL_STATUS))
+    await session.commit()
+    await session.refresh(header)
+    # the Postgres broker NOTIFYs through the sync engine; keep it off the event loop
+    await run_in_threadpool(kitchen.publish_order, header)
+    return header
+
+
+async def get_order(session: AsyncSession, order_id: int) -> Optional[Order]:
+    """Get an order by id or return None if not found."""
+    return await session.get(Order, order_id)
+
+
+async def get_order_expanded(session: AsyncSession, order_id: int, expand: List[str]) -> Optional[dict]:
+    """See crud.get_order_expanded; selectinload runs its queries inside the await."""
+    order = (await session.exec(select_order_expanded(order_id, expand))).first()
+    if not order:
+        return None
+    return order_expanded_dict(order, expand, await get_catalog(session))
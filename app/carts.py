@@ -0,0 +1,292 @@
+"""Server-side carts behind a pluggable store.
+
+A cart is a list of lines {line_id, menu_id, addon_ids, quantity}; adding the same
+menu with the same addons again merges into the existing line (as the app's cart
+does). `line_id` is derived from the menu and sorted addon ids, e.g. "12_3_7".
+
+Stores (CART_STORE):
+- memory (default): per-process dict with a sliding TTL (CART_TTL_SECONDS) and at most
+  CART_MAX_CARTS carts (least recently used are dropped). Only adding a line touches
+  the database, to check the customer exists (as the db store does). Carts live in
+  one worker, so use it with a single uvicorn worker.
+- db: the `carts` table, one transaction per mutation on the request's session;
+  survives restarts and is shared by every worker.
+
+Lines are validated and carts priced against the catalog cache, so that costs no
+queries; checkout prices the whole cart once, in the database, through
+crud.create_order.
+"""
+import abc
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from . import crud
+from .catalog_cache import catalog
+from .models import Cart, Customer, Order
+from .schemas import MAX_CART_QUANTITY, OrderCreate, OrderItemCreate
+
+CART_STORE = os.getenv("CART_STORE", "memory").lower()
+CART_TTL_SECONDS = float(os.getenv("CART_TTL_SECONDS", str(2 * 3600)))
+CART_MAX_CARTS = int(os.getenv("CART_MAX_CARTS", "10000"))
+
+
+def line_id(menu_id: int, addon_ids: List[int]) -> str:
+    return "_".join(str(i) for i in [menu_id, *sorted(set(addon_ids))])
+
+
+def parse_line_id(value: str) -> Optional[Tuple[int, List[int]]]:
+    """(menu_id, addon_ids) for a line id as `line_id` builds it, else None."""
+    try:
+        menu_id, *addon_ids = [int(part) for part in value.split("_")]
+    except ValueError:
+        return None
+    if line_id(menu_id, addon_ids) != value:
+        return None
+    return menu_id, addon_ids
+
+
+def _line(menu_id: int, addon_ids: List[int], quantity: int) -> dict:
+    addon_ids = sorted(set(addon_ids))
+    return {"line_id": line_id(menu_id, addon_ids), "menu_id": menu_id, "addon_ids": addon_ids, "quantity": quantity}
+
+
+def merged_quantity(current: int, added: int) -> int:
+    """Quantity after adding to an existing line; ValueError past MAX_CART_QUANTITY."""
+    if current + added > MAX_CART_QUANTITY:
+        raise ValueError(f"A cart line can hold at most {MAX_CART_QUANTITY} (it has {current})")
+    return current + added
+
+
+def validate_line(menu_id: int, addon_ids: List[int]):
+    """Raise ValueError unless the menu exists and is available and every addon belongs to it."""
+    snap = catalog.get()
+    menu = snap.menu(menu_id)
+    if not menu:
+        raise ValueError(f"Menu id {menu_id} not found")
+    if not menu["is_available"]:
+        raise ValueError(f"Menu id {menu_id} is not available")
+    addons = {a["id"] for a in snap.addons_for(menu_id)}
+    for aid in addon_ids:
+        if aid not in addons:
+            raise ValueError(f"Addon id {aid} does not belong to menu id {menu_id}")
+
+
+def cart_view(customer_id: int, lines: List[dict]) -> dict:
+    """The cart with current prices from the catalog cache (same rule as order pricing).
+
+    Lines whose menu or addons have since disappeared are kept but marked unavailable
+    and left out of the total; checkout will reject them.
+    """
+    snap = catalog.get()
+    items = []
+    total = 0.0
+    for line in lines:
+        menu = snap.menu(line["menu_id"])
+        addons = {a["id"]: a for a in snap.addons_for(line["menu_id"])}
+        available = menu is not None and menu["is_available"] and all(a in addons for a in line["addon_ids"])
+        subtotal = None
+        if available:
+            unit = float(menu["price"]) + sum(float(addons[a]["price"]) for a in line["addon_ids"])
+            subtotal = unit * line["quantity"]
+            total += subtotal
+        items.append(dict(line, name=menu["name"] if menu else None, available=available, subtotal=subtotal))
+    return {"customer_id": customer_id, "items": items, "total": total}
+
+
+class CartStore(abc.ABC):
+    """Backend interface; line lists are returned in insertion order."""
+
+    @abc.abstractmethod
+    def lines(self, session: Session, customer_id: int) -> List[dict]:
+        """The customer's cart lines (empty if there is no cart)."""
+
+    @abc.abstractmethod
+    def add(self, session: Session, customer_id: int, menu_id: int, addon_ids: List[int], quantity: int) -> List[dict]:
+        """Add a line, merging into an existing one with the same menu and addons."""
+
+    @abc.abstractmethod
+    def set_quantity(self, session: Session, customer_id: int, line_id: str, quantity: int) -> Optional[List[dict]]:
+        """Change a line's quantity (0 removes it); None if the line does not exist."""
+
+    @abc.abstractmethod
+    def clear(self, session: Session, customer_id: int, commit: bool = True):
+        """Empty the cart; with commit=False it is emptied when the caller's transaction commits."""
+
+    @abc.abstractmethod
+    def stats(self) -> dict:
+        """Store figures for /internal/carts."""
+
+
+class MemoryCartStore(CartStore):
+    def __init__(self, ttl: float = CART_TTL_SECONDS, max_carts: int = CART_MAX_CARTS):
+        self.ttl = ttl
+        self.max_carts = max_carts
+        self._lock = threading.Lock()
+        # customer_id -> (expires_at, {line_id: line}), least recently used first
+        self._carts: "OrderedDict[int, Tuple[float, Dict[str, dict]]]" = OrderedDict()
+
+    def _get(self, customer_id: int, create: bool = False) -> Optional[Dict[str, dict]]:
+        # caller holds the lock
+        entry = self._carts.get(customer_id)
+        now = time.monotonic()
+        if entry is not None and entry[0] <= now:
+            del self._carts[customer_id]
+            entry = None
+        if entry is None:
+            if not create:
+                return None
+            entry = (0.0, {})
+        # sliding expiry: any access keeps the cart alive
+        self._carts[customer_id] = (now + self.ttl, entry[1])
+        self._carts.move_to_end(customer_id)
+        while len(self._carts) > self.max_carts:
+            self._carts.popitem(last=False)
+        return entry[1]
+
+    @staticmethod
+    def _copy(cart: Optional[Dict[str, dict]]) -> List[dict]:
+        return [dict(line, addon_ids=list(line["addon_ids"])) for line in (cart or {}).values()]
+
+    def lines(self, session: Session, customer_id: int) -> List[dict]:
+        with self._lock:
+            return self._copy(self._get(customer_id))
+
+    def add(self, session: Session, customer_id: int, menu_id: int, addon_ids: List[int], quantity: int) -> List[dict]:
+        if not session.get(Customer, customer_id):
+            raise ValueError("Customer not found")
+        with self._lock:
+            cart = self._get(customer_id, create=True)
+            line = _line(menu_id, addon_ids, quantity)
+            existing = cart.get(line["line_id"])
+            if existing:
+                existing["quantity"] = merged_quantity(existing["quantity"], quantity)
+            else:
+                cart[line["line_id"]] = line
+            return self._copy(cart)
+
+    def set_quantity(self, session: Session, customer_id: int, line_id: str, quantity: int) -> Optional[List[dict]]:
+        with self._lock:
+            cart = self._get(customer_id)
+            if cart is None or line_id not in cart:
+                return None
+            if quantity > 0:
+                cart[line_id]["quantity"] = quantity
+            else:
+                del cart[line_id]
+            return self._copy(cart)
+
+    def clear(self, session: Session, customer_id: int, commit: bool = True):
+        if not commit:
+            event.listen(session, "after_commit", lambda s: self.clear(s, customer_id), once=True)
+            return
+        with self._lock:
+            self._carts.pop(customer_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"store": "memory", "carts": len(self._carts), "ttl_seconds": self.ttl, "max_carts": self.max_carts}
+
+
+class DatabaseCartStore(CartStore):
+    """Carts in the `carts` table (one row per line; addon ids stored as "3,7")."""
+
+    @staticmethod
+    def _to_line(row: Cart) -> dict:
+        addon_ids = [int(a) for a in row.addon_ids.split(",") if a]
+        return _line(row.menu_id, addon_ids, row.quantity)
+
+    def _rows(self, session: Session, customer_id: int) -> List[Cart]:
+        return session.exec(select(Cart).where(Cart.customer_id == customer_id).order_by(Cart.id)).all()
+
+    @staticmethod
+    def _find(session: Session, customer_id: int, menu_id: int, addon_ids: List[int]) -> Optional[Cart]:
+        return session.exec(
+            select(Cart).where(
+                Cart.customer_id == customer_id,
+                Cart.menu_id == menu_id,
+                Cart.addon_ids == ",".join(str(a) for a in addon_ids),
+            )
+        ).first()
+
+    def lines(self, session: Session, customer_id: int) -> List[dict]:
+        return [self._to_line(row) for row in self._rows(session, customer_id)]
+
+    def add(self, session: Session, customer_id: int, menu_id: int, addon_ids: List[int], quantity: int) -> List[dict]:
+        line = _line(menu_id, addon_ids, quantity)
+        if not session.get(Customer, customer_id):
+            raise ValueError("Customer not found")
+        row = self._find(session, customer_id, menu_id, line["addon_ids"])
+        if row:
+            row.quantity = merged_quantity(row.quantity, quantity)
+        else:
+            row = Cart(customer_id=customer_id, menu_id=menu_id, quantity=quantity,
+                       addon_ids=",".join(str(a) for a in line["addon_ids"]))
+        session.add(row)
+        session.commit()
+        return self.lines(session, customer_id)
+
+    def set_quantity(self, session: Session, customer_id: int, line_id: str, quantity: int) -> Optional[List[dict]]:
+        parsed = parse_line_id(line_id)
+        if parsed is None:
+            return None
+        row = self._find(session, customer_id, *parsed)
+        if row is None:
+            return None
+        if quantity > 0:
+            row.quantity = quantity
+            session.add(row)
+        else:
+            session.delete(row)
+        session.commit()
+        return self.lines(session, customer_id)
+
+    def clear(self, session: Session, customer_id: int, commit: bool = True):
+        for row in self._rows(session, customer_id):
+            session.delete(row)
+        if commit:
+            session.commit()
+
+    def stats(self) -> dict:
+        return {"store": "db"}
+
+
+def _make_store() -> CartStore:
+    if CART_STORE == "db":
+        return DatabaseCartStore()
+    return MemoryCartStore()
+
+
+cart_store: CartStore = _make_store()
+
+
+def checkout(session: Session, customer_id: int, payment_method: Optional[str] = "cash", discount_code: Optional[str] = None) -> Optional[Order]:
+    """Turn the customer's cart into an order and empty the cart.
+
+    All lines are priced together by crud.create_order (one query for menus, one for
+    addons) and written in its single transaction, which also empties the cart: the
+    cart is gone if and only if the order exists. Returns None for an empty cart;
+    raises ValueError if a line can no longer be ordered (the cart is kept).
+    """
+    lines = cart_store.lines(session, customer_id)
+    if not lines:
+        return None
+    unavailable = [item["line_id"] for item in cart_view(customer_id, lines)["items"] if not item["available"]]
+    if unavailable:
+        raise ValueError(f"Cart lines no longer available: {', '.join(unavailable)}")
+    cart_store.clear(session, customer_id, commit=False)
+    order = crud.create_order(
+        session,
+        OrderCreate(
+            customer_id=customer_id,
+            payment_method=payment_method,
+            discount_code=discount_code,
+            items=[OrderItemCreate(menu_id=l["menu_id"], quantity=l["quantity"], addon_ids=l["addon_ids"]) for l in lines],
+        ),
+    )
+    return order
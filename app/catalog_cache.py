@@ -0,0 +1,137 @@
+"""In-process cache of the menu catalog (categories, menus and addons).
+
+The catalog is read by every client on launch but changes only a few times a day,
+so list/detail reads are served from a snapshot held in memory. Every catalog write
+in crud.py calls `catalog.invalidate()` after commit, which bumps the version and
+drops the snapshot; the next read reloads it with three queries.
+
+Invalidation is per process. With several uvicorn workers, the other workers pick up
+changes when their snapshot expires (CATALOG_CACHE_TTL seconds, default 60).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlmodel import Session, select
+
+from . import database
+from .fastjson import columns_for, rows_to_dicts
+from .models import Category, Menu, MenuAddon
+from .schemas import AddonRead, CategoryRead
+
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "60"))
+
+
+def catalog_queries():
+    """Projected (column-only) queries for categories, menus and addons, ordered by id."""
+    return (
+        select(*columns_for(Category, CategoryRead)).order_by(Category.id),
+        select(*columns_for(Menu)).order_by(Menu.id),
+        select(*columns_for(MenuAddon, AddonRead)).order_by(MenuAddon.id),
+    )
+
+
+class CatalogSnapshot:
+    """Immutable view of the catalog at a given version, as plain dicts."""
+
+    def __init__(self, version: int, categories: List[dict], menus: List[dict], addons: List[dict]):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.categories = categories
+        self.menus = menus
+        self.menus_by_id: Dict[int, dict] = {m["id"]: m for m in menus}
+        self.addons_by_menu: Dict[int, List[dict]] = {}
+        for a in addons:
+            self.addons_by_menu.setdefault(a["menu_id"], []).append(a)
+        # Content digest rather than the version counter: versions are per process,
+        # digests agree across workers holding the same data (used for ETags).
+        payload = json.dumps([categories, menus, addons], sort_keys=True, default=str)
+        self.digest = hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+    def menus_in(self, category_id: Optional[int] = None) -> List[dict]:
+        if category_id:
+            return [m for m in self.menus if m["category_id"] == category_id]
+        return self.menus
+
+    def menu(self, menu_id: int) -> Optional[dict]:
+        return self.menus_by_id.get(menu_id)
+
+    def addons_for(self, menu_id: int) -> List[dict]:
+        return self.addons_by_menu.get(menu_id, [])
+
+
+class CatalogCache:
+    def __init__(self, ttl: float = CATALOG_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._version = 1
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _fresh(self) -> Optional[CatalogSnapshot]:
+        snap = self._snapshot
+        if snap is None or snap.version != self._version:
+            return None
+        if time.monotonic() - snap.loaded_at >= self.ttl:
+            return None
+        return snap
+
+    def lookup(self) -> Optional[CatalogSnapshot]:
+        """Return the current snapshot, or None (a miss) if it must be reloaded."""
+        snap = self._fresh()
+        if snap is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return snap
+
+    def store(self, version: int, categories: List[dict], menus: List[dict], addons: List[dict]) -> CatalogSnapshot:
+        """Install a snapshot loaded at `version` unless a write invalidated it meanwhile."""
+        snap = CatalogSnapshot(version, categories, menus, addons)
+        with self._lock:
+            if version == self._version:
+                self._snapshot = snap
+        return snap
+
+    def get(self) -> CatalogSnapshot:
+        """Return a fresh snapshot, loading it with a short-lived session on a miss."""
+        snap = self.lookup()
+        if snap is not None:
+            return snap
+        version = self._version
+        with Session(database.engine) as session:
+            categories, menus, addons = (rows_to_dicts(session.exec(q)) for q in catalog_queries())
+            return self.store(version, categories, menus, addons)
+
+    def invalidate(self):
+        """Drop the snapshot after a catalog write; the next read reloads it."""
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        snap = self._snapshot
+        return {
+            "version": self._version,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "cached": self._fresh() is not None,
+            "digest": snap.digest if snap else None,
+        }
+
+
+catalog = CatalogCache()
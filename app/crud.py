@@ -1,5 +1,8 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 from .models import (
     Category,
@@ -9,7 +12,24 @@ from .models import (
     MenuAddon,
     Customer,
     Payment,
+    OrderStatusHistory,
+    Review,
+    Discount,
 )
+from .catalog_cache import CatalogSnapshot, catalog
+from .discounts import apply_discount, discount_index, normalize_code
+from . import kitchen
+from .ratings import apply_rating_delta
+from .order_status import (
+    INITIAL_STATUS,
+    PAID,
+    PAYMENT_TOLERANCE,
+    apply_transition,
+    history_rows,
+    sources_of,
+    transition_refused,
+)
+from .fastjson import columns_for, rows_to_dicts
 from .schemas import (
     MenuCreate,
     MenuUpdate,
@@ -17,352 +37,928 @@ from .schemas import (
     OrderUpdate,
     OrderItemCreate,
     CustomerCreate,
+    CustomerRead,
     CustomerUpdate,
     CategoryUpdate,
     AddonCreate,
     AddonUpdate,
+    AddonBulkCreate,
+    AddonBulkUpdate,
+    MenuBulkCreate,
+    MenuBulkUpdate,
     PaymentCreate,
+    PaymentRead,
     PaymentUpdate,
+    ReviewCreate,
+    ReviewUpdate,
+    DiscountCreate,
+    DiscountUpdate,
 )
 
-from . import database
-
 
 # CATEGORY
-def get_categories() -> List[Category]:
+def get_categories(session: Session) -> List[Category]:
     """Return all categories."""
-    with Session(database.engine) as session:
-        return session.exec(select(Category)).all()
+    return session.exec(select(Category)).all()
 
 
-def update_category(category_id: int, data: dict | CategoryUpdate) -> Optional[Category]:
+def update_category(session: Session, category_id: int, data: dict | CategoryUpdate) -> Optional[Category]:
     """Update fields on a category using values from a dict or CategoryUpdate."""
     if isinstance(data, CategoryUpdate):
         data = data.dict(exclude_unset=True)
 
-    with Session(database.engine) as session:
-        category = session.get(Category, category_id)
-        if not category:
-            return None
-        for key, val in data.items():
-            setattr(category, key, val)
-        session.add(category)
-        session.commit()
-        session.refresh(category)
-        return category
+    category = session.get(Category, category_id)
+    if not category:
+        return None
+    for key, val in data.items():
+        setattr(category, key, val)
+    session.add(category)
+    session.commit()
+    catalog.invalidate()
+    session.refresh(category)
+    return category
 
 
-def delete_category(category_id: int) -> bool:
+def delete_category(session: Session, category_id: int) -> bool:
     """Delete a category by id. Return True if deleted, False if not found."""
-    with Session(database.engine) as session:
-        category = session.get(Category, category_id)
-        if not category:
-            return False
-        session.delete(category)
-        session.commit()
-        return True
+    category = session.get(Category, category_id)
+    if not category:
+        return False
+    session.delete(category)
+    session.commit()
+    catalog.invalidate()
+    return True
 
 
 # MENU
-def get_menus(category_id: Optional[int] = None) -> List[Menu]:
+def select_menus(
+    category_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+    columns: Optional[list] = None,
+):
+    """Build the menu listing query (ordered by id, keyset-paginated when `limit` is set).
+
+    Pass `columns` to project plain rows instead of loading ORM objects.
+    """
+    query = (select(*columns) if columns else select(Menu)).order_by(Menu.id)
+    if category_id:
+        query = query.where(Menu.category_id == category_id)
+    if after_id is not None:
+        query = query.where(Menu.id > after_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def get_menus(session: Session, category_id: Optional[int] = None) -> List[Menu]:
     """Return menus, optionally filtered by category_id."""
-    with Session(database.engine) as session:
-        query = select(Menu)
-        if category_id:
-            query = query.where(Menu.category_id == category_id)
-        return session.exec(query).all()
+    return session.exec(select_menus(category_id)).all()
 
 
-def get_menu(menu_id: int) -> Optional[Menu]:
+def get_menu(session: Session, menu_id: int) -> Optional[Menu]:
     """Get a menu by id or return None if not found."""
-    with Session(database.engine) as session:
-        return session.get(Menu, menu_id)
+    return session.get(Menu, menu_id)
 
 
-def create_menu(menu: Menu | MenuCreate) -> Menu:
+def create_menu(session: Session, menu: Menu | MenuCreate) -> Menu:
     """Persist a new menu (from a Menu or MenuCreate) and return it (with id)."""
     # normalize to Menu instance
     if isinstance(menu, MenuCreate):
         menu = Menu(**menu.dict())
 
-    with Session(database.engine) as session:
-        session.add(menu)
-        session.commit()
-        session.refresh(menu)
-        return menu
+    session.add(menu)
+    session.commit()
+    catalog.invalidate()
+    session.refresh(menu)
+    return menu
 
 
-def update_menu(menu_id: int, data: dict | MenuUpdate) -> Optional[Menu]:
+def update_menu(session: Session, menu_id: int, data: dict | MenuUpdate) -> Optional[Menu]:
     """Update fields on a menu using values from a dict or MenuUpdate."""
     if isinstance(data, MenuUpdate):
         data = data.dict(exclude_unset=True)
 
-    with Session(database.engine) as session:
-        menu = session.get(Menu, menu_id)
-        if not menu:
-            return None
-        for key, val in data.items():
-            setattr(menu, key, val)
-        session.add(menu)
-        session.commit()
-        session.refresh(menu)
-        return menu
+    menu = session.get(Menu, menu_id)
+    if not menu:
+        return None
+    for key, val in data.items():
+        setattr(menu, key, val)
+    session.add(menu)
+    session.commit()
+    catalog.invalidate()
+    session.refresh(menu)
+    return menu
 
 
-def delete_menu(menu_id: int) -> bool:
+def delete_menu(session: Session, menu_id: int) -> bool:
     """Delete a menu by id. Return True if deleted, False if not found."""
-    with Session(database.engine) as session:
-        menu = session.get(Menu, menu_id)
-        if not menu:
-            return False
-        session.delete(menu)
-        session.commit()
-        return True
+    menu = session.get(Menu, menu_id)
+    if not menu:
+        return False
+    session.delete(menu)
+    session.commit()
+    catalog.invalidate()
+    return True
 
 
-# ADDONS
-def create_addon(menu_id: int, addon: AddonCreate) -> MenuAddon:
-    """Create an addon for a menu."""
-    with Session(database.engine) as session:
-        menu = session.get(Menu, menu_id)
-        if not menu:
-            raise ValueError("Menu not found")
-        ma = MenuAddon(menu_id=menu_id, name=addon.name, price=addon.price)
-        session.add(ma)
-        session.commit()
-        session.refresh(ma)
-        return ma
+# BULK CATALOG WRITES
+# One transaction and one cache invalidation per call. Inserts go through
+# INSERT ... RETURNING with many parameter sets, which SQLAlchemy batches into
+# multi-row VALUES; updates are ORM bulk UPDATEs by primary key (executemany).
+
+def _missing_ids(session: Session, model, ids) -> List[int]:
+    """Ids (in input order, without duplicates) that have no row in `model`'s table."""
+    wanted = list(dict.fromkeys(i for i in ids if i is not None))
+    if not wanted:
+        return []
+    found = set(session.exec(select(model.id).where(model.id.in_(wanted))).all())
+    return [i for i in wanted if i not in found]
+
+
+def _check_exists(session: Session, model, ids, label: str):
+    missing = _missing_ids(session, model, ids)
+    if missing:
+        raise ValueError(f"{label} id {missing[0]} not found")
 
 
-def get_addons_by_menu(menu_id: int) -> List[MenuAddon]:
+def _insert_returning_ids(session: Session, model, rows: List[dict]) -> List[int]:
+    if not rows:
+        return []
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return list(session.scalars(stmt, rows))
+
+
+def _bulk_update(session: Session, model, patches: List[dict]) -> Tuple[List[int], List[int]]:
+    """UPDATE rows by primary key; returns (updated_ids, missing_ids).
+
+    Raises ValueError for a patch that sets a NOT NULL column to null.
+    """
+    columns = model.__table__.columns
+    for p in patches:
+        nulls = [key for key, val in p.items() if val is None and key in columns and not columns[key].nullable]
+        if nulls:
+            raise ValueError(f"{', '.join(nulls)} cannot be null (id {p['id']})")
+    missing = set(_missing_ids(session, model, [p["id"] for p in patches]))
+    rows = [p for p in patches if p["id"] not in missing and len(p) > 1]
+    if rows:
+        session.execute(update(model), rows)
+    return [p["id"] for p in patches if p["id"] not in missing], sorted(missing)
+
+
+def create_menus_bulk(session: Session, menus: List[MenuBulkCreate]) -> List[dict]:
+    """Create many menus (and their nested addons) in one transaction.
+
+    Returns [{"id": menu_id, "addon_ids": [...]}, ...] in input order.
+    """
+    _check_exists(session, Category, [m.category_id for m in menus], "Category")
+    menu_rows = [Menu(**m.dict(exclude={"addons"})).dict(exclude={"id"}) for m in menus]
+    menu_ids = _insert_returning_ids(session, Menu, menu_rows)
+
+    addon_rows = [
+        {"menu_id": menu_id, "name": a.name, "price": a.price}
+        for menu_id, m in zip(menu_ids, menus)
+        for a in m.addons
+    ]
+    addon_ids = iter(_insert_returning_ids(session, MenuAddon, addon_rows))
+    session.commit()
+    catalog.invalidate()
+    return [{"id": menu_id, "addon_ids": [next(addon_ids) for _ in m.addons]} for menu_id, m in zip(menu_ids, menus)]
+
+
+def update_menus_bulk(session: Session, patches: List[MenuBulkUpdate]) -> Tuple[List[int], List[int]]:
+    """Patch many menus by id in one transaction. Returns (updated_ids, missing_ids)."""
+    rows = [p.dict(exclude_unset=True) for p in patches]
+    _check_exists(session, Category, [r.get("category_id") for r in rows], "Category")
+    updated, missing = _bulk_update(session, Menu, rows)
+    session.commit()
+    catalog.invalidate()
+    return updated, missing
+
+
+def create_addons_bulk(session: Session, addons: List[AddonBulkCreate]) -> List[int]:
+    """Create many addons for existing menus in one transaction; returns their ids in input order."""
+    _check_exists(session, Menu, [a.menu_id for a in addons], "Menu")
+    ids = _insert_returning_ids(session, MenuAddon, [a.dict() for a in addons])
+    session.commit()
+    catalog.invalidate()
+    return ids
+
+
+def update_addons_bulk(session: Session, patches: List[AddonBulkUpdate]) -> Tuple[List[int], List[int]]:
+    """Patch many addons by id in one transaction. Returns (updated_ids, missing_ids)."""
+    updated, missing = _bulk_update(session, MenuAddon, [p.dict(exclude_unset=True) for p in patches])
+    session.commit()
+    catalog.invalidate()
+    return updated, missing
+
+
+# ADDONS
+def create_addon(session: Session, menu_id: int, addon: AddonCreate) -> MenuAddon:
+    """Create an addon for a menu."""
+    menu = session.get(Menu, menu_id)
+    if not menu:
+        raise ValueError("Menu not found")
+    ma = MenuAddon(menu_id=menu_id, name=addon.name, price=addon.price)
+    session.add(ma)
+    session.commit()
+    catalog.invalidate()
+    session.refresh(ma)
+    return ma
+
+
+def get_addons_by_menu(session: Session, menu_id: int) -> List[MenuAddon]:
     """List addons for a given menu."""
-    with Session(database.engine) as session:
-        query = select(MenuAddon).where(MenuAddon.menu_id == menu_id)
-        return session.exec(query).all()
+    query = select(MenuAddon).where(MenuAddon.menu_id == menu_id)
+    return session.exec(query).all()
 
 
-def get_addon(addon_id: int) -> Optional[MenuAddon]:
-    with Session(database.engine) as session:
-        return session.get(MenuAddon, addon_id)
+def get_addon(session: Session, addon_id: int) -> Optional[MenuAddon]:
+    return session.get(MenuAddon, addon_id)
 
 
-def update_addon(addon_id: int, data: dict | AddonUpdate) -> Optional[MenuAddon]:
+def update_addon(session: Session, addon_id: int, data: dict | AddonUpdate) -> Optional[MenuAddon]:
     """Update fields on an addon using values from a dict or AddonUpdate."""
     if isinstance(data, AddonUpdate):
         data = data.dict(exclude_unset=True)
 
-    with Session(database.engine) as session:
-        addon = session.get(MenuAddon, addon_id)
-        if not addon:
-            return None
-        for key, val in data.items():
-            setattr(addon, key, val)
-        session.add(addon)
-        session.commit()
-        session.refresh(addon)
-        return addon
+    addon = session.get(MenuAddon, addon_id)
+    if not addon:
+        return None
+    for key, val in data.items():
+        setattr(addon, key, val)
+    session.add(addon)
+    session.commit()
+    catalog.invalidate()
+    session.refresh(addon)
+    return addon
 
 
-def delete_addon(addon_id: int) -> bool:
+def delete_addon(session: Session, addon_id: int) -> bool:
     """Delete an addon by id. Return True if deleted, False if not found."""
-    with Session(database.engine) as session:
-        addon = session.get(MenuAddon, addon_id)
-        if not addon:
-            return False
-        session.delete(addon)
-        session.commit()
-        return True
+    addon = session.get(MenuAddon, addon_id)
+    if not addon:
+        return False
+    session.delete(addon)
+    session.commit()
+    catalog.invalidate()
+    return True
 
 
 # CUSTOMERS
-def create_customer(data: CustomerCreate) -> Customer:
-    with Session(database.engine) as session:
-        # Accept either phone or phone_number in incoming DTOs for compatibility
-        phone_val = getattr(data, "phone_number", None) or getattr(data, "phone", None)
-        c = Customer(name=data.name, phone_number=phone_val, email=getattr(data, "email", None))
-        session.add(c)
-        session.commit()
-        session.refresh(c)
-        return c
+def create_customer(session: Session, data: CustomerCreate) -> Customer:
+    # Accept either phone or phone_number in incoming DTOs for compatibility
+    phone_val = getattr(data, "phone_number", None) or getattr(data, "phone", None)
+    c = Customer(name=data.name, phone_number=phone_val, email=getattr(data, "email", None))
+    session.add(c)
+    session.commit()
+    session.refresh(c)
+    return c
+
+
+def select_customers(limit: Optional[int] = None, after_id: Optional[int] = None, columns: Optional[list] = None):
+    """Build the customer listing query (ordered by id, keyset-paginated when `limit` is set).
+
+    Pass `columns` to project plain rows instead of loading ORM objects.
+    """
+    query = (select(*columns) if columns else select(Customer)).order_by(Customer.id)
+    if after_id is not None:
+        query = query.where(Customer.id > after_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
 
 
-def get_customers() -> List[Customer]:
-    with Session(database.engine) as session:
-        return session.exec(select(Customer)).all()
+def get_customers(session: Session, limit: Optional[int] = None, after_id: Optional[int] = None) -> List[Customer]:
+    """Return customers ordered by id; with `limit`, one keyset page after `after_id`."""
+    return session.exec(select_customers(limit, after_id)).all()
 
 
-def get_customer(customer_id: int) -> Optional[Customer]:
-    with Session(database.engine) as session:
-        return session.get(Customer, customer_id)
+def get_customer_rows(session: Session, limit: Optional[int] = None, after_id: Optional[int] = None) -> List[dict]:
+    """Like get_customers, but projects CustomerRead columns into plain dicts."""
+    query = select_customers(limit, after_id, columns=columns_for(Customer, CustomerRead))
+    return rows_to_dicts(session.exec(query))
 
 
-def update_customer(customer_id: int, data: dict | CustomerUpdate) -> Optional[Customer]:
+def get_customer(session: Session, customer_id: int) -> Optional[Customer]:
+    return session.get(Customer, customer_id)
+
+
+def update_customer(session: Session, customer_id: int, data: dict | CustomerUpdate) -> Optional[Customer]:
     """Update fields on a customer using values from a dict or CustomerUpdate."""
     if isinstance(data, CustomerUpdate):
         data = data.dict(exclude_unset=True)
 
-    with Session(database.engine) as session:
-        customer = session.get(Customer, customer_id)
-        if not customer:
-            return None
-        for key, val in data.items():
-            setattr(customer, key, val)
-        session.add(customer)
-        session.commit()
-        session.refresh(customer)
-        return customer
+    customer = session.get(Customer, customer_id)
+    if not customer:
+        return None
+    for key, val in data.items():
+        setattr(customer, key, val)
+    session.add(customer)
+    session.commit()
+    session.refresh(customer)
+    return customer
 
 
-def delete_customer(customer_id: int) -> bool:
+def delete_customer(session: Session, customer_id: int) -> bool:
     """Delete a customer by id. Return True if deleted, False if not found."""
-    with Session(database.engine) as session:
-        customer = session.get(Customer, customer_id)
-        if not customer:
-            return False
-        session.delete(customer)
-        session.commit()
-        return True
+    customer = session.get(Customer, customer_id)
+    if not customer:
+        return False
+    session.delete(customer)
+    session.commit()
+    return True
 
 
 # PAYMENTS
-def create_payment(payment: PaymentCreate) -> Payment:
-    with Session(database.engine) as session:
-        order = session.get(Order, payment.order_id)
-        if not order:
-            raise ValueError("Order not found")
-        p = Payment(order_id=payment.order_id, amount=payment.amount, payment_method=getattr(payment, "method", "cash"), payment_status="paid", paid_at=None)
-        session.add(p)
-        # optionally update order status
-        order.current_status = "completed"
-        session.add(order)
-        session.commit()
-        session.refresh(p)
-        return p
-
-
-def get_payment(payment_id: int) -> Optional[Payment]:
+# An order may be paid in several parts (split bills, cash + QRIS). Every write that
+# changes what was paid locks the order row first, then sums its payments with one
+# aggregate query, so concurrent payments for the same order are serialized and none
+# can push the total past what is owed. A ready order is handed over (completed) once
+# its payments cover total_after_discount (see order_status), and payments can no
+# longer be taken back from a completed order.
+
+
+def _lock_order(session: Session, order_id: int):
+    """Lock the order row for the rest of the transaction (SELECT ... FOR UPDATE)."""
+    query = (
+        select(Order.id, Order.total_after_discount, Order.current_status)
+        .where(Order.id == order_id)
+        .with_for_update()
+    )
+    return session.exec(query).first()
+
+
+def _paid_total(session: Session, order_id: int) -> float:
+    query = select(func.coalesce(func.sum(Payment.amount), 0.0)).where(
+        Payment.order_id == order_id, Payment.payment_status == PAID
+    )
+    return float(session.exec(query).one())
+
+
+def _counted(amount: float, status: str) -> float:
+    """What a payment contributes to its order's paid total."""
+    return amount if status == PAID else 0.0
+
+
+def _settle(session: Session, order, paid: float) -> List[dict]:
+    """Complete a ready order whose payments cover its total (inside the caller's transaction)."""
+    if order.current_status == "ready" and paid >= order.total_after_discount - PAYMENT_TOLERANCE:
+        return apply_transition(session, [order.id], "ready", "completed", note="paid")
+    return []
+
+
+def create_payment(session: Session, payment: PaymentCreate) -> Payment:
+    """Record a (possibly partial) payment; refuses amounts above what is still owed."""
+    order = _lock_order(session, payment.order_id)
+    if not order:
+        raise ValueError("Order not found")
+    if order.current_status == "cancelled":
+        raise ValueError("Order is cancelled")
+    # sum after the lock: a concurrent payment for this order has committed by now
+    paid = _paid_total(session, order.id)
+    outstanding = order.total_after_discount - paid
+    if payment.amount > outstanding + PAYMENT_TOLERANCE:
+        raise ValueError(f"Payment of {payment.amount:g} exceeds the outstanding balance of {max(outstanding, 0):g}")
+    p = Payment(
+        order_id=order.id,
+        amount=payment.amount,
+        payment_method=payment.method or "cash",
+        payment_status="paid",
+        paid_at=datetime.utcnow(),
+    )
+    session.add(p)
+    completed = _settle(session, order, paid + payment.amount)
+    session.commit()
+    session.refresh(p)
+    for row in completed:
+        kitchen.publish(row)
+    return p
+
+
+def get_payment(session: Session, payment_id: int) -> Optional[Payment]:
     """Get a payment by id or return None if not found."""
-    with Session(database.engine) as session:
-        return session.get(Payment, payment_id)
-
-
-def update_payment(payment_id: int, data: dict | PaymentUpdate) -> Optional[Payment]:
-    """Update fields on a payment using values from a dict or PaymentUpdate."""
+    return session.get(Payment, payment_id)
+
+
+def get_order_balance(session: Session, order_id: int) -> Optional[dict]:
+    """What an order costs, what was paid and the payments themselves (two queries)."""
+    order = session.get(Order, order_id)
+    if not order:
+        return None
+    payments = session.exec(select(Payment).where(Payment.order_id == order_id).order_by(Payment.id)).all()
+    paid = sum(_counted(p.amount, p.payment_status) for p in payments)
+    outstanding = max(order.total_after_discount - paid, 0.0)
+    return {
+        "order_id": order_id,
+        "total": order.total_after_discount,
+        "paid": paid,
+        "outstanding": outstanding,
+        "settled": outstanding <= PAYMENT_TOLERANCE,
+        "payments": payments,
+    }
+
+
+def update_payment(session: Session, payment_id: int, data: dict | PaymentUpdate) -> Optional[Payment]:
+    """Update fields on a payment; a change to what it counts as paid (amount or
+    payment_status) is checked against the order's balance."""
     if isinstance(data, PaymentUpdate):
         data = data.dict(exclude_unset=True)
+    if "method" in data:
+        data["payment_method"] = data.pop("method")
+
+    payment = session.get(Payment, payment_id)
+    if not payment:
+        return None
+    order = paid = None
+    before = _counted(payment.amount, payment.payment_status)
+    after = _counted(data.get("amount") or payment.amount, data.get("payment_status") or payment.payment_status)
+    if after != before:
+        order = _lock_order(session, payment.order_id)
+        if not order:
+            raise ValueError("Order not found")
+        paid = _paid_total(session, order.id) - before + after
+        if paid > order.total_after_discount + PAYMENT_TOLERANCE:
+            raise ValueError("Payments would exceed the order total")
+        if order.current_status == "completed" and paid < order.total_after_discount - PAYMENT_TOLERANCE:
+            raise ValueError("Payments would no longer cover a completed order")
+    for key, val in data.items():
+        if val is None and key in ("amount", "payment_method", "payment_status"):
+            continue
+        setattr(payment, key, val)
+    session.add(payment)
+    completed = _settle(session, order, paid) if order else []
+    session.commit()
+    session.refresh(payment)
+    for row in completed:
+        kitchen.publish(row)
+    return payment
+
+
+def delete_payment(session: Session, payment_id: int) -> bool:
+    """Delete a payment by id. Return True if deleted, False if not found.
+
+    Refuses (ValueError) when the order is completed and the remaining payments would
+    no longer cover it.
+    """
+    payment = session.get(Payment, payment_id)
+    if not payment:
+        return False
+    order = _lock_order(session, payment.order_id)
+    if order and order.current_status == "completed":
+        paid = _paid_total(session, order.id) - _counted(payment.amount, payment.payment_status)
+        if paid < order.total_after_discount - PAYMENT_TOLERANCE:
+            raise ValueError("Order is completed; this payment can no longer be removed")
+    session.delete(payment)
+    session.commit()
+    return True
+
+
+# DISCOUNTS
+# Writes invalidate the in-memory discount index that order pricing reads.
+def _check_code_free(session: Session, code: Optional[str], discount_id: Optional[int] = None):
+    if code is None:
+        return
+    other = session.exec(select(Discount.id).where(Discount.code == code)).first()
+    if other is not None and other != discount_id:
+        raise ValueError(f"Discount code '{code}' is already in use")
+
+
+def create_discount(session: Session, data: DiscountCreate) -> Discount:
+    code = normalize_code(data.code)
+    _check_code_free(session, code)
+    discount = Discount(**dict(data.dict(), code=code))
+    session.add(discount)
+    session.commit()
+    discount_index.invalidate()
+    session.refresh(discount)
+    return discount
+
+
+def get_discounts(session: Session) -> List[Discount]:
+    return session.exec(select(Discount).order_by(Discount.id)).all()
+
+
+def get_discount(session: Session, discount_id: int) -> Optional[Discount]:
+    return session.get(Discount, discount_id)
+
+
+def update_discount(session: Session, discount_id: int, data: dict | DiscountUpdate) -> Optional[Discount]:
+    """Update fields on a discount; orders already placed keep the total they were charged."""
+    if isinstance(data, DiscountUpdate):
+        data = data.dict(exclude_unset=True)
 
-    with Session(database.engine) as session:
-        payment = session.get(Payment, payment_id)
-        if not payment:
-            return None
-        for key, val in data.items():
-            setattr(payment, key, val)
-        session.add(payment)
-        session.commit()
-        session.refresh(payment)
-        return payment
-
-
-def delete_payment(payment_id: int) -> bool:
-    """Delete a payment by id. Return True if deleted, False if not found."""
-    with Session(database.engine) as session:
-        payment = session.get(Payment, payment_id)
-        if not payment:
-            return False
-        session.delete(payment)
-        session.commit()
-        return True
+    discount = session.get(Discount, discount_id)
+    if not discount:
+        return None
+    if "code" in data:
+        data["code"] = normalize_code(data["code"])
+        _check_code_free(session, data["code"], discount_id)
+    for key, val in data.items():
+        setattr(discount, key, val)
+    session.add(discount)
+    session.commit()
+    discount_index.invalidate()
+    session.refresh(discount)
+    return discount
+
+
+def delete_discount(session: Session, discount_id: int) -> bool:
+    """Delete a discount by id; refuses (ValueError) while orders still reference it."""
+    discount = session.get(Discount, discount_id)
+    if not discount:
+        return False
+    if session.exec(select(Order.id).where(Order.discount_id == discount_id).limit(1)).first() is not None:
+        raise ValueError("Discount is used by existing orders; set valid_until to retire it instead")
+    session.delete(discount)
+    session.commit()
+    discount_index.invalidate()
+    return True
 
 
 # ORDER
-def create_order(order: Order | OrderCreate, items: List[OrderItem] | None = None) -> Order:
+def _load_price_table(session: Session, items: List[OrderItemCreate]) -> Tuple[Dict[int, Menu], Dict[int, MenuAddon]]:
+    """Fetch every menu and addon referenced by `items` with one IN (...) query each."""
+    menu_ids = {i.menu_id for i in items}
+    addon_ids = {aid for i in items for aid in (i.addon_ids or [])}
+
+    menus: Dict[int, Menu] = {}
+    if menu_ids:
+        menus = {m.id: m for m in session.exec(select(Menu).where(Menu.id.in_(menu_ids))).all()}
+    addons: Dict[int, MenuAddon] = {}
+    if addon_ids:
+        addons = {a.id: a for a in session.exec(select(MenuAddon).where(MenuAddon.id.in_(addon_ids))).all()}
+    return menus, addons
+
+
+def _compute_subtotals(
+    items: List[OrderItemCreate], menus: Dict[int, Menu], addons: Dict[int, MenuAddon]
+) -> List[OrderItem]:
+    """Validate order lines and compute subtotals from an in-memory price table.
+
+    Raises ValueError for unknown menus/addons or addons attached to the wrong menu.
+    """
+    priced: List[OrderItem] = []
+    for i in items:
+        menu = menus.get(i.menu_id)
+        if not menu:
+            raise ValueError(f"Menu id {i.menu_id} not found")
+        qty = max(1, i.quantity)
+        # base price
+        subtotal = float(menu.price) * qty
+        # addons
+        for aid in i.addon_ids or []:
+            addon = addons.get(aid)
+            if not addon:
+                raise ValueError(f"Addon id {aid} not found")
+            if addon.menu_id != i.menu_id:
+                raise ValueError(f"Addon id {aid} does not belong to menu id {i.menu_id}")
+            subtotal += float(addon.price) * qty
+
+        priced.append(OrderItem(menu_id=i.menu_id, quantity=qty, subtotal=subtotal))
+    return priced
+
+
+def _price_items(session: Session, items: List[OrderItemCreate]) -> List[OrderItem]:
+    """Price order lines with a constant number of queries (see _load_price_table)."""
+    menus, addons = _load_price_table(session, items)
+    return _compute_subtotals(items, menus, addons)
+
+
+def create_order(session: Session, order: Order | OrderCreate, items: List[OrderItem] | None = None) -> Order:
     """Create an order and its items. Accepts an Order instance or OrderCreate DTO.
 
     Computes subtotals server-side and validates customer existence when provided.
+    A discount named by `discount_id` / `discount_code` is resolved from the in-memory
+    index (no query) and applied to the total; unknown or expired ones raise ValueError.
     If `items` is passed separately, it's treated as the list of OrderItem instances.
+
+    Everything happens in a single transaction: one flush for the order header
+    (to obtain its id) and one executemany INSERT for all order_items.
     """
     # normalize order and items
+    discount = None
     if isinstance(order, OrderCreate):
-        # compute items server-side
-        items_objs: List[OrderItem] = []
-        with Session(database.engine) as session:
-            # if customer provided ensure exists
-            if order.customer_id is not None:
-                cust = session.get(Customer, order.customer_id)
-                if not cust:
-                    raise ValueError("Customer not found")
-
-            total = 0
-            for i in order.items:
-                menu = session.get(Menu, i.menu_id)
-                if not menu:
-                    raise ValueError(f"Menu id {i.menu_id} not found")
-                qty = max(1, i.quantity)
-                # base price
-                subtotal = float(menu.price) * qty
-                # addons
-                if i.addon_ids:
-                    for aid in i.addon_ids:
-                        addon = session.get(MenuAddon, aid)
-                        if not addon:
-                            raise ValueError(f"Addon id {aid} not found")
-                        subtotal += float(addon.price) * qty
-
-                oi = OrderItem(menu_id=i.menu_id, quantity=qty, subtotal=subtotal)
-                items_objs.append(oi)
-                total += subtotal
-
-        items = items_objs
-        order = Order(customer_id=order.customer_id, payment_method=order.payment_method)
+        discount = discount_index.resolve(order.discount_id, order.discount_code)
+        # if customer provided ensure exists
+        if order.customer_id is not None:
+            cust = session.get(Customer, order.customer_id)
+            if not cust:
+                raise ValueError("Customer not found")
+
+        # compute items server-side (constant number of queries regardless of line count)
+        items = _price_items(session, order.items)
+        order = Order(
+            customer_id=order.customer_id,
+            payment_method=order.payment_method,
+            discount_id=discount["id"] if discount else None,
+        )
 
     if items is None:
         items = []
 
-    with Session(database.engine) as session:
-        session.add(order)
-        session.commit()
-        total = 0
-        for item in items:
-            item.order_id = order.id
-            total += item.subtotal
-            session.add(item)
-        # optional discount handling is caller's responsibility; set total_after_discount
-        order.total_after_discount = total
-        session.add(order)
-        session.commit()
-        session.refresh(order)
-        return order
-
-
-def get_order(order_id: int) -> Optional[Order]:
+    # an Order instance passed in directly keeps the discount_id its caller set, unpriced
+    order.total_after_discount = apply_discount(sum(item.subtotal for item in items), discount)
+    session.add(order)
+    session.flush()
+
+    if items:
+        session.execute(
+            insert(OrderItem),
+            [
+                {"order_id": order.id, "menu_id": item.menu_id, "quantity": item.quantity, "subtotal": item.subtotal}
+                for item in items
+            ],
+        )
+    session.execute(insert(OrderStatusHistory), history_rows([order.id], order.current_status or INITIAL_STATUS))
+    session.commit()
+    session.refresh(order)
+    kitchen.publish_order(order)
+    return order
+
+
+def select_orders(
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+    status: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    columns: Optional[list] = None,
+):
+    """Build the order listing query (ordered by id, keyset-paginated when `limit` is set).
+
+    Pass `columns` to project plain rows instead of loading ORM objects.
+    """
+    query = (select(*columns) if columns else select(Order)).order_by(Order.id)
+    if after_id is not None:
+        query = query.where(Order.id > after_id)
+    if status:
+        query = query.where(Order.current_status == status)
+    if customer_id is not None:
+        query = query.where(Order.customer_id == customer_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def get_orders(
+    session: Session,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+    status: Optional[str] = None,
+    customer_id: Optional[int] = None,
+) -> List[Order]:
+    """Return orders ordered by id, optionally filtered; with `limit`, one keyset page."""
+    return session.exec(select_orders(limit, after_id, status=status, customer_id=customer_id)).all()
+
+
+def get_order_rows(
+    session: Session,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+    status: Optional[str] = None,
+    customer_id: Optional[int] = None,
+) -> List[dict]:
+    """Like get_orders, but projects the order columns into plain dicts."""
+    query = select_orders(limit, after_id, status=status, customer_id=customer_id, columns=columns_for(Order))
+    return rows_to_dicts(session.exec(query))
+
+
+def get_order(session: Session, order_id: int) -> Optional[Order]:
     """Get an order by id or return None if not found."""
-    with Session(database.engine) as session:
-        return session.get(Order, order_id)
-
-
-def update_order(order_id: int, data: dict | OrderUpdate) -> Optional[Order]:
-    """Update fields on an order using values from a dict or OrderUpdate."""
+    return session.get(Order, order_id)
+
+
+# ?expand= name -> relationship, each loaded with one extra SELECT ... WHERE order_id IN (...)
+ORDER_EXPANSIONS = {"items": Order.items, "payments": Order.payments, "history": Order.status_history}
+
+
+def parse_expand(expand: Optional[str]) -> List[str]:
+    """Turn "items,payments" into a list of known expansions; ValueError on unknown names."""
+    names = [name.strip() for name in (expand or "").split(",") if name.strip()]
+    unknown = [name for name in names if name not in ORDER_EXPANSIONS]
+    if unknown:
+        raise ValueError(f"Unknown expand value(s): {', '.join(unknown)} (expected {', '.join(ORDER_EXPANSIONS)})")
+    return list(dict.fromkeys(names))
+
+
+def select_order_expanded(order_id: int, expand: List[str]):
+    """One query for the order plus one selectinload per expansion, however many rows each has."""
+    return select(Order).where(Order.id == order_id).options(*(selectinload(ORDER_EXPANSIONS[name]) for name in expand))
+
+
+def order_expanded_dict(order: Order, expand: List[str], snap: CatalogSnapshot) -> dict:
+    """Nested response for an order whose expansions are already loaded (menu names come
+    from the catalog cache, not from the database)."""
+    data = order.model_dump()
+    if "items" in expand:
+        data["items"] = [
+            dict(item.model_dump(exclude={"order_id"}), menu_name=(snap.menu(item.menu_id) or {}).get("name"))
+            for item in sorted(order.items, key=lambda i: i.id)
+        ]
+    if "payments" in expand:
+        data["payments"] = [
+            PaymentRead.model_validate(p, from_attributes=True).model_dump()
+            for p in sorted(order.payments, key=lambda p: p.id)
+        ]
+    if "history" in expand:
+        data["history"] = [
+            h.model_dump(exclude={"order_id"})
+            for h in sorted(order.status_history, key=lambda h: (h.changed_at, h.id))
+        ]
+    return data
+
+
+def get_order_expanded(session: Session, order_id: int, expand: List[str]) -> Optional[dict]:
+    """An order with its items / payments / status history nested, in 1 + len(expand) queries."""
+    order = session.exec(select_order_expanded(order_id, expand)).first()
+    if not order:
+        return None
+    return order_expanded_dict(order, expand, catalog.get())
+
+
+def update_order(session: Session, order_id: int, data: dict | OrderUpdate) -> Optional[Order]:
+    """Update fields on an order using values from a dict or OrderUpdate.
+
+    A `current_status` change goes through the order state machine (validated and
+    recorded in order_status_history); raises ValueError for an invalid transition or
+    for completing an order that is not fully paid.
+    """
     if isinstance(data, OrderUpdate):
         data = data.dict(exclude_unset=True)
 
-    with Session(database.engine) as session:
-        order = session.get(Order, order_id)
-        if not order:
-            return None
-        for key, val in data.items():
-            setattr(order, key, val)
-        session.add(order)
-        session.commit()
-        session.refresh(order)
-        return order
-
-
-def delete_order(order_id: int) -> bool:
+    order = session.get(Order, order_id)
+    if not order:
+        return None
+    data = dict(data)
+    new_status = data.pop("current_status", None)
+    for key, val in data.items():
+        setattr(order, key, val)
+    session.add(order)
+    if new_status is not None and new_status != order.current_status:
+        from_status = order.current_status
+        session.flush()
+        if not apply_transition(session, [order_id], from_status, new_status):
+            session.rollback()
+            raise transition_refused(session, order, from_status, new_status)
+    session.commit()
+    session.refresh(order)
+    kitchen.publish_order(order)
+    return order
+
+
+def bulk_update_orders(
+    session: Session,
+    changes: dict | OrderUpdate,
+    order_ids: Optional[List[int]] = None,
+    status: Optional[str] = None,
+    customer_id: Optional[int] = None,
+) -> Tuple[List[dict], Dict[int, str]]:
+    """Apply the same changes to many orders with one UPDATE ... RETURNING.
+
+    Targets the given `order_ids`, narrowed (or, without ids, selected) by the
+    `status` / `customer_id` filter. A `current_status` change goes through
+    `apply_transition`, once per current status of the matching orders (the other
+    fields are written by the same UPDATE), so it follows the state machine and the
+    payment rules and records history like any other status change.
+
+    Returns (updated orders as dicts, {order_id: reason} for requested ids left unchanged).
+    """
+    if isinstance(changes, OrderUpdate):
+        changes = changes.dict(exclude_unset=True)
+    # only real columns are written (OrderUpdate.payment_method has no column on orders)
+    values = {key: val for key, val in changes.items() if key in Order.__table__.columns}
+    if not values:
+        raise ValueError("No order fields to update")
+    if order_ids is None and not status and customer_id is None:
+        raise ValueError("Pass order_ids or at least one filter")
+    if values.get("customer_id") is not None and not session.get(Customer, values["customer_id"]):
+        raise ValueError("Customer not found")
+
+    new_status = values.pop("current_status", None)
+    conditions = []
+    if order_ids is not None:
+        order_ids = list(dict.fromkeys(order_ids))
+        conditions.append(Order.id.in_(order_ids))
+    if status:
+        conditions.append(Order.current_status == status)
+    if customer_id is not None:
+        conditions.append(Order.customer_id == customer_id)
+
+    if new_status is None:
+        stmt = update(Order).where(*conditions).values(**values).returning(*columns_for(Order))
+        updated = rows_to_dicts(session.execute(stmt))
+    else:
+        query = select(Order.id, Order.current_status).where(*conditions, Order.current_status.in_(sources_of(new_status)))
+        by_status: Dict[str, List[int]] = {}
+        for row in session.exec(query):
+            by_status.setdefault(row.current_status, []).append(row.id)
+        updated = []
+        for from_status, ids in by_status.items():
+            updated += apply_transition(session, ids, from_status, new_status, values=values)
+    session.commit()
+    for row in updated:
+        kitchen.publish(row)
+    # an order made ready and then completed is reported once, as completed
+    updated = list({row["id"]: row for row in updated}.values())
+
+    skipped: Dict[int, str] = {}
+    done = {row["id"] for row in updated}
+    missing = [i for i in order_ids or [] if i not in done]
+    if missing:
+        # one extra read, only when something was left unchanged, to explain why
+        current = {
+            row.id: row
+            for row in session.exec(select(Order.id, Order.current_status, Order.customer_id).where(Order.id.in_(missing)))
+        }
+        for i in missing:
+            row = current.get(i)
+            if row is None:
+                skipped[i] = "Order not found"
+            elif status and row.current_status != status:
+                skipped[i] = f"Order status is '{row.current_status}', not '{status}'"
+            elif customer_id is not None and row.customer_id != customer_id:
+                skipped[i] = f"Order does not belong to customer id {customer_id}"
+            elif new_status == "completed" and row.current_status in sources_of(new_status):
+                skipped[i] = "Order is not fully paid"
+            else:
+                skipped[i] = f"Cannot change order status from '{row.current_status}' to '{new_status}'"
+    return updated, skipped
+
+
+def delete_order(session: Session, order_id: int) -> bool:
     """Delete an order by id. Return True if deleted, False if not found."""
-    with Session(database.engine) as session:
-        order = session.get(Order, order_id)
-        if not order:
-            return False
-        session.delete(order)
-        session.commit()
-        return True
+    order = session.get(Order, order_id)
+    if not order:
+        return False
+    removed = dict(kitchen.order_payload(order), current_status="deleted")
+    session.execute(delete(OrderStatusHistory).where(OrderStatusHistory.order_id == order_id))
+    session.delete(order)
+    session.commit()
+    kitchen.publish(removed)
+    return True
+
+
+# REVIEWS
+# Every write also shifts the menu's rating aggregates in the same transaction
+# (see app/ratings.py) and invalidates the catalog, which serves average_rating.
+def create_review(session: Session, review: ReviewCreate) -> Review:
+    """Create a review and fold its rating into the menu's average."""
+    if not session.get(Customer, review.customer_id):
+        raise ValueError("Customer not found")
+    if not session.get(Menu, review.menu_id):
+        raise ValueError("Menu not found")
+    r = Review(customer_id=review.customer_id, menu_id=review.menu_id, rating=review.rating, comment=review.comment)
+    session.add(r)
+    apply_rating_delta(session, review.menu_id, review.rating, 1)
+    session.commit()
+    catalog.invalidate()
+    session.refresh(r)
+    return r
+
+
+def get_review(session: Session, review_id: int) -> Optional[Review]:
+    return session.get(Review, review_id)
+
+
+def get_reviews_by_menu(session: Session, menu_id: int, limit: Optional[int] = None, after_id: Optional[int] = None) -> List[Review]:
+    """Reviews of a menu ordered by id; with `limit`, one keyset page after `after_id`."""
+    query = select(Review).where(Review.menu_id == menu_id).order_by(Review.id)
+    if after_id is not None:
+        query = query.where(Review.id > after_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return session.exec(query).all()
+
+
+def update_review(session: Session, review_id: int, data: dict | ReviewUpdate) -> Optional[Review]:
+    """Update a review's rating/comment; a rating change moves the menu's average."""
+    if isinstance(data, ReviewUpdate):
+        data = data.dict(exclude_unset=True)
+
+    review = session.get(Review, review_id)
+    if not review:
+        return None
+    old_rating = review.rating
+    for key, val in data.items():
+        if key == "rating" and val is None:
+            continue
+        setattr(review, key, val)
+    session.add(review)
+    if review.rating != old_rating:
+        apply_rating_delta(session, review.menu_id, review.rating - old_rating, 0)
+    session.commit()
+    catalog.invalidate()
+    session.refresh(review)
+    return review
+
+
+def delete_review(session: Session, review_id: int) -> bool:
+    """Delete a review by id and take its rating out of the menu's average."""
+    review = session.get(Review, review_id)
+    if not review:
+        return False
+    apply_rating_delta(session, review.menu_id, -review.rating, -1)
+    session.delete(review)
+    session.commit()
+    catalog.invalidate()
+    return True
@@ -1,7 +1,14 @@
 import logging
 import os
+import time
+from contextvars import ContextVar
+from typing import Optional
 from dotenv import load_dotenv
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import Pool
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 # Load .env (if present) so DATABASE_URL can be read during local development
 load_dotenv()
@@ -14,17 +21,96 @@ if not DATABASE_URL:
 logger = logging.getLogger(__name__)
 logger.info("Initializing database module")
 
+# Connection pool sizing (ignored for SQLite). Size these against the number of
+# uvicorn workers in the Procfile: workers * (pool_size + max_overflow) must stay
+# below the Postgres max_connections of the plan.
+POOL_SETTINGS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+}
+# Pre-ping strategy: "always" issues SELECT 1 on every checkout, "idle" only for
+# connections that sat in the pool longer than DB_PRE_PING_IDLE_SECONDS, "off" never.
+PRE_PING = os.getenv("DB_PRE_PING", "idle").lower()
+PRE_PING_IDLE_SECONDS = float(os.getenv("DB_PRE_PING_IDLE_SECONDS", "30"))
+
+
+def _pool_kwargs() -> dict:
+    kwargs = dict(POOL_SETTINGS)
+    kwargs["pool_pre_ping"] = PRE_PING == "always"
+    return kwargs
+
+
+def _install_idle_ping(target):
+    """Ping connections on checkout only when they have been idle for a while."""
+
+    @event.listens_for(target, "checkin")
+    def _mark_idle(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(target, "checkout")
+    def _ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < PRE_PING_IDLE_SECONDS:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception:
+            # the pool discards this connection and retries with a fresh one
+            raise exc.DisconnectionError()
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+
 # create default engine if DATABASE_URL is provided
 def _create_engine(url: str):
     # SQLite requires check_same_thread for in-memory usage; Postgres does not
     if url.startswith("sqlite"):
         return create_engine(url, echo=False, connect_args={"check_same_thread": False})
-    return create_engine(url, echo=False, pool_pre_ping=True)
+    new_engine = create_engine(url, echo=False, **_pool_kwargs())
+    if PRE_PING == "idle":
+        _install_idle_ping(new_engine)
+    return new_engine
 
 engine = None
 if DATABASE_URL:
     engine = _create_engine(DATABASE_URL)
 
+# Opt-in async mode: hot routes are served by async handlers on an AsyncEngine
+# built from the same DATABASE_URL (asyncpg for Postgres, aiosqlite for SQLite).
+ASYNC_DB = os.getenv("ASYNC_DB", "").lower() in ("1", "true", "yes")
+
+
+def _async_url(url: str) -> str:
+    """Rewrite a sync DATABASE_URL to the matching async driver."""
+    scheme, sep, rest = url.partition("://")
+    base = scheme.split("+", 1)[0]
+    if base in ("postgres", "postgresql"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if base == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return url
+
+
+def _create_async_engine(url: str):
+    url = _async_url(url)
+    if url.startswith("sqlite"):
+        return create_async_engine(url, echo=False)
+    new_engine = create_async_engine(url, echo=False, **_pool_kwargs())
+    if PRE_PING == "idle":
+        _install_idle_ping(new_engine.sync_engine)
+    return new_engine
+
+
+async_engine = None
+if ASYNC_DB and DATABASE_URL:
+    async_engine = _create_async_engine(DATABASE_URL)
+
 def set_engine(new_engine):
     """Replace the module-level engine (used by other modules). Useful for tests/dev.
 
@@ -39,19 +125,138 @@ def get_engine():
     return engine
 
 
+def set_async_engine(new_engine):
+    """Replace the module-level AsyncEngine used by async routes (tests/dev)."""
+    global async_engine
+    async_engine = new_engine
+
+
 def init_db():
     """Create database tables from SQLModel metadata using the active engine.
 
-    This is a convenience for quick local setups. For production environments
-    prefer proper migrations (Alembic) and do not call this at runtime.
+    This is a convenience for quick local setups and throwaway test databases.
+    Real databases are managed with `python -m app.migrations upgrade`.
     """
     if engine is None:
         raise RuntimeError("Database engine is not configured. Set DATABASE_URL or call set_engine().")
     SQLModel.metadata.create_all(engine)
 
 
+class CheckoutCounter:
+    """Number of pooled connections checked out while serving one request."""
+
+    def __init__(self):
+        self.count = 0
+
+
+# process-wide totals; read them through checkout_stats()
+_checkout_totals = {"requests": 0, "checkouts": 0, "max_per_request": 0}
+_request_checkouts: ContextVar[Optional[CheckoutCounter]] = ContextVar("request_checkouts", default=None)
+
+
+@event.listens_for(Pool, "checkout")
+def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+    _checkout_totals["checkouts"] += 1
+    counter = _request_checkouts.get()
+    if counter is not None:
+        counter.count += 1
+
+
+def begin_request_tracking() -> CheckoutCounter:
+    """Start counting checkouts for the current request context.
+
+    The counter object is shared by reference, so checkouts made from threadpool
+    workers (sync dependencies/handlers run on copies of the context) still land on it.
+    """
+    counter = CheckoutCounter()
+    _request_checkouts.set(counter)
+    return counter
+
+
+def end_request_tracking(counter: CheckoutCounter):
+    _checkout_totals["requests"] += 1
+    if counter.count > _checkout_totals["max_per_request"]:
+        _checkout_totals["max_per_request"] = counter.count
+
+
+# upper bounds (ms) of the checkout wait-time histogram buckets; the last one is open-ended
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+_wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+_wait_totals = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+
+
+def _record_wait(seconds: float):
+    ms = seconds * 1000
+    for i, bound in enumerate(WAIT_BUCKETS_MS):
+        if ms <= bound:
+            _wait_histogram[i] += 1
+            break
+    else:
+        _wait_histogram[-1] += 1
+    _wait_totals["count"] += 1
+    _wait_totals["total_ms"] += ms
+    if ms > _wait_totals["max_ms"]:
+        _wait_totals["max_ms"] = ms
+
+
+def _describe_pool(pool) -> dict:
+    info = {"class": type(pool).__name__}
+    # only QueuePool-style pools expose sizing; SQLite pools do not
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, name, None)
+        if callable(fn):
+            info[name] = fn()
+    return info
+
+
+def pool_stats() -> dict:
+    """Snapshot of pool occupancy, configuration and checkout wait times."""
+    labels = [f"<={b}ms" for b in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}ms"]
+    stats = {
+        "config": dict(POOL_SETTINGS, pre_ping=PRE_PING, pre_ping_idle_seconds=PRE_PING_IDLE_SECONDS),
+        "pool": _describe_pool(engine.pool) if engine is not None else None,
+        "async_pool": _describe_pool(async_engine.sync_engine.pool) if async_engine is not None else None,
+        "checkouts": checkout_stats(),
+        "wait": {
+            "count": _wait_totals["count"],
+            "avg_ms": _wait_totals["total_ms"] / _wait_totals["count"] if _wait_totals["count"] else 0.0,
+            "max_ms": _wait_totals["max_ms"],
+            "histogram": dict(zip(labels, _wait_histogram)),
+        },
+    }
+    return stats
+
+
+def checkout_stats() -> dict:
+    """Return process-wide connection checkout counters."""
+    stats = dict(_checkout_totals)
+    stats["avg_per_request"] = stats["checkouts"] / stats["requests"] if stats["requests"] else 0.0
+    return stats
+
+
 def get_session():
+    """FastAPI dependency yielding one Session per request.
+
+    The session is bound to a single connection checked out for the whole
+    request, so every crud call made while handling it shares that connection
+    (crud commits end the transaction but do not return the connection to the pool).
+    """
     if engine is None:
         raise RuntimeError("Database engine is not configured. Set DATABASE_URL or call set_engine().")
-    with Session(engine) as session:
-        yield session
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        _record_wait(time.perf_counter() - started)
+        with Session(bind=connection) as session:
+            yield session
+
+
+
+async def get_async_session():
+    """Async counterpart of get_session for routes served in ASYNC_DB mode."""
+    if async_engine is None:
+        raise RuntimeError("Async engine is not configured. Set DATABASE_URL with ASYNC_DB=1 or call set_async_engine().")
+    started = time.perf_counter()
+    async with async_engine.connect() as connection:
+        _record_wait(time.perf_counter() - started)
+        async with AsyncSession(bind=connection, expire_on_commit=False) as session:
+            yield session
@@ -0,0 +1,159 @@
+"""Discount resolution for order pricing, from an in-process index.
+
+Orders name a discount by id or by code. Lookups are served from an index of the
+discounts that have not expired, held in memory like the catalog snapshot (see
+app/catalog_cache.py): every discount write in crud.py calls
+`discount_index.invalidate()` after commit, and other workers reload when their copy
+is older than DISCOUNT_CACHE_TTL seconds. A lookup therefore costs no query on the
+order path except right after a change.
+
+`valid_until` is inclusive. A value without a time of day (midnight, as the DATE
+column in the production schema stores it) covers that whole day.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlmodel import Session, or_, select
+
+from . import database
+from .fastjson import columns_for, rows_to_dicts
+from .models import Discount
+
+DISCOUNT_CACHE_TTL = float(os.getenv("DISCOUNT_CACHE_TTL", "60"))
+
+
+def normalize_code(code: Optional[str]) -> Optional[str]:
+    """Codes are stored and matched upper-case without surrounding spaces."""
+    if code is None:
+        return None
+    return code.strip().upper() or None
+
+
+def expires_at(valid_until: Optional[datetime]) -> Optional[datetime]:
+    """First moment the discount no longer applies (None = never expires)."""
+    if valid_until is None:
+        return None
+    if valid_until.time() == datetime.min.time():
+        return valid_until + timedelta(days=1)
+    return valid_until + timedelta(microseconds=1)
+
+
+def apply_discount(total: float, discount: Optional[dict]) -> float:
+    if not discount:
+        return total
+    return round(total * (100.0 - float(discount["percentage"])) / 100.0, 2)
+
+
+def discount_query():
+    """Discounts that can still apply; a date-only valid_until keeps its whole day."""
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return select(*columns_for(Discount)).where(or_(Discount.valid_until.is_(None), Discount.valid_until >= today))
+
+
+class DiscountSnapshot:
+    def __init__(self, version: int, discounts: List[dict]):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.by_id: Dict[int, dict] = {d["id"]: d for d in discounts}
+        self.by_code: Dict[str, dict] = {d["code"]: d for d in discounts if d["code"]}
+
+    def resolve(self, discount_id: Optional[int] = None, code: Optional[str] = None, at: Optional[datetime] = None) -> Optional[dict]:
+        """The discount named by id and/or code, or None when neither is given.
+
+        Raises ValueError if it does not exist, has expired, or id and code disagree.
+        """
+        code = normalize_code(code)
+        if discount_id is None and code is None:
+            return None
+        discount = self.by_id.get(discount_id) if discount_id is not None else self.by_code.get(code)
+        if discount is None:
+            # expired ones are not in the index either
+            raise ValueError("Discount not found or expired")
+        if code is not None and discount["code"] != code:
+            raise ValueError("Discount id and code do not match")
+        end = expires_at(discount["valid_until"])
+        if end is not None and (at or datetime.utcnow()) >= end:
+            raise ValueError("Discount not found or expired")
+        return discount
+
+
+class DiscountIndex:
+    def __init__(self, ttl: float = DISCOUNT_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._version = 1
+        self._snapshot: Optional[DiscountSnapshot] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _fresh(self) -> Optional[DiscountSnapshot]:
+        snap = self._snapshot
+        if snap is None or snap.version != self._version:
+            return None
+        if time.monotonic() - snap.loaded_at >= self.ttl:
+            return None
+        return snap
+
+    def lookup(self) -> Optional[DiscountSnapshot]:
+        """Return the current index, or None (a miss) if it must be reloaded."""
+        snap = self._fresh()
+        if snap is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return snap
+
+    def store(self, version: int, discounts: List[dict]) -> DiscountSnapshot:
+        """Install an index loaded at `version` unless a write invalidated it meanwhile."""
+        snap = DiscountSnapshot(version, discounts)
+        with self._lock:
+            if version == self._version:
+                self._snapshot = snap
+        return snap
+
+    def get(self) -> DiscountSnapshot:
+        """Return a fresh index, loading it with a short-lived session on a miss."""
+        snap = self.lookup()
+        if snap is not None:
+            return snap
+        version = self._version
+        with Session(database.engine) as session:
+            return self.store(version, rows_to_dicts(session.exec(discount_query())))
+
+    def invalidate(self):
+        """Drop the index after a discount write; the next lookup reloads it."""
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+            self.invalidations += 1
+
+    def resolve(self, discount_id: Optional[int] = None, code: Optional[str] = None, at: Optional[datetime] = None) -> Optional[dict]:
+        """See DiscountSnapshot.resolve; orders without a discount never load the index."""
+        if discount_id is None and normalize_code(code) is None:
+            return None
+        return self.get().resolve(discount_id, code, at)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        snap = self._fresh()
+        return {
+            "version": self._version,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "cached": snap is not None,
+            "discounts": len(snap.by_id) if snap else None,
+        }
+
+
+discount_index = DiscountIndex()
@@ -0,0 +1,142 @@
+"""Streaming CSV/JSONL export of orders, order items and payments (accounting extracts).
+
+Rows are read through a server-side cursor (`stream_results` + `yield_per`) on a plain
+Core connection and encoded batch by batch straight from the result tuples, so memory
+stays constant and no ORM objects are built. Output can be gzip-compressed on the fly.
+
+Date filters are half-open ranges, [start, end):
+- orders by `created_at`
+- order_items by their order's `created_at`
+- payments by `paid_at`
+
+CLI (PowerShell):
+    & ./venv/Scripts/python.exe -m app.exporter orders --start 2024-05-01 --end 2024-05-02 -o orders.csv
+    & ./venv/Scripts/python.exe -m app.exporter payments --format jsonl --gzip -o payments.jsonl.gz
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import zlib
+from datetime import date, datetime
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import select
+
+from . import database
+from .fastjson import columns_for, dumps
+from .models import Order, OrderItem, Payment
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+KINDS = ("orders", "order_items", "payments")
+FORMATS = ("csv", "jsonl")
+MEDIA_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+
+def export_query(kind: str, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """Projected query for one export, ordered by id."""
+    if kind == "orders":
+        model, stamp = Order, Order.created_at
+        query = select(*columns_for(Order))
+    elif kind == "order_items":
+        model, stamp = OrderItem, Order.created_at
+        query = select(*columns_for(OrderItem)).join(Order, Order.id == OrderItem.order_id)
+    elif kind == "payments":
+        model, stamp = Payment, Payment.paid_at
+        query = select(*columns_for(Payment))
+    else:
+        raise ValueError(f"Unknown export '{kind}' (expected one of {', '.join(KINDS)})")
+    if start is not None:
+        query = query.where(stamp >= start)
+    if end is not None:
+        query = query.where(stamp < end)
+    return query.order_by(model.id)
+
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _encode_csv(columns, batches: Iterable) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows([_csv_value(v) for v in row] for row in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _encode_jsonl(columns, batches: Iterable) -> Iterator[bytes]:
+    for batch in batches:
+        yield b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in batch)
+
+
+def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def iter_export(
+    kind: str,
+    fmt: str = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    gzip: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[bytes]:
+    """Yield the encoded export in chunks (one per fetched batch).
+
+    Opens its own connection: the generator outlives the request handler.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    query = export_query(kind, start, end)
+    encode = _encode_csv if fmt == "csv" else _encode_jsonl
+
+    def chunks():
+        with database.engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+            yield from encode(list(result.keys()), result.partitions())
+
+    return _gzip(chunks()) if gzip else chunks()
+
+
+def export_filename(kind: str, fmt: str, start: Optional[datetime], end: Optional[datetime], gzip: bool) -> str:
+    parts = [kind] + [d.strftime("%Y%m%d") for d in (start, end) if d is not None]
+    return "_".join(parts) + f".{fmt}" + (".gz" if gzip else "")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.exporter", description="Export orders, order items or payments.")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None, help="inclusive, e.g. 2024-05-01")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None, help="exclusive")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("-o", "--output", default="-", help="file to write ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    if database.get_engine() is None:
+        print("DATABASE_URL is not set", file=sys.stderr)
+        return 2
+
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    with out:
+        for chunk in iter_export(args.kind, args.format, args.start, args.end, args.gzip):
+            out.write(chunk)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
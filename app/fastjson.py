@@ -0,0 +1,51 @@
+"""Fast JSON encoding for read endpoints.
+
+Read paths project only the columns of the response schema into plain dicts and
+encode them here, instead of returning ORM objects that FastAPI re-validates and
+copies against `response_model` one by one. Uses orjson when installed and falls
+back to the standard library encoder otherwise; both produce the same wire shape
+as the Pydantic serialization (ISO-8601 datetimes, floats, nulls).
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import Response
+from sqlmodel import SQLModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def columns_for(model: type[SQLModel], schema: Optional[type[SQLModel]] = None) -> List:
+    """Table columns backing the fields of `schema` (defaults to the table model itself)."""
+    return [getattr(model, name) for name in (schema or model).model_fields]
+
+
+def rows_to_dicts(rows: Iterable) -> List[Dict[str, Any]]:
+    """Turn projected result rows into dicts keyed by column name."""
+    return [dict(row._mapping) for row in rows]
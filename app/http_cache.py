@@ -0,0 +1,41 @@
+"""Conditional GET helpers (strong ETags + Cache-Control) for catalog endpoints."""
+import os
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+from .catalog_cache import CatalogSnapshot
+from .fastjson import FastJSONResponse
+
+# Clients may reuse a catalog response for this many seconds before revalidating
+# with If-None-Match; revalidation of an unchanged catalog costs a bodiless 304.
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "30"))
+CATALOG_CACHE_CONTROL = f"public, max-age={CATALOG_MAX_AGE}, must-revalidate"
+
+
+def catalog_etag(snapshot: CatalogSnapshot, *parts) -> str:
+    """Strong ETag for a view of the catalog: snapshot digest plus the view's key."""
+    suffix = "-".join("" if p is None else str(p) for p in parts)
+    return f'"{snapshot.digest}-{suffix}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so ignore any W/ prefix
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag[2:] == etag if tag.startswith("W/") else tag == etag for tag in candidates)
+
+
+def catalog_response(request: Request, etag: str, content: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Return a bodiless 304 if the client already has `etag`, else the encoded content.
+
+    `content` is already-projected plain data from the catalog snapshot, so it is
+    encoded directly instead of going through response_model validation.
+    """
+    cache_headers = {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
+    return FastJSONResponse(content, headers={**cache_headers, **(headers or {})})
@@ -0,0 +1,349 @@
+"""Idempotency-Key support for POST /api/orders and POST /api/payments.
+
+Clients retry these requests on flaky connections. When a request carries an
+`Idempotency-Key` header, the first response is stored and every retry with the same
+key gets that response replayed (with `Idempotent-Replayed: true`) instead of pricing
+and committing again.
+
+- The key row is inserted in the same transaction as the order / payment, so a key is
+  never stored without its effect (nor the other way round). Two concurrent requests
+  with one key collide on the primary key; the loser is answered from the winner's row.
+- The id of the created order / payment is written to the key row in that same
+  transaction, and the response body right after the commit (crud commits on its own,
+  so this is a second, small transaction). A retry that finds a row without a body
+  (the worker died in between) rebuilds the response from the stored id; the request
+  itself never runs twice. A row without either gets 409 (still in progress).
+- Completed responses are also kept in a per-process LRU (IDEMPOTENCY_CACHE_SIZE
+  entries), so hot retries cost no query.
+- Reusing a key with a different body is rejected with 422.
+- Keys expire after IDEMPOTENCY_TTL_HOURS. `python -m app.idempotency prune` deletes
+  expired rows.
+
+Failed requests (400s) store nothing, so they can be retried with the same key.
+"""
+import argparse
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import database
+from .fastjson import dumps
+from .models import IdempotencyKey, Order, Payment
+
+IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "1024"))
+MAX_KEY_LENGTH = 255
+REPLAY_HEADER = "Idempotent-Replayed"
+# the table each scope creates rows in
+RESOURCES: Dict[str, type[SQLModel]] = {"orders": Order, "payments": Payment}
+
+
+class StoredResponse(NamedTuple):
+    request_hash: str
+    status_code: Optional[int]
+    body: Optional[bytes]
+    resource_id: Optional[int] = None
+
+
+class ResponseCache:
+    """Bounded LRU of completed responses, keyed by (scope, key)."""
+
+    def __init__(self, size: int = IDEMPOTENCY_CACHE_SIZE, ttl: float = IDEMPOTENCY_TTL_HOURS * 3600):
+        self.size = size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, StoredResponse]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, scope: str, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            entry = self._entries.get((scope, key))
+            if entry is None or entry[0] <= time.monotonic():
+                self._entries.pop((scope, key), None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end((scope, key))
+            self.hits += 1
+            return entry[1]
+
+    def put(self, scope: str, key: str, stored: StoredResponse):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._entries[(scope, key)] = (time.monotonic() + self.ttl, stored)
+            self._entries.move_to_end((scope, key))
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size": self.size,
+            "ttl_hours": self.ttl / 3600,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+cache = ResponseCache()
+
+
+def request_hash(payload: SQLModel) -> str:
+    """Digest of the parsed request body (insensitive to whitespace and key order)."""
+    return hashlib.sha256(dumps(payload.model_dump(mode="json"))).hexdigest()
+
+
+def check_key(key: str) -> str:
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+    return key
+
+
+def _expired_before() -> datetime:
+    return datetime.utcnow() - timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+
+
+def _select(scope: str, key: str):
+    return select(
+        IdempotencyKey.request_hash,
+        IdempotencyKey.status_code,
+        IdempotencyKey.response_body,
+        IdempotencyKey.resource_id,
+        IdempotencyKey.created_at,
+    ).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+
+
+def _delete(scope: str, key: str):
+    return delete(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+
+
+def _stored(row) -> StoredResponse:
+    body = row.response_body.encode() if row.response_body is not None else None
+    return StoredResponse(row.request_hash, row.status_code, body, row.resource_id)
+
+
+def _check(stored: StoredResponse, digest: str):
+    """Raise 422 for a different body, 409 while nothing was committed yet."""
+    if stored.request_hash != digest:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request body")
+    if stored.body is None and stored.resource_id is None:
+        raise HTTPException(
+            status_code=409, detail="A request with this Idempotency-Key is still being processed", headers={"Retry-After": "1"}
+        )
+
+
+def _replay(scope: str, key: str, stored: StoredResponse) -> Response:
+    cache.put(scope, key, stored)
+    return Response(stored.body, status_code=stored.status_code, media_type="application/json", headers={REPLAY_HEADER: "true"})
+
+
+def _resource(resource):
+    if resource is None:
+        raise HTTPException(status_code=404, detail="The resource created with this Idempotency-Key no longer exists")
+    return resource
+
+
+def _capture(session: Session, row: IdempotencyKey, model: type[SQLModel]) -> Callable[[], None]:
+    """Copy the id of the `model` row `create` adds onto the key row before it commits.
+
+    The key row is then updated in the same transaction as the resource. Returns a
+    function that removes the listeners again.
+    """
+    created = []
+
+    def pending_to_persistent(sess, instance):
+        if isinstance(instance, model) and not created:
+            created.append(instance)
+
+    def before_commit(sess):
+        if created and row.resource_id is None:
+            row.resource_id = created[0].id
+
+    event.listen(session, "pending_to_persistent", pending_to_persistent)
+    event.listen(session, "before_commit", before_commit)
+
+    def remove():
+        event.remove(session, "pending_to_persistent", pending_to_persistent)
+        event.remove(session, "before_commit", before_commit)
+
+    return remove
+
+
+def _render(result, response_model: type[SQLModel]) -> bytes:
+    # same wire shape FastAPI produces from response_model; table models are dumped
+    # as they are (validating a copy would touch their relationships)
+    if not isinstance(result, response_model):
+        result = response_model.model_validate(result, from_attributes=True)
+    return dumps(result.model_dump(mode="json"))
+
+
+def _record(scope: str, key: str, status_code: int, body: bytes):
+    return (
+        update(IdempotencyKey)
+        .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+        .values(status_code=status_code, response_body=body.decode())
+    )
+
+
+def run(
+    session: Session,
+    scope: str,
+    key: str,
+    payload: SQLModel,
+    create: Callable[[], object],
+    response_model: type[SQLModel],
+    status_code: int = 201,
+) -> Response:
+    """Run `create` once per (scope, key) and replay its response on retries.
+
+    `create` must add its row to `session` and commit through it (as
+    crud.create_order / create_payment do): the key row is added first and commits
+    with it, carrying the new row's id. ValueErrors from `create` propagate and
+    nothing is stored.
+    """
+    key = check_key(key)
+    digest = request_hash(payload)
+    stored = cache.get(scope, key)
+    if stored is None:
+        row = session.execute(_select(scope, key)).first()
+        if row is not None and row.created_at < _expired_before():
+            session.execute(_delete(scope, key))
+            session.commit()
+            row = None
+        stored = _stored(row) if row is not None else None
+    if stored is not None:
+        return _answer(session, scope, key, stored, digest, response_model, status_code)
+
+    row = IdempotencyKey(scope=scope, key=key, request_hash=digest)
+    session.add(row)
+    remove = _capture(session, row, RESOURCES[scope])
+    try:
+        result = create()
+    except IntegrityError:
+        # a concurrent request with the same key committed first
+        session.rollback()
+        found = session.execute(_select(scope, key)).first()
+        if found is None:
+            raise
+        return _answer(session, scope, key, _stored(found), digest, response_model, status_code)
+    finally:
+        remove()
+
+    body = _render(result, response_model)
+    session.execute(_record(scope, key, status_code, body))
+    session.commit()
+    cache.put(scope, key, StoredResponse(digest, status_code, body, row.resource_id))
+    return Response(body, status_code=status_code, media_type="application/json")
+
+
+def _answer(
+    session: Session, scope: str, key: str, stored: StoredResponse, digest: str, response_model: type[SQLModel], status_code: int
+) -> Response:
+    """Replay a stored response, rebuilding (and recording) it from the resource if needed."""
+    _check(stored, digest)
+    if stored.body is None:
+        body = _render(_resource(session.get(RESOURCES[scope], stored.resource_id)), response_model)
+        session.execute(_record(scope, key, status_code, body))
+        session.commit()
+        stored = stored._replace(status_code=status_code, body=body)
+    return _replay(scope, key, stored)
+
+
+async def run_async(
+    session: AsyncSession,
+    scope: str,
+    key: str,
+    payload: SQLModel,
+    create: Callable[[], Awaitable[object]],
+    response_model: type[SQLModel],
+    status_code: int = 201,
+) -> Response:
+    """`run` for the async routes (ASYNC_DB); `create` is awaited."""
+    key = check_key(key)
+    digest = request_hash(payload)
+    stored = cache.get(scope, key)
+    if stored is None:
+        row = (await session.execute(_select(scope, key))).first()
+        if row is not None and row.created_at < _expired_before():
+            await session.execute(_delete(scope, key))
+            await session.commit()
+            row = None
+        stored = _stored(row) if row is not None else None
+    if stored is not None:
+        return await _answer_async(session, scope, key, stored, digest, response_model, status_code)
+
+    row = IdempotencyKey(scope=scope, key=key, request_hash=digest)
+    session.add(row)
+    remove = _capture(session.sync_session, row, RESOURCES[scope])
+    try:
+        result = await create()
+    except IntegrityError:
+        await session.rollback()
+        found = (await session.execute(_select(scope, key))).first()
+        if found is None:
+            raise
+        return await _answer_async(session, scope, key, _stored(found), digest, response_model, status_code)
+    finally:
+        remove()
+
+    body = _render(result, response_model)
+    await session.execute(_record(scope, key, status_code, body))
+    await session.commit()
+    cache.put(scope, key, StoredResponse(digest, status_code, body, row.resource_id))
+    return Response(body, status_code=status_code, media_type="application/json")
+
+
+async def _answer_async(
+    session: AsyncSession, scope: str, key: str, stored: StoredResponse, digest: str, response_model: type[SQLModel], status_code: int
+) -> Response:
+    _check(stored, digest)
+    if stored.body is None:
+        body = _render(_resource(await session.get(RESOURCES[scope], stored.resource_id)), response_model)
+        await session.execute(_record(scope, key, status_code, body))
+        await session.commit()
+        stored = stored._replace(status_code=status_code, body=body)
+    return _replay(scope, key, stored)
+
+
+def prune(session: Session) -> int:
+    """Delete expired keys; returns how many rows were removed."""
+    result = session.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < _expired_before()))
+    session.commit()
+    return result.rowcount
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.idempotency", description="Maintain stored idempotency keys.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("prune", help=f"delete keys older than IDEMPOTENCY_TTL_HOURS ({IDEMPOTENCY_TTL_HOURS:g})")
+    parser.parse_args(argv)
+
+    if database.get_engine() is None:
+        print("DATABASE_URL is not set", file=sys.stderr)
+        return 2
+    with Session(database.engine) as session:
+        print(f"Deleted {prune(session)} expired idempotency key(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+"""Streaming import of categories, menus, addons and customers from CSV or JSONL.
+
+Records are parsed lazily (one line at a time), validated against the import schemas
+in app/schemas.py and written in chunks of IMPORT_CHUNK_SIZE rows, one transaction per
+chunk, so memory stays flat however large the file is.
+
+- Rows with an `id` are upserted (INSERT ... ON CONFLICT (id) DO UPDATE). Only the
+  columns the row actually carries are updated; empty cells and columns missing from
+  the file keep their current values, and derived columns (menu rating aggregates)
+  are never touched. Model defaults are used only when the row is new.
+- Rows without one are inserted; on Postgres they are loaded with COPY.
+- Invalid rows and rows pointing at a missing category / menu are skipped and reported
+  with their line number; the rest of the file is still imported.
+
+CLI (PowerShell):
+    & ./venv/Scripts/python.exe -m app.importer menus menus.csv
+    & ./venv/Scripts/python.exe -m app.importer customers customers.jsonl.gz --chunk-size 5000
+
+Files are read as CSV (header row) or JSONL by extension (.csv / .jsonl / .ndjson,
+optionally .gz); pass --format to override.
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import sys
+import time
+from itertools import islice
+from typing import Callable, Dict, IO, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session
+
+from . import database
+from .catalog_cache import catalog
+from .models import Category, Customer, Menu, MenuAddon
+from .schemas import AddonImport, CategoryImport, CustomerImport, MenuImport
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+# keep the report small for files that are wrong throughout
+MAX_REPORTED_ERRORS = 100
+
+# kind -> (table model, validation schema, (foreign key column, referenced model))
+KINDS = {
+    "categories": (Category, CategoryImport, None),
+    "menus": (Menu, MenuImport, ("category_id", Category)),
+    "addons": (MenuAddon, AddonImport, ("menu_id", Menu)),
+    "customers": (Customer, CustomerImport, None),
+}
+CATALOG_KINDS = ("categories", "menus", "addons")
+# maintained by app/ratings.py from the reviews table; an import never overwrites them
+DERIVED_COLUMNS = ("average_rating", "rating_sum", "rating_count")
+FORMATS = ("csv", "jsonl")
+
+
+class ImportReport:
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.read = 0
+        self.inserted = 0
+        self.upserted = 0
+        self.error_count = 0
+        self.errors: List[dict] = []
+        self.started = time.monotonic()
+
+    def error(self, line: int, detail: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "detail": detail})
+
+    def as_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "read": self.read,
+            "inserted": self.inserted,
+            "upserted": self.upserted,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "seconds": round(time.monotonic() - self.started, 3),
+        }
+
+
+# PARSING
+def detect_format(filename: str) -> str:
+    name = filename.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    raise ValueError(f"Cannot tell the format of '{filename}'; pass csv or jsonl explicitly")
+
+
+def open_text(stream: IO[bytes], gzipped: bool = False) -> IO[str]:
+    """Wrap a binary stream (optionally gzip-compressed) as lazily decoded text."""
+    if gzipped:
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+def iter_records(lines: IO[str], fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (line number, record, parse error) one record at a time."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            # empty CSV cells mean "not given"
+            yield reader.line_num, {k: (v if v != "" else None) for k, v in record.items() if k}, None
+    elif fmt == "jsonl":
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield number, None, "Expected a JSON object"
+                continue
+            yield number, record, None
+    else:
+        raise ValueError(f"Unknown import format '{fmt}'")
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors())
+
+
+# WRITING
+def _missing_refs(session: Session, model, ids) -> set:
+    wanted = {i for i in ids if i is not None}
+    if not wanted:
+        return set()
+    return wanted - set(session.execute(select(model.id).where(model.id.in_(wanted))).scalars())
+
+
+def _copy_rows(session: Session, model, rows: List[dict]):
+    """Load rows with COPY ... FROM STDIN (Postgres / psycopg2)."""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        # csv writes None as an empty unquoted field, which COPY reads as NULL
+        writer.writerow(row[c] for c in columns)
+    buffer.seek(0)
+    cursor = session.connection().connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {model.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def _upsert_rows(session: Session, model, rows: List[dict], update_columns: Tuple[str, ...]):
+    """Insert rows by id; on conflict update `update_columns` only (all rows carry them)."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(model)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(model)
+    else:
+        raise ValueError(f"Upserts are not supported on {dialect}")
+    if update_columns:
+        stmt = stmt.on_conflict_do_update(index_elements=["id"], set_={c: stmt.excluded[c] for c in update_columns})
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["id"])
+    session.execute(stmt, rows)
+
+
+def _insert_rows(session: Session, model, rows: List[dict], use_copy: bool):
+    if use_copy:
+        _copy_rows(session, model, rows)
+    else:
+        session.execute(model.__table__.insert(), rows)
+
+
+def _sync_sequence(session: Session, model):
+    """After explicit ids were written, move the Postgres id sequence past them."""
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    table = model.__tablename__
+    session.execute(
+        text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))")
+    )
+
+
+def _can_copy(session: Session) -> bool:
+    dialect = session.get_bind().dialect
+    return dialect.name == "postgresql" and dialect.driver == "psycopg2"
+
+
+def _write_chunk(session: Session, kind: str, chunk: List[Tuple[int, dict]], report: ImportReport, use_copy: bool):
+    model, schema, foreign_key = KINDS[kind]
+    valid: List[Tuple[int, dict]] = []
+    for line, record in chunk:
+        try:
+            parsed = schema.model_validate(record).model_dump(exclude_unset=True)
+        except ValidationError as e:
+            report.error(line, _validation_message(e))
+            continue
+        # only what the row carries; None (an empty cell) means "not given"
+        valid.append((line, {k: v for k, v in parsed.items() if v is not None}))
+
+    if foreign_key:
+        column, referenced = foreign_key
+        missing = _missing_refs(session, referenced, (row.get(column) for _, row in valid))
+        if missing:
+            for line, row in valid:
+                if row.get(column) in missing:
+                    report.error(line, f"{referenced.__name__} id {row[column]} not found")
+            valid = [(line, row) for line, row in valid if row.get(column) not in missing]
+
+    # model defaults for the columns a row leaves out (e.g. is_available, the rating
+    # aggregates), so every inserted row has the same keys; they only apply to new rows
+    defaults = {
+        name: field.get_default(call_default_factory=True)
+        for name, field in model.model_fields.items()
+        if name != "id" and not field.is_required()
+    }
+    # upserts are grouped by the set of columns they update: one statement per group
+    upserts: Dict[Tuple[str, ...], List[dict]] = {}
+    without_id = []
+    for _, row in valid:
+        if row.get("id") is None:
+            without_id.append(dict(defaults, **row))
+        else:
+            update_columns = tuple(sorted(c for c in row if c != "id" and c not in DERIVED_COLUMNS))
+            upserts.setdefault(update_columns, []).append(dict(defaults, **row))
+    for update_columns, rows in upserts.items():
+        _upsert_rows(session, model, rows, update_columns)
+    if without_id:
+        _insert_rows(session, model, without_id, use_copy)
+    if upserts:
+        _sync_sequence(session, model)
+    session.commit()
+    report.upserted += sum(len(rows) for rows in upserts.values())
+    report.inserted += len(without_id)
+
+
+def import_records(
+    session: Session,
+    kind: str,
+    lines: IO[str],
+    fmt: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    on_progress: Optional[Callable[[ImportReport], None]] = None,
+) -> ImportReport:
+    """Import one file of `kind` records; commits every `chunk_size` rows."""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown import kind '{kind}' (expected one of {', '.join(KINDS)})")
+    report = ImportReport(kind)
+    use_copy = _can_copy(session)
+    records = iter_records(lines, fmt)
+    try:
+        while True:
+            batch = list(islice(records, chunk_size))
+            if not batch:
+                break
+            report.read += len(batch)
+            chunk = []
+            for line, record, error in batch:
+                if error:
+                    report.error(line, error)
+                else:
+                    chunk.append((line, record))
+            _write_chunk(session, kind, chunk, report, use_copy)
+            if on_progress:
+                on_progress(report)
+    except (csv.Error, UnicodeDecodeError, EOFError, OSError) as e:
+        # unreadable input: keep what was committed and report where it stopped
+        report.error(report.read, f"Could not read input: {e}")
+    finally:
+        if kind in CATALOG_KINDS and (report.inserted or report.upserted):
+            catalog.invalidate()
+    return report
+
+
+def import_stream(kind: str, raw: IO[bytes], fmt: str, gzipped: bool = False, chunk_size: int = IMPORT_CHUNK_SIZE) -> ImportReport:
+    """Import from a binary stream with a short-lived session of its own (used by the endpoint)."""
+    with Session(database.engine) as session:
+        return import_records(session, kind, open_text(raw, gzipped), fmt, chunk_size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.importer", description="Import CSV/JSONL files into the database.")
+    parser.add_argument("kind", choices=list(KINDS))
+    parser.add_argument("path", help="file to import ('-' for stdin)")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    engine = database.get_engine()
+    if engine is None:
+        print("DATABASE_URL is not set", file=sys.stderr)
+        return 2
+
+    fmt = args.format or detect_format(args.path)
+    raw = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    progress = lambda r: logger.info("%s: %d read, %d written, %d errors", r.kind, r.read, r.inserted + r.upserted, r.error_count)
+    with raw, Session(engine) as session:
+        report = import_records(session, args.kind, open_text(raw, args.path.endswith(".gz")), fmt, args.chunk_size, progress)
+
+    result = report.as_dict()
+    for error in result["errors"]:
+        print(f"line {error['line']}: {error['detail']}", file=sys.stderr)
+    print(json.dumps({k: v for k, v in result.items() if k != "errors"}))
+    return 1 if report.error_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
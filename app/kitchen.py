@@ -0,0 +1,260 @@
+"""Kitchen order queue with push updates for kitchen screens.
+
+The hub keeps an in-memory, ordered view of open orders grouped by `current_status`
+and fans out deltas to subscribed screens (SSE / WebSocket), so screens never poll
+Postgres. crud publishes an event after every committed order change; the event goes
+through a broker, and every worker's hub applies what the broker delivers:
+
+- LocalBroker (default): in-process fan-out, enough for a single uvicorn worker.
+- PostgresBroker (KITCHEN_BROKER=postgres): NOTIFY on publish and a LISTEN thread per
+  worker, so every worker's screens see changes made by any other worker.
+
+Event shape: {"seq": n, "type": "upsert" | "remove", "order": {...order columns...}}
+"""
+import abc
+import asyncio
+import json
+import logging
+import os
+import select as select_module
+import threading
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.engine import make_url
+from sqlmodel import Session, select
+
+from . import database
+from .fastjson import columns_for, dumps, rows_to_dicts
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ("pending", "preparing", "ready")
+KITCHEN_BROKER = os.getenv("KITCHEN_BROKER", "local").lower()
+NOTIFY_CHANNEL = "kitchen_orders"
+SUBSCRIBER_BUFFER = 256
+
+
+def order_payload(order: Order) -> dict:
+    """Plain, JSON-safe dict of an order's columns (created_at as ISO-8601)."""
+    data = {name: getattr(order, name) for name in Order.model_fields}
+    return _normalize(data)
+
+
+def _normalize(data: dict) -> dict:
+    created_at = data.get("created_at")
+    if created_at is not None and not isinstance(created_at, str):
+        data["created_at"] = created_at.isoformat()
+    return data
+
+
+class Subscriber:
+    """One connected screen: an asyncio queue fed from any thread."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER)
+        self.overflowed = False
+
+    def _put(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # a stuck screen must not hold the hub back; it resyncs from a snapshot
+            self.overflowed = True
+
+    def deliver(self, event: dict):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+
+class KitchenHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._orders: Optional[Dict[int, dict]] = None
+        self._seq = 0
+        self._subscribers: List[Subscriber] = []
+
+    def _ensure_loaded(self):
+        # caller holds the lock; events that arrive while loading wait and are
+        # re-applied on top (upserts are idempotent)
+        if self._orders is not None:
+            return
+        query = (
+            select(*columns_for(Order))
+            .where(Order.current_status.in_(OPEN_STATUSES))
+            .order_by(Order.current_status, Order.created_at)
+        )
+        with Session(database.engine) as session:
+            self._orders = {row["id"]: _normalize(row) for row in rows_to_dicts(session.exec(query))}
+
+    def snapshot(self) -> dict:
+        """Open orders grouped by status, oldest first, with the current sequence number."""
+        with self._lock:
+            self._ensure_loaded()
+            groups: Dict[str, List[dict]] = {status: [] for status in OPEN_STATUSES}
+            for order in self._orders.values():
+                groups.setdefault(order["current_status"], []).append(order)
+            for orders in groups.values():
+                orders.sort(key=lambda o: (o["created_at"] or "", o["id"]))
+            return {"seq": self._seq, "orders": groups}
+
+    def reset(self):
+        """Forget the in-memory queue; the next snapshot reloads it (after missed events)."""
+        with self._lock:
+            self._orders = None
+
+    def apply(self, order: dict):
+        """Apply one order change delivered by the broker and fan it out."""
+        with self._lock:
+            if self._orders is None:
+                # nobody has asked for the queue yet; the first snapshot loads from the DB
+                return
+            self._seq += 1
+            if order["current_status"] in OPEN_STATUSES:
+                self._orders[order["id"]] = order
+                event = {"seq": self._seq, "type": "upsert", "order": order}
+            else:
+                self._orders.pop(order["id"], None)
+                event = {"seq": self._seq, "type": "remove", "order": order}
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.deliver(event)
+
+    def subscribe(self, loop: asyncio.AbstractEventLoop) -> Subscriber:
+        sub = Subscriber(loop)
+        with self._lock:
+            self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "broker": type(broker).__name__,
+                "loaded": self._orders is not None,
+                "open_orders": len(self._orders or {}),
+                "seq": self._seq,
+                "subscribers": len(self._subscribers),
+            }
+
+
+class Broker(abc.ABC):
+    """Transport between publishers (crud) and every worker's hub."""
+
+    @abc.abstractmethod
+    def start(self, deliver: Callable[[dict], None], resync: Callable[[], None]):
+        """Begin delivering published orders to `deliver`; `resync` reloads after a gap.
+
+        Subclasses call this to keep the callbacks.
+        """
+        self._deliver = deliver
+        self._resync = resync
+
+    @abc.abstractmethod
+    def stop(self):
+        """Stop delivering (called on shutdown)."""
+
+    @abc.abstractmethod
+    def publish(self, order: dict):
+        """Send an order change to every worker's hub."""
+
+
+class LocalBroker(Broker):
+    """In-process fan-out: the publishing worker's hub is the only one."""
+
+    def __init__(self):
+        self._deliver: Callable[[dict], None] = lambda order: None
+
+    def start(self, deliver: Callable[[dict], None], resync: Callable[[], None]):
+        super().start(deliver, resync)
+
+    def stop(self):
+        pass
+
+    def publish(self, order: dict):
+        self._deliver(order)
+
+
+class PostgresBroker(Broker):
+    """Postgres LISTEN/NOTIFY: each worker listens on a dedicated connection."""
+
+    def __init__(self, url: str):
+        # psycopg2 wants a libpq URL, not "postgresql+psycopg2://" / "+asyncpg"
+        self.url = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self, deliver: Callable[[dict], None], resync: Callable[[], None]):
+        super().start(deliver, resync)
+        self._thread = threading.Thread(target=self._listen, name="kitchen-listen", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+
+    def publish(self, order: dict):
+        with database.engine.connect() as connection:
+            connection.exec_driver_sql("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, dumps(order).decode()))
+            connection.commit()
+
+    def _listen(self):
+        import psycopg2
+
+        while not self._stopping.is_set():
+            try:
+                conn = psycopg2.connect(self.url)
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                # anything published while we were not listening is lost; reload
+                self._resync()
+                while not self._stopping.is_set():
+                    if select_module.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._deliver(json.loads(conn.notifies.pop(0).payload))
+            except Exception:
+                logger.exception("Kitchen LISTEN connection failed; reconnecting")
+                self._stopping.wait(1)
+
+
+def _make_broker() -> Broker:
+    if KITCHEN_BROKER == "postgres" and database.DATABASE_URL:
+        return PostgresBroker(database.DATABASE_URL)
+    return LocalBroker()
+
+
+hub = KitchenHub()
+broker: Broker = _make_broker()
+
+
+def start():
+    """Connect the broker to this worker's hub (the app's startup handler calls this).
+
+    Not done at import: migrations, scripts and tests import crud without wanting a
+    LISTEN connection.
+    """
+    broker.start(hub.apply, hub.reset)
+
+
+def stop():
+    broker.stop()
+
+
+def publish(payload: dict):
+    """Send an order change (as produced by `order_payload`) to every worker's hub."""
+    try:
+        broker.publish(_normalize(payload))
+    except Exception:
+        # the order is already committed; screens catch up on their next snapshot
+        logger.exception("Failed to publish kitchen update for order %s", payload.get("id"))
+
+
+def publish_order(order: Order):
+    """Called by crud after an order change is committed."""
+    publish(order_payload(order))
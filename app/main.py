@@ -1,12 +1,11 @@
-from fastapi import FastAPI, Depends
-from typing import List, Optional
-from .database import init_db
+import os
+from fastapi import FastAPI, Request
 import app.database as database
-from sqlmodel import Session
+from app import kitchen, migrations, reporting
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import routes
-from .routes import menu_routes, category_routes, customer_routes, order_routes, addon_routes, payment_routes
+from .routes import menu_routes, category_routes, customer_routes, order_routes, addon_routes, payment_routes, async_routes, internal_routes, kitchen_routes, import_routes, export_routes, report_routes, review_routes, cart_routes, discount_routes
 
 app = FastAPI(title="3awan Cafe & Resto API")
 
@@ -19,19 +18,37 @@ app.add_middleware(
     allow_credentials=False,  # keep False when allowing wildcard-like origins
     allow_methods=["*"],
     allow_headers=["*"],
+    # let browser clients (Flutter web) read validators and pagination cursors
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 
-def get_session():
-    eng = database.engine
-    if eng is None:
-        raise RuntimeError("Database engine is not configured. Set DATABASE_URL or call database.set_engine().")
-    with Session(eng) as session:
-        yield session
+@app.middleware("http")
+async def track_db_checkouts(request: Request, call_next):
+    """Count pooled connection checkouts per request and report them in a header."""
+    counter = database.begin_request_tracking()
+    response = await call_next(request)
+    database.end_request_tracking(counter)
+    response.headers["X-DB-Checkouts"] = str(counter.count)
+    return response
 
 @app.on_event("startup")
 def on_startup():
-    init_db()
+    # Schema changes are applied once per deploy with `python -m app.migrations upgrade`;
+    # workers skip DDL entirely unless DB_AUTO_MIGRATE is set (local development).
+    if os.getenv("DB_AUTO_MIGRATE", "").lower() in ("1", "true", "yes"):
+        migrations.upgrade(database.engine)
+    reporting.start_scheduler()
+    kitchen.start()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    kitchen.stop()
+
+# In ASYNC_DB mode the async handlers are registered first so they take
+# precedence over the sync ones for the same paths.
+if database.ASYNC_DB:
+    app.include_router(async_routes.router, prefix="/api")
 
 # Include routers with prefix
 app.include_router(category_routes.router, prefix="/api")
@@ -41,4 +58,14 @@ app.include_router(menu_routes.router, prefix="/api")
 app.include_router(addon_routes.router, prefix="/api")
 app.include_router(customer_routes.router, prefix="/api")
 app.include_router(payment_routes.router, prefix="/api")
+app.include_router(review_routes.router, prefix="/api")
+app.include_router(discount_routes.router, prefix="/api")
 app.include_router(order_routes.router, prefix="/api")
+app.include_router(cart_routes.router, prefix="/api")
+app.include_router(kitchen_routes.router, prefix="/api")
+app.include_router(import_routes.router, prefix="/api")
+app.include_router(export_routes.router, prefix="/api")
+app.include_router(report_routes.router, prefix="/api")
+
+# Internal operational endpoints (not under /api)
+app.include_router(internal_routes.router)
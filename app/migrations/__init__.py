@@ -0,0 +1,150 @@
+"""Versioned schema migrations.
+
+Each migration is a module in this package named `vNNNN_<slug>.py` that defines
+
+    DESCRIPTION = "..."
+    TRANSACTIONAL = True        # False for statements such as CREATE INDEX CONCURRENTLY
+    def upgrade(connection): ...
+
+Applied versions are recorded in the `schema_version` table. Run pending migrations
+once per deploy, before workers start:
+
+    python -m app.migrations upgrade
+
+Workers do not run DDL at startup; set DB_AUTO_MIGRATE=1 to apply migrations on boot
+in local development.
+"""
+import importlib
+import logging
+import pkgutil
+import re
+from contextlib import contextmanager
+from datetime import datetime
+from types import ModuleType
+from typing import Iterable, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, select, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+_MODULE_RE = re.compile(r"^v(\d{4})_\w+$")
+# arbitrary application-wide key for pg_advisory_lock, so concurrent runners serialize
+_ADVISORY_LOCK_KEY = 3_270_451
+
+_meta = MetaData()
+schema_version = Table(
+    "schema_version",
+    _meta,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Migration:
+    def __init__(self, version: int, module: ModuleType):
+        self.version = version
+        self.module = module
+        self.description = getattr(module, "DESCRIPTION", module.__name__)
+        self.transactional = getattr(module, "TRANSACTIONAL", True)
+
+    def upgrade(self, connection: Connection):
+        self.module.upgrade(connection)
+
+
+def discover() -> List[Migration]:
+    """Return all migrations in this package, ordered by version."""
+    migrations = []
+    for info in pkgutil.iter_modules(__path__):
+        match = _MODULE_RE.match(info.name)
+        if match:
+            module = importlib.import_module(f"{__name__}.{info.name}")
+            migrations.append(Migration(int(match.group(1)), module))
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return migrations
+
+
+def current_version(connection: Connection) -> int:
+    schema_version.create(connection, checkfirst=True)
+    return connection.execute(select(func.coalesce(func.max(schema_version.c.version), 0))).scalar_one()
+
+
+@contextmanager
+def _runner_lock(engine: Engine):
+    """Hold a Postgres advisory lock so only one deploy applies migrations at a time."""
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect() as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+        try:
+            yield
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+
+
+def pending(engine: Engine) -> List[Migration]:
+    with engine.begin() as connection:
+        applied = current_version(connection)
+    return [m for m in discover() if m.version > applied]
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to `target` (default: latest). Returns applied versions."""
+    applied: List[int] = []
+    with _runner_lock(engine):
+        for migration in pending(engine):
+            if target is not None and migration.version > target:
+                break
+            logger.info("Applying migration %04d: %s", migration.version, migration.description)
+            if migration.transactional:
+                with engine.begin() as connection:
+                    migration.upgrade(connection)
+                    _record(connection, migration)
+            else:
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                    migration.upgrade(connection)
+                with engine.begin() as connection:
+                    _record(connection, migration)
+            applied.append(migration.version)
+    return applied
+
+
+def _record(connection: Connection, migration: Migration):
+    connection.execute(
+        schema_version.insert().values(
+            version=migration.version, description=migration.description, applied_at=datetime.utcnow()
+        )
+    )
+
+
+# helpers for migration modules
+def create_indexes(connection: Connection, indexes: Iterable[tuple]):
+    """Create (name, table, columns) indexes if missing.
+
+    On Postgres this uses CREATE INDEX CONCURRENTLY, so the calling migration must set
+    TRANSACTIONAL = False; writes to the table keep flowing while the index builds.
+    A concurrent build that failed leaves an INVALID index behind, which IF NOT EXISTS
+    would skip; such an index is dropped and built again.
+    """
+    postgres = connection.dialect.name == "postgresql"
+    concurrently = "CONCURRENTLY " if postgres else ""
+    for name, table, columns in indexes:
+        if postgres and _index_invalid(connection, name):
+            logger.warning("Index %s is invalid (an earlier build failed); rebuilding it", name)
+            connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        connection.execute(
+            text(f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+        )
+        if postgres and _index_invalid(connection, name):
+            # never record the migration over an index the planner will not use
+            raise RuntimeError(f"Index {name} is still invalid after building it")
+
+
+def _index_invalid(connection: Connection, name: str) -> bool:
+    query = text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)")
+    return bool(connection.execute(query, {"name": name}).scalar())
@@ -0,0 +1,38 @@
+"""Command line entry point: python -m app.migrations {upgrade,status} [--to N]"""
+import argparse
+import logging
+import sys
+
+from app import database
+from app import migrations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Apply versioned schema migrations.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    up = sub.add_parser("upgrade", help="apply pending migrations")
+    up.add_argument("--to", type=int, default=None, help="stop after this version")
+    sub.add_parser("status", help="show applied and pending migrations")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    engine = database.get_engine()
+    if engine is None:
+        print("DATABASE_URL is not set", file=sys.stderr)
+        return 2
+
+    if args.command == "status":
+        with engine.begin() as connection:
+            applied = migrations.current_version(connection)
+        for m in migrations.discover():
+            state = "applied" if m.version <= applied else "pending"
+            print(f"{m.version:04d}  {state:8} {m.description}")
+        return 0
+
+    done = migrations.upgrade(engine, target=args.to)
+    print(f"Applied {len(done)} migration(s)" + (f": {', '.join(f'{v:04d}' for v in done)}" if done else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
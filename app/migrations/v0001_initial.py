@@ -0,0 +1,116 @@
+"""Initial schema, frozen as of the first migration.
+
+Tables are declared here rather than taken from app.models so that later model
+changes stay in their own migrations. Uses checkfirst, so databases created earlier
+by init_db()/create_all are adopted as-is.
+"""
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table
+
+DESCRIPTION = "initial schema"
+TRANSACTIONAL = True
+
+meta = MetaData()
+
+Table(
+    "categories", meta,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+)
+Table(
+    "menus", meta,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("price", Float, nullable=False),
+    Column("category_id", Integer, ForeignKey("categories.id")),
+    Column("image_url", String),
+    Column("description", String),
+    Column("is_available", Boolean, nullable=False),
+    Column("average_rating", Float, nullable=False),
+)
+Table(
+    "menu_addons", meta,
+    Column("id", Integer, primary_key=True),
+    Column("menu_id", Integer, ForeignKey("menus.id"), nullable=False),
+    Column("name", String, nullable=False),
+    Column("price", Float, nullable=False),
+)
+Table(
+    "customers", meta,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("phone_number", String),
+    Column("email", String),
+)
+Table(
+    "users", meta,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("email", String, nullable=False, index=True),
+    Column("password", String, nullable=False),
+    Column("role", String, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+Table(
+    "discounts", meta,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("description", String),
+    Column("percentage", Float, nullable=False),
+    Column("valid_until", DateTime),
+)
+Table(
+    "orders", meta,
+    Column("id", Integer, primary_key=True),
+    Column("customer_id", Integer, ForeignKey("customers.id")),
+    Column("discount_id", Integer, ForeignKey("discounts.id")),
+    Column("total_after_discount", Float, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("current_status", String, nullable=False),
+    Column("user_id", Integer, ForeignKey("users.id")),
+)
+Table(
+    "order_items", meta,
+    Column("id", Integer, primary_key=True),
+    Column("order_id", Integer, ForeignKey("orders.id"), nullable=False),
+    Column("menu_id", Integer, ForeignKey("menus.id"), nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("subtotal", Float, nullable=False),
+)
+Table(
+    "carts", meta,
+    Column("id", Integer, primary_key=True),
+    Column("customer_id", Integer, ForeignKey("customers.id"), nullable=False),
+    Column("menu_id", Integer, ForeignKey("menus.id"), nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+Table(
+    "payments", meta,
+    Column("id", Integer, primary_key=True),
+    Column("order_id", Integer, ForeignKey("orders.id"), nullable=False),
+    Column("amount", Float, nullable=False),
+    Column("payment_method", String, nullable=False),
+    Column("payment_status", String, nullable=False),
+    Column("paid_at", DateTime),
+)
+Table(
+    "reviews", meta,
+    Column("id", Integer, primary_key=True),
+    Column("customer_id", Integer, ForeignKey("customers.id"), nullable=False),
+    Column("menu_id", Integer, ForeignKey("menus.id"), nullable=False),
+    Column("rating", Integer, nullable=False),
+    Column("comment", String),
+    Column("created_at", DateTime, nullable=False),
+)
+Table(
+    "order_status_history", meta,
+    Column("id", Integer, primary_key=True),
+    Column("order_id", Integer, ForeignKey("orders.id"), nullable=False),
+    Column("status", String, nullable=False),
+    Column("note", String),
+    Column("changed_at", DateTime, nullable=False),
+)
+
+
+def upgrade(connection):
+    meta.create_all(connection, checkfirst=True)
@@ -0,0 +1,25 @@
+"""Indexes for the foreign-key and status columns the API filters on.
+
+Built with CREATE INDEX CONCURRENTLY on Postgres so the tables stay writable.
+"""
+from app.migrations import create_indexes
+
+DESCRIPTION = "indexes on filter/join columns and the kitchen queue"
+TRANSACTIONAL = False
+
+INDEXES = [
+    ("ix_menus_category_id", "menus", ["category_id"]),
+    ("ix_menu_addons_menu_id", "menu_addons", ["menu_id"]),
+    ("ix_carts_customer_id", "carts", ["customer_id"]),
+    ("ix_orders_customer_id", "orders", ["customer_id"]),
+    ("ix_orders_created_at", "orders", ["created_at"]),
+    ("ix_orders_status_created_at", "orders", ["current_status", "created_at"]),
+    ("ix_order_items_order_id", "order_items", ["order_id"]),
+    ("ix_payments_order_id", "payments", ["order_id"]),
+    ("ix_reviews_menu_id", "reviews", ["menu_id"]),
+    ("ix_order_status_history_order_id", "order_status_history", ["order_id"]),
+]
+
+
+def upgrade(connection):
+    create_indexes(connection, INDEXES)
@@ -0,0 +1,13 @@
+"""Index payments.paid_at for the accounting export's date-range filter."""
+from app.migrations import create_indexes
+
+DESCRIPTION = "index on payments.paid_at"
+TRANSACTIONAL = False
+
+INDEXES = [
+    ("ix_payments_paid_at", "payments", ["paid_at"]),
+]
+
+
+def upgrade(connection):
+    create_indexes(connection, INDEXES)
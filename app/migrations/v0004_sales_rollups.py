@@ -0,0 +1,36 @@
+"""Rollup tables for sales reporting (see app/reporting.py)."""
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Integer, MetaData, String, Table
+
+DESCRIPTION = "daily_revenue / daily_menu_sales rollups"
+TRANSACTIONAL = True
+
+meta = MetaData()
+
+Table("categories", meta, Column("id", Integer, primary_key=True))
+Table("menus", meta, Column("id", Integer, primary_key=True))
+Table(
+    "daily_revenue", meta,
+    Column("day", Date, primary_key=True),
+    Column("orders_created", Integer, nullable=False),
+    Column("orders_completed", Integer, nullable=False),
+    Column("revenue", Float, nullable=False),
+)
+Table(
+    "daily_menu_sales", meta,
+    Column("day", Date, primary_key=True),
+    Column("menu_id", Integer, ForeignKey("menus.id"), primary_key=True),
+    Column("category_id", Integer, ForeignKey("categories.id")),
+    Column("quantity", Integer, nullable=False),
+    Column("revenue", Float, nullable=False),
+)
+Table(
+    "rollup_state", meta,
+    Column("name", String, primary_key=True),
+    Column("last_history_id", Integer, nullable=False),
+    Column("updated_at", DateTime),
+)
+
+
+def upgrade(connection):
+    for name in ("daily_revenue", "daily_menu_sales", "rollup_state"):
+        meta.tables[name].create(connection, checkfirst=True)
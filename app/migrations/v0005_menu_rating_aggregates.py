@@ -0,0 +1,20 @@
+"""Running review aggregates on menus, backfilled from the reviews table."""
+from sqlalchemy import inspect, text
+
+DESCRIPTION = "menus.rating_sum / rating_count"
+TRANSACTIONAL = True
+
+COLUMNS = ("rating_sum", "rating_count")
+
+
+def upgrade(connection):
+    existing = {c["name"] for c in inspect(connection).get_columns("menus")}
+    for name in COLUMNS:
+        if name not in existing:
+            connection.execute(text(f"ALTER TABLE menus ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0"))
+    connection.execute(text(
+        "UPDATE menus SET"
+        " rating_sum = COALESCE((SELECT SUM(rating) FROM reviews WHERE reviews.menu_id = menus.id), 0),"
+        " rating_count = (SELECT COUNT(*) FROM reviews WHERE reviews.menu_id = menus.id),"
+        " average_rating = COALESCE((SELECT AVG(rating * 1.0) FROM reviews WHERE reviews.menu_id = menus.id), 0)"
+    ))
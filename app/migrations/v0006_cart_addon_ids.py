@@ -0,0 +1,11 @@
+"""Addon ids on cart lines, so a stored cart line matches an order item."""
+from sqlalchemy import inspect, text
+
+DESCRIPTION = "carts.addon_ids"
+TRANSACTIONAL = True
+
+
+def upgrade(connection):
+    existing = {c["name"] for c in inspect(connection).get_columns("carts")}
+    if "addon_ids" not in existing:
+        connection.execute(text("ALTER TABLE carts ADD COLUMN addon_ids VARCHAR NOT NULL DEFAULT ''"))
@@ -0,0 +1,13 @@
+"""Discount codes, so orders can name a discount the way customers type it."""
+from sqlalchemy import inspect, text
+
+DESCRIPTION = "discounts.code (unique)"
+TRANSACTIONAL = True
+
+
+def upgrade(connection):
+    existing = {c["name"] for c in inspect(connection).get_columns("discounts")}
+    if "code" not in existing:
+        connection.execute(text("ALTER TABLE discounts ADD COLUMN code VARCHAR"))
+    # discounts is a small table; a plain (locking) build is fine
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_discounts_code ON discounts (code)"))
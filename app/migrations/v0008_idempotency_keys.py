@@ -0,0 +1,22 @@
+"""Stored first responses for Idempotency-Key requests (see app/idempotency.py)."""
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text
+
+DESCRIPTION = "idempotency_keys"
+TRANSACTIONAL = True
+
+meta = MetaData()
+
+Table(
+    "idempotency_keys", meta,
+    Column("scope", String, primary_key=True),
+    Column("key", String, primary_key=True),
+    Column("request_hash", String, nullable=False),
+    Column("status_code", Integer),
+    Column("response_body", Text),
+    Column("created_at", DateTime, nullable=False),
+    Index("ix_idempotency_keys_created_at", "created_at"),
+)
+
+
+def upgrade(connection):
+    meta.tables["idempotency_keys"].create(connection, checkfirst=True)
@@ -0,0 +1,11 @@
+"""Id of the order / payment an Idempotency-Key created, so its response can be rebuilt."""
+from sqlalchemy import inspect, text
+
+DESCRIPTION = "idempotency_keys.resource_id"
+TRANSACTIONAL = True
+
+
+def upgrade(connection):
+    existing = {c["name"] for c in inspect(connection).get_columns("idempotency_keys")}
+    if "resource_id" not in existing:
+        connection.execute(text("ALTER TABLE idempotency_keys ADD COLUMN resource_id INTEGER"))
@@ -1,6 +1,7 @@
+from sqlalchemy import Index, Text
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 
 
 class Category(SQLModel, table=True):
@@ -15,11 +16,14 @@ class Menu(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     price: float
-    category_id: Optional[int] = Field(default=None, foreign_key="categories.id")
+    category_id: Optional[int] = Field(default=None, foreign_key="categories.id", index=True)
     image_url: Optional[str] = None
     description: Optional[str] = None
     is_available: bool = True
     average_rating: float = 0.0
+    # running aggregates over reviews (app/ratings.py); average_rating = rating_sum / rating_count
+    rating_sum: int = 0
+    rating_count: int = 0
     category: Optional[Category] = Relationship(back_populates="menus")
     addons: List["MenuAddon"] = Relationship(back_populates="menu")
     reviews: List["Review"] = Relationship(back_populates="menu")
@@ -28,7 +32,7 @@ class Menu(SQLModel, table=True):
 class MenuAddon(SQLModel, table=True):
     __tablename__ = "menu_addons"
     id: Optional[int] = Field(default=None, primary_key=True)
-    menu_id: int = Field(foreign_key="menus.id")
+    menu_id: int = Field(foreign_key="menus.id", index=True)
     name: str
     price: float
     menu: Optional[Menu] = Relationship(back_populates="addons")
@@ -59,6 +63,8 @@ class Discount(SQLModel, table=True):
     __tablename__ = "discounts"
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
+    # what customers type at checkout; stored upper-case (see app/discounts.py)
+    code: Optional[str] = Field(default=None, unique=True, index=True)
     description: Optional[str] = None
     percentage: float
     valid_until: Optional[datetime] = None
@@ -66,11 +72,13 @@ class Discount(SQLModel, table=True):
 
 class Order(SQLModel, table=True):
     __tablename__ = "orders"
+    # kitchen queue: WHERE current_status = ? ORDER BY created_at (also serves status-only lookups)
+    __table_args__ = (Index("ix_orders_status_created_at", "current_status", "created_at"),)
     id: Optional[int] = Field(default=None, primary_key=True)
-    customer_id: Optional[int] = Field(default=None, foreign_key="customers.id")
+    customer_id: Optional[int] = Field(default=None, foreign_key="customers.id", index=True)
     discount_id: Optional[int] = Field(default=None, foreign_key="discounts.id")
     total_after_discount: float = 0.0
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     current_status: str = "pending"
     user_id: Optional[int] = Field(default=None, foreign_key="users.id")
     customer: Optional[Customer] = Relationship(back_populates="orders")
@@ -82,7 +90,7 @@ class Order(SQLModel, table=True):
 class OrderItem(SQLModel, table=True):
     __tablename__ = "order_items"
     id: Optional[int] = Field(default=None, primary_key=True)
-    order_id: int = Field(foreign_key="orders.id")
+    order_id: int = Field(foreign_key="orders.id", index=True)
     menu_id: int = Field(foreign_key="menus.id")
     quantity: int = 1
     subtotal: float = 0.0
@@ -92,9 +100,11 @@ class OrderItem(SQLModel, table=True):
 class Cart(SQLModel, table=True):
     __tablename__ = "carts"
     id: Optional[int] = Field(default=None, primary_key=True)
-    customer_id: int = Field(foreign_key="customers.id")
+    customer_id: int = Field(foreign_key="customers.id", index=True)
     menu_id: int = Field(foreign_key="menus.id")
     quantity: int = 1
+    # sorted addon ids of this line, comma-separated ("3,7"); "" for none
+    addon_ids: str = ""
     created_at: datetime = Field(default_factory=datetime.utcnow)
     customer: Optional[Customer] = Relationship(back_populates="carts")
 
@@ -102,11 +112,11 @@ class Cart(SQLModel, table=True):
 class Payment(SQLModel, table=True):
     __tablename__ = "payments"
     id: Optional[int] = Field(default=None, primary_key=True)
-    order_id: int = Field(foreign_key="orders.id")
+    order_id: int = Field(foreign_key="orders.id", index=True)
     amount: float
     payment_method: str
     payment_status: str
-    paid_at: Optional[datetime] = None
+    paid_at: Optional[datetime] = Field(default=None, index=True)
     order: Optional[Order] = Relationship(back_populates="payments")
 
 
@@ -114,7 +124,7 @@ class Review(SQLModel, table=True):
     __tablename__ = "reviews"
     id: Optional[int] = Field(default=None, primary_key=True)
     customer_id: int = Field(foreign_key="customers.id")
-    menu_id: int = Field(foreign_key="menus.id")
+    menu_id: int = Field(foreign_key="menus.id", index=True)
     rating: int
     comment: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -125,8 +135,48 @@ class Review(SQLModel, table=True):
 class OrderStatusHistory(SQLModel, table=True):
     __tablename__ = "order_status_history"
     id: Optional[int] = Field(default=None, primary_key=True)
-    order_id: int = Field(foreign_key="orders.id")
+    order_id: int = Field(foreign_key="orders.id", index=True)
     status: str
     note: Optional[str] = None
     changed_at: datetime = Field(default_factory=datetime.utcnow)
-    order: Optional[Order] = Relationship(back_populates="status_history")
\ No newline at end of file
+    order: Optional[Order] = Relationship(back_populates="status_history")
+
+
+# REPORTING ROLLUPS (maintained by app.reporting, read by the /reports endpoints)
+class DailyRevenue(SQLModel, table=True):
+    __tablename__ = "daily_revenue"
+    day: date = Field(primary_key=True)
+    orders_created: int = 0
+    orders_completed: int = 0
+    revenue: float = 0.0
+
+
+class DailyMenuSales(SQLModel, table=True):
+    __tablename__ = "daily_menu_sales"
+    day: date = Field(primary_key=True)
+    menu_id: int = Field(primary_key=True, foreign_key="menus.id")
+    category_id: Optional[int] = Field(default=None, foreign_key="categories.id")
+    quantity: int = 0
+    revenue: float = 0.0
+
+
+class RollupState(SQLModel, table=True):
+    __tablename__ = "rollup_state"
+    name: str = Field(primary_key=True)
+    # highest order_status_history.id already folded into the rollups
+    last_history_id: int = 0
+    updated_at: Optional[datetime] = None
+
+
+class IdempotencyKey(SQLModel, table=True):
+    __tablename__ = "idempotency_keys"
+    # scope is the endpoint ("orders", "payments"); the same key may be used on both
+    scope: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    request_hash: str
+    # the order / payment created, committed with it
+    resource_id: Optional[int] = None
+    # both NULL until the response is recorded (rebuilt from resource_id if that failed)
+    status_code: Optional[int] = None
+    response_body: Optional[str] = Field(default=None, sa_type=Text)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
@@ -0,0 +1,197 @@
+"""Order status state machine.
+
+    pending -> preparing -> ready -> completed
+    (any of pending / preparing / ready) -> cancelled
+
+Every status change goes through `apply_transition`, which validates the move,
+applies it with one conditional UPDATE (`WHERE current_status = <expected>`) and
+appends the matching `order_status_history` rows with one bulk INSERT, inside the
+caller's transaction. Orders whose status is not the expected one (already moved, or
+moved concurrently by another request) are left alone. `transition_orders` wraps it
+for the status endpoints: it commits, publishes to the kitchen and reports the
+skipped orders; crud's order and payment writes call `apply_transition` directly.
+
+Payment rules live here too, so no path can get around them: an order only moves to
+`completed` once its payments cover total_after_discount, and an order that is
+already paid for when it becomes `ready` is completed in the same transaction.
+Payment writes lock the order row first (crud._lock_order) and so does the UPDATE
+here, so the payments summed are never stale.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert, update
+from sqlmodel import Session, select
+
+from . import kitchen
+from .fastjson import columns_for, rows_to_dicts
+from .models import Order, OrderStatusHistory, Payment
+
+INITIAL_STATUS = "pending"
+TRANSITIONS: Dict[str, Tuple[str, ...]] = {
+    "pending": ("preparing", "cancelled"),
+    "preparing": ("ready", "cancelled"),
+    "ready": ("completed", "cancelled"),
+    "completed": (),
+    "cancelled": (),
+}
+STATUSES = tuple(TRANSITIONS)
+PAYMENT_TOLERANCE = 0.005  # amounts are floats; half a cent either way counts as settled
+PAID = "paid"  # only payments in this payment_status count towards the total
+
+
+def check_transition(current: str, new: str):
+    """Raise ValueError unless an order may move from `current` to `new`."""
+    if new not in TRANSITIONS:
+        raise ValueError(f"Unknown order status '{new}'")
+    if new not in TRANSITIONS.get(current, ()):
+        raise ValueError(f"Cannot change order status from '{current}' to '{new}'")
+
+
+def sources_of(new: str) -> Tuple[str, ...]:
+    """Statuses an order may be in to move to `new`."""
+    if new not in TRANSITIONS:
+        raise ValueError(f"Unknown order status '{new}'")
+    return tuple(status for status, targets in TRANSITIONS.items() if new in targets)
+
+
+def history_rows(order_ids: Iterable[int], status: str, note: Optional[str] = None, at: Optional[datetime] = None) -> List[dict]:
+    """Parameter dicts for a bulk INSERT into order_status_history."""
+    at = at or datetime.utcnow()
+    return [{"order_id": order_id, "status": status, "note": note, "changed_at": at} for order_id in order_ids]
+
+
+def paid_up():
+    """SQL condition: the order's paid payments cover its total (correlated SUM)."""
+    paid = (
+        select(func.coalesce(func.sum(Payment.amount), 0.0))
+        .where(Payment.order_id == Order.id, Payment.payment_status == PAID)
+        .scalar_subquery()
+    )
+    return paid >= Order.total_after_discount - PAYMENT_TOLERANCE
+
+
+def apply_transition(
+    session: Session,
+    order_ids: List[int],
+    from_status: str,
+    to_status: str,
+    note: Optional[str] = None,
+    values: Optional[dict] = None,
+) -> List[dict]:
+    """Move the orders still in `from_status` to `to_status` inside the caller's transaction.
+
+    Unpaid orders are left alone when `to_status` is completed; orders that become
+    ready already paid for are completed right away (both rows are returned).
+    `values` are other columns written by the same UPDATE (bulk edits).
+    Returns the updated orders as dicts (all columns); the caller commits and publishes.
+    """
+    check_transition(from_status, to_status)
+    if not order_ids:
+        return []
+    stmt = (
+        update(Order)
+        .where(Order.id.in_(order_ids), Order.current_status == from_status)
+        .values(**(values or {}), current_status=to_status)
+        .returning(*columns_for(Order))
+    )
+    if to_status == "completed":
+        stmt = stmt.where(paid_up())
+    updated = rows_to_dicts(session.execute(stmt))
+    if updated:
+        session.execute(insert(OrderStatusHistory), history_rows([row["id"] for row in updated], to_status, note))
+    if to_status == "ready" and updated:
+        updated += apply_transition(session, [row["id"] for row in updated], "ready", "completed", note="paid")
+    return updated
+
+
+def transition_orders(session: Session, order_ids: List[int], from_status: str, to_status: str, note: Optional[str] = None) -> Tuple[List[int], List[int]]:
+    """Advance many orders from one status to the next in a single transaction.
+
+    Returns (updated_ids, skipped_ids); skipped orders were not in `from_status`.
+    """
+    order_ids = list(dict.fromkeys(order_ids))
+    updated = apply_transition(session, order_ids, from_status, to_status, note)
+    session.commit()
+    for row in updated:
+        kitchen.publish(row)
+    done = {row["id"] for row in updated}
+    return [i for i in order_ids if i in done], [i for i in order_ids if i not in done]
+
+
+def transition_refused(session: Session, order: Order, from_status: str, to_status: str) -> ValueError:
+    """Why a one-order `apply_transition` changed nothing (call after the rollback/commit)."""
+    session.refresh(order)
+    if order.current_status == from_status and to_status == "completed":
+        return ValueError("Order is not fully paid")
+    return ValueError("Order status was changed by another request; reload and retry")
+
+
+def transition_order(session: Session, order_id: int, to_status: str, note: Optional[str] = None) -> Optional[Order]:
+    """Move one order to `to_status`. Returns None if the order does not exist."""
+    order = session.get(Order, order_id)
+    if not order:
+        return None
+    from_status = order.current_status
+    updated, _ = transition_orders(session, [order_id], from_status, to_status, note)
+    if not updated:
+        raise transition_refused(session, order, from_status, to_status)
+    session.refresh(order)
+    return order
+
+
+def get_history(session: Session, order_id: int) -> List[OrderStatusHistory]:
+    """Status changes of one order, oldest first."""
+    query = (
+        select(OrderStatusHistory)
+        .where(OrderStatusHistory.order_id == order_id)
+        .order_by(OrderStatusHistory.changed_at, OrderStatusHistory.id)
+    )
+    return session.exec(query).all()
+
+
+def _seconds(dialect_name: str, start, end):
+    if dialect_name == "postgresql":
+        return func.extract("epoch", end - start)
+    # SQLite (dev): julianday() is in days
+    return (func.julianday(end) - func.julianday(start)) * 86400.0
+
+
+def dwell_stats(session: Session, since: Optional[datetime] = None) -> List[dict]:
+    """Time spent in each status, from consecutive history rows of every order.
+
+    A status' dwell ends at the order's next history row; the current status of
+    open orders has no end yet and is not counted. Computed in the database with a
+    LEAD() window, so only one row per status comes back.
+    """
+    next_change = func.lead(OrderStatusHistory.changed_at).over(
+        partition_by=OrderStatusHistory.order_id,
+        order_by=(OrderStatusHistory.changed_at, OrderStatusHistory.id),
+    )
+    steps = select(
+        OrderStatusHistory.status.label("status"),
+        OrderStatusHistory.changed_at.label("entered_at"),
+        next_change.label("left_at"),
+    )
+    if since is not None:
+        steps = steps.where(OrderStatusHistory.changed_at >= since)
+    steps = steps.subquery()
+
+    seconds = _seconds(session.get_bind().dialect.name, steps.c.entered_at, steps.c.left_at)
+    query = (
+        select(
+            steps.c.status,
+            func.count().label("count"),
+            func.avg(seconds).label("avg_seconds"),
+            func.min(seconds).label("min_seconds"),
+            func.max(seconds).label("max_seconds"),
+        )
+        .where(steps.c.left_at.is_not(None))
+        .group_by(steps.c.status)
+    )
+    stats = {row["status"]: row for row in rows_to_dicts(session.execute(query))}
+    return [
+        {key: (round(float(value), 3) if key.endswith("seconds") and value is not None else value) for key, value in stats[status].items()}
+        for status in STATUSES
+        if status in stats
+    ]
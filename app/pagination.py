@@ -0,0 +1,68 @@
+"""Keyset (cursor) pagination on primary key `id`.
+
+Pages are requested with `limit` and an opaque `after` cursor; the cursor for the
+next page is returned in the X-Next-Cursor response header so list bodies keep
+their plain-array shape. Each page costs one `WHERE id > :after ORDER BY id LIMIT`
+query, independent of how deep the client pages.
+"""
+import base64
+import bisect
+from typing import Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from fastapi import HTTPException
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def page_size(limit: Optional[int], default: Optional[int] = DEFAULT_PAGE_SIZE) -> Optional[int]:
+    """Resolve the page size for a paged (non-streaming) listing."""
+    if limit is None:
+        return default
+    if limit > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be <= {MAX_PAGE_SIZE} unless stream=true")
+    return limit
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Return the id encoded in `cursor` (None for the first page); 400 on garbage."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, _, value = raw.partition(":")
+        if prefix != "id":
+            raise ValueError(raw)
+        return int(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def split_page(rows: Sequence[T], limit: int) -> Tuple[List[T], Optional[str]]:
+    """Trim a `limit + 1` fetch to `limit` rows and build the next cursor if more exist."""
+    page = list(rows[:limit])
+    if len(rows) > limit and page:
+        last = page[-1]
+        last_id = last["id"] if isinstance(last, dict) else last.id
+        return page, encode_cursor(last_id)
+    return page, None
+
+
+def page_after(rows: Sequence[dict], after_id: Optional[int], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """Keyset-paginate an in-memory list already sorted by id (e.g. the catalog cache)."""
+    start = 0
+    if after_id is not None:
+        start = bisect.bisect_right(rows, after_id, key=lambda r: r["id"])
+    return split_page(rows[start:start + limit + 1], limit)
+
+
+def cursor_headers(cursor: Optional[str]) -> Dict[str, str]:
+    """Headers carrying the next cursor, for handlers that build their own Response."""
+    return {NEXT_CURSOR_HEADER: cursor} if cursor else {}
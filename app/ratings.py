@@ -0,0 +1,71 @@
+"""Menu rating aggregates kept next to the menu row.
+
+`menus.rating_sum` and `menus.rating_count` are adjusted by every review write in
+the same transaction, with a single relative UPDATE (no read-modify-write, so
+concurrent reviews of the same menu cannot lose each other's changes), and
+`average_rating` is derived from them in that statement. Reading the average is a
+plain column read.
+
+`recompute` rebuilds all three columns from the reviews table, for repair:
+
+    & ./venv/Scripts/python.exe -m app.ratings recompute
+"""
+import argparse
+import sys
+
+from sqlalchemy import case, func, update
+from sqlmodel import Session, select
+
+from . import database
+from .catalog_cache import catalog
+from .models import Menu, Review
+
+
+def apply_rating_delta(session: Session, menu_id: int, sum_delta: int, count_delta: int):
+    """Shift a menu's rating aggregates inside the caller's transaction."""
+    new_sum = Menu.rating_sum + sum_delta
+    new_count = Menu.rating_count + count_delta
+    session.execute(
+        update(Menu)
+        .where(Menu.id == menu_id)
+        .values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            average_rating=case((new_count > 0, new_sum * 1.0 / new_count), else_=0.0),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def recompute(session: Session) -> int:
+    """Rebuild rating_sum / rating_count / average_rating for every menu. Returns rows updated."""
+    reviews_of_menu = Review.menu_id == Menu.id
+    rating_sum = select(func.coalesce(func.sum(Review.rating), 0)).where(reviews_of_menu).scalar_subquery()
+    rating_count = select(func.count(Review.id)).where(reviews_of_menu).scalar_subquery()
+    average = select(func.coalesce(func.avg(Review.rating * 1.0), 0.0)).where(reviews_of_menu).scalar_subquery()
+    result = session.execute(
+        update(Menu)
+        .values(rating_sum=rating_sum, rating_count=rating_count, average_rating=average)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    catalog.invalidate()
+    return result.rowcount
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.ratings", description="Maintain menu rating aggregates.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("recompute", help="rebuild the aggregates of every menu from the reviews table")
+    parser.parse_args(argv)
+
+    if database.get_engine() is None:
+        print("DATABASE_URL is not set", file=sys.stderr)
+        return 2
+    with Session(database.engine) as session:
+        print(f"Recomputed ratings for {recompute(session)} menu(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+"""Sales reporting: incremental rollups and the queries behind /api/reports.
+
+Two rollup tables are kept next to the OLTP tables:
+
+- daily_revenue(day, orders_created, orders_completed, revenue)
+- daily_menu_sales(day, menu_id, category_id, quantity, revenue)
+
+`day` is the date (UTC) the order was created; revenue counts completed orders only.
+
+The rollups are folded forward from order_status_history: every order gets a
+`pending` row when it is created and a `completed` row when it completes, so the
+history id is a natural high-water mark (kept in rollup_state). `refresh()` folds the
+rows above the mark in one transaction with two INSERT ... SELECT ... ON CONFLICT DO
+UPDATE statements. Rows younger than ROLLUP_SAFETY_SECONDS wait for the next run, so
+a transaction that took a lower id but committed later is not skipped.
+
+Each web worker refreshes every ROLLUP_INTERVAL seconds (0 disables it; the
+rollup_state row lock makes concurrent runs wait their turn). The CLI can refresh
+or rebuild a date range exactly from the base tables:
+
+    & ./venv/Scripts/python.exe -m app.reporting refresh
+    & ./venv/Scripts/python.exe -m app.reporting rebuild --start 2024-05-01 --end 2024-06-01
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+
+from sqlalchemy import and_, case, delete, func, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from . import database
+from .catalog_cache import catalog
+from .fastjson import rows_to_dicts
+from .models import (
+    DailyMenuSales,
+    DailyRevenue,
+    Menu,
+    Order,
+    OrderItem,
+    OrderStatusHistory,
+    RollupState,
+)
+from .order_status import INITIAL_STATUS
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_NAME = "sales"
+ROLLUP_INTERVAL = float(os.getenv("ROLLUP_INTERVAL", "60"))
+ROLLUP_SAFETY_SECONDS = float(os.getenv("ROLLUP_SAFETY_SECONDS", "5"))
+COMPLETED = "completed"
+DEFAULT_REPORT_DAYS = 30
+
+
+def _insert(session: Session, model):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise RuntimeError(f"Rollups need INSERT ... ON CONFLICT, not available on {dialect}")
+
+
+def _lock_state(session: Session) -> RollupState:
+    """Load (creating if needed) and row-lock the rollup high-water mark."""
+    query = select(RollupState).where(RollupState.name == ROLLUP_NAME).with_for_update()
+    state = session.exec(query).first()
+    if state is None:
+        session.execute(_insert(session, RollupState).values(name=ROLLUP_NAME, last_history_id=0).on_conflict_do_nothing())
+        state = session.exec(query).one()
+    return state
+
+
+# INCREMENTAL FOLD
+def _fold_revenue(session: Session, window):
+    h = OrderStatusHistory
+    day = func.date(Order.created_at)
+    rows = (
+        select(
+            day,
+            func.sum(case((h.status == INITIAL_STATUS, 1), else_=0)),
+            func.sum(case((h.status == COMPLETED, 1), else_=0)),
+            func.sum(case((h.status == COMPLETED, Order.total_after_discount), else_=0.0)),
+        )
+        .select_from(h)
+        .join(Order, Order.id == h.order_id)
+        .where(window, h.status.in_((INITIAL_STATUS, COMPLETED)))
+        .group_by(day)
+    )
+    stmt = _insert(session, DailyRevenue).from_select(["day", "orders_created", "orders_completed", "revenue"], rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day"],
+        set_={
+            "orders_created": DailyRevenue.orders_created + stmt.excluded.orders_created,
+            "orders_completed": DailyRevenue.orders_completed + stmt.excluded.orders_completed,
+            "revenue": DailyRevenue.revenue + stmt.excluded.revenue,
+        },
+    )
+    session.execute(stmt)
+
+
+def _fold_menu_sales(session: Session, window):
+    h = OrderStatusHistory
+    day = func.date(Order.created_at)
+    rows = (
+        select(day, OrderItem.menu_id, Menu.category_id, func.sum(OrderItem.quantity), func.sum(OrderItem.subtotal))
+        .select_from(h)
+        .join(Order, Order.id == h.order_id)
+        .join(OrderItem, OrderItem.order_id == h.order_id)
+        .join(Menu, Menu.id == OrderItem.menu_id, isouter=True)
+        .where(window, h.status == COMPLETED)
+        .group_by(day, OrderItem.menu_id, Menu.category_id)
+    )
+    stmt = _insert(session, DailyMenuSales).from_select(["day", "menu_id", "category_id", "quantity", "revenue"], rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "menu_id"],
+        set_={
+            "category_id": stmt.excluded.category_id,
+            "quantity": DailyMenuSales.quantity + stmt.excluded.quantity,
+            "revenue": DailyMenuSales.revenue + stmt.excluded.revenue,
+        },
+    )
+    session.execute(stmt)
+
+
+def _refresh_locked(session: Session, state: RollupState, safety_seconds: float) -> int:
+    cutoff = datetime.utcnow() - timedelta(seconds=safety_seconds)
+    upto = session.exec(
+        select(func.max(OrderStatusHistory.id)).where(OrderStatusHistory.changed_at <= cutoff)
+    ).one()
+    if upto is None or upto <= state.last_history_id:
+        return 0
+    window = and_(OrderStatusHistory.id > state.last_history_id, OrderStatusHistory.id <= upto)
+    _fold_revenue(session, window)
+    _fold_menu_sales(session, window)
+    folded = upto - state.last_history_id
+    state.last_history_id = upto
+    state.updated_at = datetime.utcnow()
+    session.add(state)
+    return folded
+
+
+def refresh(session: Session, safety_seconds: float = ROLLUP_SAFETY_SECONDS) -> dict:
+    """Fold new status history into the rollups. Returns the new high-water mark."""
+    state = _lock_state(session)
+    folded = _refresh_locked(session, state, safety_seconds)
+    session.commit()
+    return {"last_history_id": state.last_history_id, "history_ids_folded": folded}
+
+
+# EXACT REBUILD
+def _day_range(column, start: Optional[date], end: Optional[date]):
+    clauses = []
+    if start is not None:
+        clauses.append(column >= start)
+    if end is not None:
+        clauses.append(column < end)
+    return and_(true(), *clauses)
+
+
+def _as_datetime(day: Optional[date]) -> Optional[datetime]:
+    return datetime.combine(day, time.min) if day is not None else None
+
+
+def rebuild(session: Session, start: Optional[date] = None, end: Optional[date] = None) -> dict:
+    """Recompute the rollups for [start, end) from orders / order_items (all days if omitted)."""
+    state = _lock_state(session)
+    # bring the mark up to date first, so rows folded later are not counted twice
+    _refresh_locked(session, state, safety_seconds=0)
+
+    session.execute(delete(DailyRevenue).where(_day_range(DailyRevenue.day, start, end)))
+    session.execute(delete(DailyMenuSales).where(_day_range(DailyMenuSales.day, start, end)))
+
+    in_range = _day_range(Order.created_at, _as_datetime(start), _as_datetime(end))
+    day = func.date(Order.created_at)
+    is_completed = Order.current_status == COMPLETED
+    revenue_rows = (
+        select(
+            day,
+            func.count(),
+            func.sum(case((is_completed, 1), else_=0)),
+            func.sum(case((is_completed, Order.total_after_discount), else_=0.0)),
+        )
+        .where(in_range)
+        .group_by(day)
+    )
+    session.execute(
+        _insert(session, DailyRevenue).from_select(["day", "orders_created", "orders_completed", "revenue"], revenue_rows)
+    )
+    sales_rows = (
+        select(day, OrderItem.menu_id, Menu.category_id, func.sum(OrderItem.quantity), func.sum(OrderItem.subtotal))
+        .select_from(Order)
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .join(Menu, Menu.id == OrderItem.menu_id, isouter=True)
+        .where(in_range, is_completed)
+        .group_by(day, OrderItem.menu_id, Menu.category_id)
+    )
+    session.execute(
+        _insert(session, DailyMenuSales).from_select(["day", "menu_id", "category_id", "quantity", "revenue"], sales_rows)
+    )
+    session.commit()
+    return {"last_history_id": state.last_history_id, "start": start, "end": end}
+
+
+# PERIODIC REFRESH
+_scheduler: Optional[threading.Thread] = None
+_stopping = threading.Event()
+
+
+def _run_periodically(interval: float):
+    while not _stopping.wait(interval):
+        try:
+            with Session(database.engine) as session:
+                refresh(session)
+        except Exception:
+            logger.exception("Sales rollup refresh failed")
+
+
+def start_scheduler(interval: float = ROLLUP_INTERVAL):
+    """Refresh the rollups every `interval` seconds in a daemon thread (no-op if 0)."""
+    global _scheduler
+    if interval <= 0 or _scheduler is not None or database.engine is None:
+        return
+    _scheduler = threading.Thread(target=_run_periodically, args=(interval,), name="sales-rollups", daemon=True)
+    _scheduler.start()
+
+
+# REPORTS (read the rollups only)
+def default_range(start: Optional[date], end: Optional[date]):
+    """Fill in a missing range: the last DEFAULT_REPORT_DAYS days up to and including today (UTC, like the rollup days)."""
+    end = end or datetime.utcnow().date() + timedelta(days=1)
+    start = start or end - timedelta(days=DEFAULT_REPORT_DAYS)
+    if start >= end:
+        raise ValueError("start must be before end")
+    return start, end
+
+
+def as_of(session: Session) -> Optional[datetime]:
+    """When the rollups were last brought up to date."""
+    return session.exec(select(RollupState.updated_at).where(RollupState.name == ROLLUP_NAME)).first()
+
+
+def revenue_by_day(session: Session, start: date, end: date) -> List[dict]:
+    query = (
+        select(DailyRevenue.day, DailyRevenue.orders_created, DailyRevenue.orders_completed, DailyRevenue.revenue)
+        .where(_day_range(DailyRevenue.day, start, end))
+        .order_by(DailyRevenue.day)
+    )
+    return rows_to_dicts(session.exec(query))
+
+
+def sales_by_menu(session: Session, start: date, end: date, category_id: Optional[int] = None) -> List[dict]:
+    query = (
+        select(
+            DailyMenuSales.menu_id,
+            func.max(DailyMenuSales.category_id).label("category_id"),
+            func.sum(DailyMenuSales.quantity).label("quantity"),
+            func.sum(DailyMenuSales.revenue).label("revenue"),
+        )
+        .where(_day_range(DailyMenuSales.day, start, end))
+        .group_by(DailyMenuSales.menu_id)
+        .order_by(func.sum(DailyMenuSales.revenue).desc(), DailyMenuSales.menu_id)
+    )
+    if category_id is not None:
+        query = query.where(DailyMenuSales.category_id == category_id)
+    rows = rows_to_dicts(session.exec(query))
+    # names come from the cached catalog rather than a join
+    menus = catalog.get().menus_by_id
+    for row in rows:
+        row["name"] = (menus.get(row["menu_id"]) or {}).get("name")
+    return rows
+
+
+def sales_by_category(session: Session, start: date, end: date) -> List[dict]:
+    query = (
+        select(
+            DailyMenuSales.category_id,
+            func.sum(DailyMenuSales.quantity).label("quantity"),
+            func.sum(DailyMenuSales.revenue).label("revenue"),
+        )
+        .where(_day_range(DailyMenuSales.day, start, end))
+        .group_by(DailyMenuSales.category_id)
+        .order_by(func.sum(DailyMenuSales.revenue).desc())
+    )
+    rows = rows_to_dicts(session.exec(query))
+    names = {c["id"]: c["name"] for c in catalog.get().categories}
+    for row in rows:
+        row["name"] = names.get(row["category_id"])
+    return rows
+
+
+def top_sellers(session: Session, start: date, end: date, limit: int = 10, by: str = "quantity") -> List[dict]:
+    rows = sales_by_menu(session, start, end)
+    rows.sort(key=lambda r: (-r[by], r["menu_id"]))
+    return rows[:limit]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.reporting", description="Maintain the sales rollup tables.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("refresh", help="fold new order status history into the rollups")
+    rb = sub.add_parser("rebuild", help="recompute a date range from the base tables")
+    rb.add_argument("--start", type=date.fromisoformat, default=None, help="inclusive, e.g. 2024-05-01")
+    rb.add_argument("--end", type=date.fromisoformat, default=None, help="exclusive")
+    args = parser.parse_args(argv)
+
+    if database.get_engine() is None:
+        print("DATABASE_URL is not set", file=sys.stderr)
+        return 2
+    with Session(database.engine) as session:
+        result = refresh(session) if args.command == "refresh" else rebuild(session, args.start, args.end)
+    print(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,45 +1,69 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Body, HTTPException, Depends, Request
 from typing import List
-from app.schemas import AddonCreate, AddonRead, AddonUpdate
-from app.crud import get_addons_by_menu, create_addon, get_addon, update_addon, delete_addon
+from sqlmodel import Session
+from app.database import get_session
+from app.schemas import BULK_MAX_ITEMS, AddonBulkCreate, AddonBulkUpdate, AddonCreate, AddonRead, AddonUpdate
+from app.crud import create_addon, create_addons_bulk, get_addon, update_addon, update_addons_bulk, delete_addon
+from app.catalog_cache import catalog
+from app.http_cache import catalog_etag, catalog_response
 
 router = APIRouter()
 
 @router.get("/menus/{menu_id}/addons", response_model=List[AddonRead])
-def list_addons(menu_id: int):
-    """List addons for a menu."""
-    return get_addons_by_menu(menu_id)
+def list_addons(menu_id: int, request: Request):
+    """List addons for a menu (served from the catalog cache)."""
+    snap = catalog.get()
+    return catalog_response(request, catalog_etag(snap, "addons", menu_id), snap.addons_for(menu_id))
 
 @router.post("/menus/{menu_id}/addons", response_model=AddonRead, status_code=201)
-def create_menu_addon(menu_id: int, addon: AddonCreate):
+def create_menu_addon(menu_id: int, addon: AddonCreate, session: Session = Depends(get_session)):
     """Create an addon for a menu."""
     try:
-        return create_addon(menu_id, addon)
+        return create_addon(session, menu_id, addon)
     except ValueError:
         raise HTTPException(status_code=404, detail="Menu not found")
 
 
+@router.post("/addons/bulk", status_code=201)
+def create_addons_in_bulk(addons: List[AddonBulkCreate] = Body(..., max_length=BULK_MAX_ITEMS), session: Session = Depends(get_session)):
+    """Create many addons for existing menus in one transaction; returns their ids in input order."""
+    try:
+        return {"ids": create_addons_bulk(session, addons)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.patch("/addons/bulk")
+def update_addons_in_bulk(patches: List[AddonBulkUpdate] = Body(..., max_length=BULK_MAX_ITEMS), session: Session = Depends(get_session)):
+    """Patch many addons by id in one transaction; unknown ids are reported in `not_found`."""
+    try:
+        updated, missing = update_addons_bulk(session, patches)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"updated": updated, "not_found": missing}
+
+
 @router.get("/addons/{addon_id}", response_model=AddonRead)
-def read_addon(addon_id: int):
+def read_addon(addon_id: int, session: Session = Depends(get_session)):
     """Get a single addon by id."""
-    addon = get_addon(addon_id)
+    addon = get_addon(session, addon_id)
     if not addon:
         raise HTTPException(status_code=404, detail="Addon not found")
     return addon
 
 
 @router.put("/addons/{addon_id}", response_model=AddonRead)
-def update_existing_addon(addon_id: int, addon: AddonUpdate):
+def update_existing_addon(addon_id: int, addon: AddonUpdate, session: Session = Depends(get_session)):
     """Update fields on an existing addon."""
-    updated = update_addon(addon_id, addon)
+    updated = update_addon(session, addon_id, addon)
     if not updated:
         raise HTTPException(status_code=404, detail="Addon not found")
     return updated
 
 
 @router.delete("/addons/{addon_id}", status_code=204)
-def delete_existing_addon(addon_id: int):
+def delete_existing_addon(addon_id: int, session: Session = Depends(get_session)):
     """Delete an addon by id."""
-    if not delete_addon(addon_id):
+    if not delete_addon(session, addon_id):
         raise HTTPException(status_code=404, detail="Addon not found")
     return {}
\ No newline at end of file
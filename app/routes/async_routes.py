@@ -0,0 +1,118 @@
+"""Async handlers for the hot endpoints, mounted ahead of the sync routers when ASYNC_DB is on.
+
+Paths and response models match the sync routes exactly, so clients see no difference;
+requests are simply served on the event loop instead of Starlette's threadpool.
+"""
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request
+from typing import List, Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_async_session
+from app.models import Category, Menu, Order
+from app.schemas import AddonRead, CustomerRead, OrderCreate
+from app import async_crud, idempotency
+from app.http_cache import catalog_etag, catalog_response
+from app.fastjson import FastJSONResponse, columns_for
+from app.models import Customer
+from app.pagination import cursor_headers, decode_cursor, page_after, page_size, split_page
+from app.streaming import stream_json
+from app.crud import parse_expand, select_customers, select_menus
+
+router = APIRouter()
+
+@router.get("/categories", response_model=List[Category])
+async def list_categories(request: Request, session: AsyncSession = Depends(get_async_session)):
+    """Return all categories (served from the catalog cache)."""
+    snap = await async_crud.get_catalog(session)
+    return catalog_response(request, catalog_etag(snap, "categories"), snap.categories)
+
+@router.get("/menus", response_model=List[Menu])
+async def list_menus(
+    request: Request,
+    category_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
+    stream: bool = False,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """List menus, optionally filtered by category_id (served from the catalog cache)."""
+    if stream:
+        return stream_json(select_menus(category_id, limit, decode_cursor(after), columns=columns_for(Menu)))
+    limit = page_size(limit, default=None)
+    snap = await async_crud.get_catalog(session)
+    menus = snap.menus_in(category_id)
+    next_cursor = None
+    if limit is not None:
+        menus, next_cursor = page_after(menus, decode_cursor(after), limit)
+    return catalog_response(request, catalog_etag(snap, "menus", category_id, limit, after), menus, cursor_headers(next_cursor))
+
+@router.get("/menus/{menu_id}", response_model=Menu)
+async def read_menu(menu_id: int, request: Request, session: AsyncSession = Depends(get_async_session)):
+    """Get a single menu by id (served from the catalog cache)."""
+    snap = await async_crud.get_catalog(session)
+    menu = snap.menu(menu_id)
+    if not menu:
+        raise HTTPException(status_code=404, detail="Menu not found")
+    return catalog_response(request, catalog_etag(snap, "menu", menu_id), menu)
+
+@router.get("/menus/{menu_id}/addons", response_model=List[AddonRead])
+async def list_addons(menu_id: int, request: Request, session: AsyncSession = Depends(get_async_session)):
+    """List addons for a menu (served from the catalog cache)."""
+    snap = await async_crud.get_catalog(session)
+    return catalog_response(request, catalog_etag(snap, "addons", menu_id), snap.addons_for(menu_id))
+
+@router.get("/customers", response_model=List[CustomerRead])
+async def list_customers(
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
+    stream: bool = False,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """List customers: all of them, or one keyset page with `limit` / `after` (see customer_routes)."""
+    if stream:
+        return stream_json(select_customers(limit, decode_cursor(after), columns=columns_for(Customer, CustomerRead)))
+    if limit is None and after is None:
+        return FastJSONResponse(await async_crud.get_customer_rows(session))
+    limit = page_size(limit)
+    rows = await async_crud.get_customer_rows(session, limit + 1, decode_cursor(after))
+    page, next_cursor = split_page(rows, limit)
+    return FastJSONResponse(page, headers=cursor_headers(next_cursor))
+
+@router.get("/customers/{customer_id}", response_model=CustomerRead)
+async def read_customer(customer_id: int, session: AsyncSession = Depends(get_async_session)):
+    c = await async_crud.get_customer(session, customer_id)
+    if not c:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return c
+
+@router.post("/orders", response_model=Order, status_code=201)
+async def create_new_order(
+    order: OrderCreate,
+    idempotency_key: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Create a new order with items (validated); see the sync route for Idempotency-Key."""
+    try:
+        if idempotency_key is not None:
+            return await idempotency.run_async(
+                session, "orders", idempotency_key, order, lambda: async_crud.create_order(session, order), Order
+            )
+        return await async_crud.create_order(session, order)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/orders/{order_id}", response_model=Order)
+async def read_order(order_id: int, expand: Optional[str] = None, session: AsyncSession = Depends(get_async_session)):
+    """Get a single order by id; see the sync route for `expand`."""
+    try:
+        names = parse_expand(expand)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if names:
+        order = await async_crud.get_order_expanded(session, order_id, names)
+        if order is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+        return FastJSONResponse(order)
+    order = await async_crud.get_order(session, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+from sqlmodel import Session
+from app.database import get_session
+from app.models import Order
+from app.schemas import CartItemAdd, CartItemUpdate, CartCheckout
+from app.carts import cart_store, cart_view, checkout, validate_line
+
+router = APIRouter()
+
+# Every route passes the request session to the cart store; the memory store only
+# uses it to check the customer when a line is added.
+
+
+@router.get("/carts/{customer_id}")
+def read_cart(customer_id: int, session: Session = Depends(get_session)):
+    """Get a customer's cart, priced from the catalog cache."""
+    return cart_view(customer_id, cart_store.lines(session, customer_id))
+
+
+@router.post("/carts/{customer_id}/items", status_code=201)
+def add_cart_item(customer_id: int, item: CartItemAdd, session: Session = Depends(get_session)):
+    """Add a menu (with addons) to the cart; the same menu + addons merges into one line."""
+    try:
+        validate_line(item.menu_id, item.addon_ids)
+        lines = cart_store.add(session, customer_id, item.menu_id, item.addon_ids, item.quantity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return cart_view(customer_id, lines)
+
+
+@router.patch("/carts/{customer_id}/items/{line_id}")
+def update_cart_item(customer_id: int, line_id: str, item: CartItemUpdate, session: Session = Depends(get_session)):
+    """Set a line's quantity (0 removes it)."""
+    lines = cart_store.set_quantity(session, customer_id, line_id, item.quantity)
+    if lines is None:
+        raise HTTPException(status_code=404, detail="Cart item not found")
+    return cart_view(customer_id, lines)
+
+
+@router.delete("/carts/{customer_id}/items/{line_id}")
+def remove_cart_item(customer_id: int, line_id: str, session: Session = Depends(get_session)):
+    """Remove a line from the cart."""
+    lines = cart_store.set_quantity(session, customer_id, line_id, 0)
+    if lines is None:
+        raise HTTPException(status_code=404, detail="Cart item not found")
+    return cart_view(customer_id, lines)
+
+
+@router.delete("/carts/{customer_id}", status_code=204)
+def clear_cart(customer_id: int, session: Session = Depends(get_session)):
+    """Empty the cart."""
+    cart_store.clear(session, customer_id)
+    return {}
+
+
+@router.post("/carts/{customer_id}/checkout", response_model=Order, status_code=201)
+def checkout_cart(customer_id: int, body: Optional[CartCheckout] = None, session: Session = Depends(get_session)):
+    """Place the cart as one order (priced in a single pass) and empty the cart."""
+    try:
+        body = body or CartCheckout()
+        order = checkout(session, customer_id, body.payment_method, body.discount_code)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if order is None:
+        raise HTTPException(status_code=400, detail="Cart is empty")
+    return order
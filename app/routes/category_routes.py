@@ -1,29 +1,34 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import List
+from sqlmodel import Session
+from app.database import get_session
 from app.models import Category
 from app.schemas import CategoryUpdate
-from app.crud import get_categories, update_category, delete_category
+from app.crud import update_category, delete_category
+from app.catalog_cache import catalog
+from app.http_cache import catalog_etag, catalog_response
 
 router = APIRouter()
 
 @router.get("/categories", response_model=List[Category])
-def list_categories():
-    """Return all categories."""
-    return get_categories()
+def list_categories(request: Request):
+    """Return all categories (served from the catalog cache)."""
+    snap = catalog.get()
+    return catalog_response(request, catalog_etag(snap, "categories"), snap.categories)
 
 
 @router.put("/categories/{category_id}", response_model=Category)
-def update_existing_category(category_id: int, category: CategoryUpdate):
+def update_existing_category(category_id: int, category: CategoryUpdate, session: Session = Depends(get_session)):
     """Update fields on an existing category."""
-    updated = update_category(category_id, category)
+    updated = update_category(session, category_id, category)
     if not updated:
         raise HTTPException(status_code=404, detail="Category not found")
     return updated
 
 
 @router.delete("/categories/{category_id}", status_code=204)
-def delete_existing_category(category_id: int):
+def delete_existing_category(category_id: int, session: Session = Depends(get_session)):
     """Delete a category by id."""
-    if not delete_category(category_id):
+    if not delete_category(session, category_id):
         raise HTTPException(status_code=404, detail="Category not found")
     return {}
\ No newline at end of file
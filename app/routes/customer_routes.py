@@ -1,37 +1,61 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Optional
+from sqlmodel import Session
+from app.database import get_session
 from app.schemas import CustomerCreate, CustomerRead, CustomerUpdate
-from app.crud import create_customer, get_customers, get_customer, update_customer, delete_customer
+from app.models import Customer
+from app.fastjson import FastJSONResponse, columns_for
+from app.pagination import cursor_headers, decode_cursor, page_size, split_page
+from app.streaming import stream_json
+from app.crud import select_customers, create_customer, get_customer_rows, get_customer, update_customer, delete_customer
 
 router = APIRouter()
 
 @router.post("/customers", response_model=CustomerRead, status_code=201)
-def create_new_customer(customer: CustomerCreate):
+def create_new_customer(customer: CustomerCreate, session: Session = Depends(get_session)):
     """Create a new customer."""
-    return create_customer(customer)
+    return create_customer(session, customer)
 
 @router.get("/customers", response_model=List[CustomerRead])
-def list_customers():
-    return get_customers()
+def list_customers(
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
+    stream: bool = False,
+    session: Session = Depends(get_session),
+):
+    """List customers.
+
+    Without `limit` or `after` every customer is returned, as before; with either, one
+    keyset page is returned (DEFAULT_PAGE_SIZE if `limit` is omitted) and the next
+    cursor is sent in X-Next-Cursor. With `stream=true` all matching rows (or up to
+    `limit`) are streamed as one JSON array.
+    """
+    if stream:
+        return stream_json(select_customers(limit, decode_cursor(after), columns=columns_for(Customer, CustomerRead)))
+    if limit is None and after is None:
+        return FastJSONResponse(get_customer_rows(session))
+    limit = page_size(limit)
+    page, next_cursor = split_page(get_customer_rows(session, limit + 1, decode_cursor(after)), limit)
+    return FastJSONResponse(page, headers=cursor_headers(next_cursor))
 
 @router.get("/customers/{customer_id}", response_model=CustomerRead)
-def read_customer(customer_id: int):
-    c = get_customer(customer_id)
+def read_customer(customer_id: int, session: Session = Depends(get_session)):
+    c = get_customer(session, customer_id)
     if not c:
         raise HTTPException(status_code=404, detail="Customer not found")
     return c
 
 @router.put("/customers/{customer_id}", response_model=CustomerRead)
-def update_existing_customer(customer_id: int, customer: CustomerUpdate):
+def update_existing_customer(customer_id: int, customer: CustomerUpdate, session: Session = Depends(get_session)):
     """Update fields on an existing customer."""
-    updated = update_customer(customer_id, customer)
+    updated = update_customer(session, customer_id, customer)
     if not updated:
         raise HTTPException(status_code=404, detail="Customer not found")
     return updated
 
 @router.delete("/customers/{customer_id}", status_code=204)
-def delete_existing_customer(customer_id: int):
+def delete_existing_customer(customer_id: int, session: Session = Depends(get_session)):
     """Delete a customer by id."""
-    if not delete_customer(customer_id):
+    if not delete_customer(session, customer_id):
         raise HTTPException(status_code=404, detail="Customer not found")
     return {}
\ No newline at end of file
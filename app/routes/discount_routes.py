@@ -0,0 +1,67 @@
+from fastapi import APIRouter, HTTPException, Depends
+from typing import List
+from sqlmodel import Session
+from app.database import get_session
+from app.models import Discount
+from app.schemas import DiscountCreate, DiscountUpdate
+from app.discounts import discount_index
+from app.crud import create_discount, get_discounts, get_discount, update_discount, delete_discount
+
+router = APIRouter()
+
+@router.post("/discounts", response_model=Discount, status_code=201)
+def create_new_discount(discount: DiscountCreate, session: Session = Depends(get_session)):
+    """Create a discount (percentage 0-100, optional unique code)."""
+    try:
+        return create_discount(session, discount)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/discounts", response_model=List[Discount])
+def list_discounts(session: Session = Depends(get_session)):
+    """List all discounts, including expired ones."""
+    return get_discounts(session)
+
+
+# declared before /discounts/{discount_id}; served from the in-memory index
+@router.get("/discounts/code/{code}", response_model=Discount)
+def read_discount_by_code(code: str):
+    """Look up a discount that applies now by its code (for showing it before checkout)."""
+    try:
+        return discount_index.resolve(code=code)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/discounts/{discount_id}", response_model=Discount)
+def read_discount(discount_id: int, session: Session = Depends(get_session)):
+    """Get a single discount by id."""
+    discount = get_discount(session, discount_id)
+    if not discount:
+        raise HTTPException(status_code=404, detail="Discount not found")
+    return discount
+
+
+@router.put("/discounts/{discount_id}", response_model=Discount)
+def update_existing_discount(discount_id: int, discount: DiscountUpdate, session: Session = Depends(get_session)):
+    """Update a discount; new orders see the change immediately."""
+    try:
+        updated = update_discount(session, discount_id, discount)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not updated:
+        raise HTTPException(status_code=404, detail="Discount not found")
+    return updated
+
+
+@router.delete("/discounts/{discount_id}", status_code=204)
+def delete_existing_discount(discount_id: int, session: Session = Depends(get_session)):
+    """Delete a discount that no order uses."""
+    try:
+        deleted = delete_discount(session, discount_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Discount not found")
+    return {}
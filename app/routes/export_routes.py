@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from app.exporter import FORMATS, KINDS, MEDIA_TYPES, export_filename, iter_export
+
+router = APIRouter()
+
+
+@router.get("/exports/{kind}")
+def export_rows(
+    kind: str,
+    format: str = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    gzip: bool = False,
+):
+    """Stream orders, order_items or payments as CSV or JSONL, filtered to [start, end).
+
+    Orders and their items are filtered by the order's created_at, payments by paid_at.
+    """
+    if kind not in KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown export '{kind}'")
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or jsonl")
+    filename = export_filename(kind, format, start, end, gzip)
+    return StreamingResponse(
+        iter_export(kind, format, start, end, gzip),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
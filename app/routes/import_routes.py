@@ -0,0 +1,33 @@
+import tempfile
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from app.importer import FORMATS, KINDS, import_stream
+
+router = APIRouter()
+
+# request bodies above this size are spooled to a temporary file instead of memory
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+CONTENT_TYPES = {"text/csv": "csv", "application/x-ndjson": "jsonl", "application/jsonl": "jsonl"}
+
+
+@router.post("/import/{kind}")
+async def import_file(kind: str, request: Request, format: Optional[str] = None):
+    """Import a CSV or JSONL request body (optionally Content-Encoding: gzip) of categories, menus, addons or customers.
+
+    The format comes from `format` or the Content-Type. Returns the import report;
+    invalid rows are skipped and listed with their line numbers.
+    """
+    if kind not in KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown import kind '{kind}'")
+    fmt = format or CONTENT_TYPES.get(request.headers.get("content-type", "").split(";")[0].strip())
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail="Send text/csv or application/x-ndjson, or pass format=csv|jsonl")
+
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        gzipped = request.headers.get("content-encoding") == "gzip"
+        report = await run_in_threadpool(import_stream, kind, body, fmt, gzipped)
+    return report.as_dict()
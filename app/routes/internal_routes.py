@@ -0,0 +1,59 @@
+import hmac
+import os
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Header, Depends
+from app import database
+from app.catalog_cache import catalog
+from app.carts import cart_store
+from app.discounts import discount_index
+from app.idempotency import cache as idempotency_cache
+from app.kitchen import hub
+
+# Internal operational endpoints. They are disabled (404) unless INTERNAL_API_TOKEN
+# is set; callers must then send it in the X-Internal-Token header.
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+
+def require_internal_token(x_internal_token: Optional[str] = Header(default=None)):
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_internal_token is None or not hmac.compare_digest(x_internal_token, INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+router = APIRouter(dependencies=[Depends(require_internal_token)])
+
+@router.get("/internal/pool")
+def read_pool_stats():
+    """Connection pool occupancy, configuration and checkout wait-time histogram."""
+    return database.pool_stats()
+
+
+@router.get("/internal/catalog-cache")
+def read_catalog_cache_stats():
+    """Catalog cache version and hit/miss counters."""
+    return catalog.stats()
+
+
+@router.get("/internal/kitchen")
+def read_kitchen_stats():
+    """Kitchen hub state: broker, open orders held in memory, connected screens."""
+    return hub.stats()
+
+
+@router.get("/internal/carts")
+def read_cart_stats():
+    """Cart store backend and, for the memory store, how many carts it holds."""
+    return cart_store.stats()
+
+
+@router.get("/internal/discounts")
+def read_discount_stats():
+    """Discount index state: hit ratio, invalidations, discounts held."""
+    return discount_index.stats()
+
+
+@router.get("/internal/idempotency")
+def read_idempotency_stats():
+    """Replay cache of Idempotency-Key responses held by this worker."""
+    return idempotency_cache.stats()
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+from app.database import get_session
+from app.fastjson import FastJSONResponse, dumps
+from app.kitchen import hub
+from app.order_status import dwell_stats
+
+router = APIRouter()
+
+# comment line sent on idle SSE streams so proxies keep the connection open
+HEARTBEAT_SECONDS = 15
+
+
+@router.get("/kitchen/queue")
+def read_kitchen_queue():
+    """Open orders grouped by status (oldest first) and the sequence number of the last change."""
+    return FastJSONResponse(hub.snapshot())
+
+
+@router.get("/kitchen/dwell")
+def read_status_dwell(since: Optional[datetime] = None, session: Session = Depends(get_session)):
+    """Average / min / max seconds orders spend in each status, from the status history."""
+    return dwell_stats(session, since)
+
+
+async def _events(sub):
+    """Yield ("snapshot" | "delta", payload) pairs for one subscriber, resyncing after overflow."""
+    yield "snapshot", await asyncio.to_thread(hub.snapshot)
+    while True:
+        try:
+            event = await asyncio.wait_for(sub.queue.get(), timeout=HEARTBEAT_SECONDS)
+        except asyncio.TimeoutError:
+            yield "heartbeat", None
+            continue
+        if sub.overflowed:
+            sub.overflowed = False
+            while not sub.queue.empty():
+                sub.queue.get_nowait()
+            yield "snapshot", await asyncio.to_thread(hub.snapshot)
+            continue
+        yield "delta", event
+
+
+@router.get("/kitchen/stream")
+async def stream_kitchen_queue(request: Request):
+    """Server-Sent Events: one `snapshot` event, then a `delta` event per order change."""
+    sub = hub.subscribe(asyncio.get_running_loop())
+
+    async def body():
+        try:
+            async for kind, payload in _events(sub):
+                if await request.is_disconnected():
+                    break
+                if kind == "heartbeat":
+                    yield b": keep-alive\n\n"
+                else:
+                    yield b"event: " + kind.encode() + b"\ndata: " + dumps(payload) + b"\n\n"
+        finally:
+            hub.unsubscribe(sub)
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.websocket("/kitchen/ws")
+async def kitchen_socket(websocket: WebSocket):
+    """WebSocket variant of /kitchen/stream: messages are {"type": "snapshot" | "delta", "data": ...}."""
+    await websocket.accept()
+    sub = hub.subscribe(asyncio.get_running_loop())
+    try:
+        async for kind, payload in _events(sub):
+            if kind == "heartbeat":
+                continue
+            await websocket.send_text(dumps({"type": kind, "data": payload}).decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.unsubscribe(sub)
@@ -1,42 +1,85 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, Body, HTTPException, Depends, Query, Request
 from typing import List, Optional
 from sqlmodel import Session
 from app.database import get_session
 from app.models import Menu
-from app.schemas import MenuCreate, MenuUpdate
-from app.crud import get_menus, get_menu, create_menu, update_menu, delete_menu
+from app.schemas import BULK_MAX_ITEMS, MenuBulkCreate, MenuBulkUpdate, MenuCreate, MenuUpdate
+from app.crud import create_menu, create_menus_bulk, update_menu, update_menus_bulk, delete_menu
+from app.catalog_cache import catalog
+from app.http_cache import catalog_etag, catalog_response
+from app.fastjson import columns_for
+from app.pagination import cursor_headers, decode_cursor, page_after, page_size
+from app.streaming import stream_json
+from app.crud import select_menus
 
 router = APIRouter()
 
 @router.get("/menus", response_model=List[Menu])
-def list_menus(category_id: Optional[int] = None):
-    """List menus, optionally filtered by category_id."""
-    return get_menus(category_id)
+def list_menus(
+    request: Request,
+    category_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
+    stream: bool = False,
+):
+    """List menus, optionally filtered by category_id (served from the catalog cache).
+
+    Without `limit` the whole (cached) list is returned, as the app expects; with it,
+    one keyset page is returned and the next cursor is sent in X-Next-Cursor.
+    `stream=true` bypasses the cache and streams rows straight from the database.
+    """
+    if stream:
+        return stream_json(select_menus(category_id, limit, decode_cursor(after), columns=columns_for(Menu)))
+    limit = page_size(limit, default=None)
+    snap = catalog.get()
+    menus = snap.menus_in(category_id)
+    next_cursor = None
+    if limit is not None:
+        menus, next_cursor = page_after(menus, decode_cursor(after), limit)
+    return catalog_response(request, catalog_etag(snap, "menus", category_id, limit, after), menus, cursor_headers(next_cursor))
 
 @router.get("/menus/{menu_id}", response_model=Menu)
-def read_menu(menu_id: int):
-    """Get a single menu by id."""
-    menu = get_menu(menu_id)
+def read_menu(menu_id: int, request: Request):
+    """Get a single menu by id (served from the catalog cache)."""
+    snap = catalog.get()
+    menu = snap.menu(menu_id)
     if not menu:
         raise HTTPException(status_code=404, detail="Menu not found")
-    return menu
+    return catalog_response(request, catalog_etag(snap, "menu", menu_id), menu)
 
 @router.post("/menus", response_model=Menu, status_code=201)
-def create_new_menu(menu: MenuCreate):
+def create_new_menu(menu: MenuCreate, session: Session = Depends(get_session)):
     """Create a new menu item from validated input."""
-    return create_menu(menu)
+    return create_menu(session, menu)
+
+@router.post("/menus/bulk", status_code=201)
+def create_menus_in_bulk(menus: List[MenuBulkCreate] = Body(..., max_length=BULK_MAX_ITEMS), session: Session = Depends(get_session)):
+    """Create many menus (with nested addons) in one transaction; returns their ids in input order."""
+    try:
+        return {"created": create_menus_bulk(session, menus)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.patch("/menus/bulk")
+def update_menus_in_bulk(patches: List[MenuBulkUpdate] = Body(..., max_length=BULK_MAX_ITEMS), session: Session = Depends(get_session)):
+    """Patch many menus by id in one transaction; unknown ids are reported in `not_found`."""
+    try:
+        updated, missing = update_menus_bulk(session, patches)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"updated": updated, "not_found": missing}
 
 @router.put("/menus/{menu_id}", response_model=Menu)
-def update_existing_menu(menu_id: int, menu: MenuUpdate):
+def update_existing_menu(menu_id: int, menu: MenuUpdate, session: Session = Depends(get_session)):
     """Update fields on an existing menu item."""
-    updated = update_menu(menu_id, menu)
+    updated = update_menu(session, menu_id, menu)
     if not updated:
         raise HTTPException(status_code=404, detail="Menu not found")
     return updated
 
 @router.delete("/menus/{menu_id}", status_code=204)
-def delete_existing_menu(menu_id: int):
+def delete_existing_menu(menu_id: int, session: Session = Depends(get_session)):
     """Delete a menu by id."""
-    if not delete_menu(menu_id):
+    if not delete_menu(session, menu_id):
         raise HTTPException(status_code=404, detail="Menu not found")
     return {}
\ No newline at end of file
@@ -1,40 +1,137 @@
-from fastapi import APIRouter, HTTPException
-from app.models import Order
-from app.schemas import OrderCreate, OrderUpdate
-from app.crud import create_order, get_order, update_order, delete_order
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from typing import List, Optional
+from sqlmodel import Session
+from app.database import get_session
+from app.models import Order, OrderStatusHistory
+from app.schemas import OrderBulkUpdate, OrderCreate, OrderStatusBatch, OrderStatusChange, OrderUpdate
+from app.fastjson import FastJSONResponse, columns_for
+from app.pagination import cursor_headers, decode_cursor, page_size, split_page
+from app.streaming import stream_json
+from app.crud import bulk_update_orders, select_orders, create_order, get_order_rows, get_order, get_order_expanded, parse_expand, update_order, delete_order
+from app.order_status import get_history, transition_order, transition_orders
+from app import idempotency
 
 router = APIRouter()
 
 @router.post("/orders", response_model=Order, status_code=201)
-def create_new_order(order: OrderCreate):
-    """Create a new order with items (validated)."""
+def create_new_order(
+    order: OrderCreate,
+    idempotency_key: Optional[str] = Header(None),
+    session: Session = Depends(get_session),
+):
+    """Create a new order with items (validated).
+
+    Send an Idempotency-Key header to make retries safe: a repeated key replays the
+    first response instead of creating another order.
+    """
+    try:
+        if idempotency_key is not None:
+            return idempotency.run(session, "orders", idempotency_key, order, lambda: create_order(session, order), Order)
+        return create_order(session, order)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/orders", response_model=List[Order])
+def list_orders(
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
+    status: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    stream: bool = False,
+    session: Session = Depends(get_session),
+):
+    """List orders one keyset page at a time, optionally filtered by status or customer.
+
+    With `stream=true` all matching rows (or up to `limit`) are streamed as one JSON array.
+    """
+    if stream:
+        query = select_orders(limit, decode_cursor(after), status=status, customer_id=customer_id, columns=columns_for(Order))
+        return stream_json(query)
+    limit = page_size(limit)
+    rows = get_order_rows(session, limit + 1, decode_cursor(after), status=status, customer_id=customer_id)
+    page, next_cursor = split_page(rows, limit)
+    return FastJSONResponse(page, headers=cursor_headers(next_cursor))
+
+
+@router.patch("/orders/bulk")
+def bulk_update_existing_orders(bulk: OrderBulkUpdate, session: Session = Depends(get_session)):
+    """Apply the same changes to many orders in one UPDATE; reports updated orders and per-id failures."""
+    try:
+        updated, skipped = bulk_update_orders(session, bulk.changes, bulk.order_ids, bulk.status, bulk.customer_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    failed = [{"id": order_id, "detail": detail} for order_id, detail in skipped.items()]
+    return FastJSONResponse({"updated": updated, "failed": failed})
+
+
+@router.post("/orders/status")
+def change_orders_status(batch: OrderStatusBatch, session: Session = Depends(get_session)):
+    """Move many orders from one status to the next in one transaction; reports updated and skipped ids."""
     try:
-        return create_order(order)
+        updated, skipped = transition_orders(session, batch.order_ids, batch.from_status, batch.to_status, batch.note)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return {"updated": updated, "skipped": skipped}
 
 
 @router.get("/orders/{order_id}", response_model=Order)
-def read_order(order_id: int):
-    """Get a single order by id."""
-    order = get_order(order_id)
+def read_order(order_id: int, expand: Optional[str] = None, session: Session = Depends(get_session)):
+    """Get a single order by id.
+
+    `expand=items,payments,history` nests those lists in the response; each costs one
+    extra query however many rows it has.
+    """
+    try:
+        names = parse_expand(expand)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if names:
+        order = get_order_expanded(session, order_id, names)
+        if order is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+        return FastJSONResponse(order)
+    order = get_order(session, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
 
 
 @router.put("/orders/{order_id}", response_model=Order)
-def update_existing_order(order_id: int, order: OrderUpdate):
+def update_existing_order(order_id: int, order: OrderUpdate, session: Session = Depends(get_session)):
     """Update fields on an existing order."""
-    updated = update_order(order_id, order)
+    try:
+        updated = update_order(session, order_id, order)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not updated:
         raise HTTPException(status_code=404, detail="Order not found")
     return updated
 
 
+@router.post("/orders/{order_id}/status", response_model=Order)
+def change_order_status(order_id: int, change: OrderStatusChange, session: Session = Depends(get_session)):
+    """Move an order to a new status (validated and recorded in its history)."""
+    try:
+        order = transition_order(session, order_id, change.status, change.note)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
+
+@router.get("/orders/{order_id}/history", response_model=List[OrderStatusHistory])
+def read_order_history(order_id: int, session: Session = Depends(get_session)):
+    """Status changes of an order, oldest first."""
+    if not get_order(session, order_id):
+        raise HTTPException(status_code=404, detail="Order not found")
+    return get_history(session, order_id)
+
+
 @router.delete("/orders/{order_id}", status_code=204)
-def delete_existing_order(order_id: int):
+def delete_existing_order(order_id: int, session: Session = Depends(get_session)):
     """Delete an order by id."""
-    if not delete_order(order_id):
+    if not delete_order(session, order_id):
         raise HTTPException(status_code=404, detail="Order not found")
     return {}
\ No newline at end of file
@@ -1,39 +1,71 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas import PaymentCreate, PaymentRead, PaymentUpdate
-from app.crud import create_payment, get_payment, update_payment, delete_payment
+from fastapi import APIRouter, HTTPException, Depends, Header
+from typing import Optional
+from sqlmodel import Session
+from app import idempotency
+from app.database import get_session
+from app.schemas import OrderBalance, PaymentCreate, PaymentRead, PaymentUpdate
+from app.crud import create_payment, get_order_balance, get_payment, update_payment, delete_payment
 
 router = APIRouter()
 
 @router.post("/payments", response_model=PaymentRead, status_code=201)
-def create_new_payment(payment: PaymentCreate):
-    """Create a payment for an order."""
+def create_new_payment(
+    payment: PaymentCreate,
+    idempotency_key: Optional[str] = Header(None),
+    session: Session = Depends(get_session),
+):
+    """Pay all or part of an order; an Idempotency-Key header makes retries safe.
+
+    A ready order is completed once its payments cover the total; paying more than
+    is still owed is rejected.
+    """
     try:
-        return create_payment(payment)
+        if idempotency_key is not None:
+            return idempotency.run(
+                session, "payments", idempotency_key, payment, lambda: create_payment(session, payment), PaymentRead
+            )
+        return create_payment(session, payment)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/payments/{payment_id}", response_model=PaymentRead)
-def read_payment(payment_id: int):
+def read_payment(payment_id: int, session: Session = Depends(get_session)):
     """Get a single payment by id."""
-    payment = get_payment(payment_id)
+    payment = get_payment(session, payment_id)
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
     return payment
 
 
+@router.get("/orders/{order_id}/payments", response_model=OrderBalance)
+def read_order_payments(order_id: int, session: Session = Depends(get_session)):
+    """An order's payments with the amount paid and still outstanding."""
+    balance = get_order_balance(session, order_id)
+    if balance is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return balance
+
+
 @router.put("/payments/{payment_id}", response_model=PaymentRead)
-def update_existing_payment(payment_id: int, payment: PaymentUpdate):
+def update_existing_payment(payment_id: int, payment: PaymentUpdate, session: Session = Depends(get_session)):
     """Update fields on an existing payment."""
-    updated = update_payment(payment_id, payment)
+    try:
+        updated = update_payment(session, payment_id, payment)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not updated:
         raise HTTPException(status_code=404, detail="Payment not found")
     return updated
 
 
 @router.delete("/payments/{payment_id}", status_code=204)
-def delete_existing_payment(payment_id: int):
-    """Delete a payment by id."""
-    if not delete_payment(payment_id):
+def delete_existing_payment(payment_id: int, session: Session = Depends(get_session)):
+    """Delete a payment by id; a completed order keeps the payments that cover it."""
+    try:
+        deleted = delete_payment(session, payment_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
         raise HTTPException(status_code=404, detail="Payment not found")
     return {}
\ No newline at end of file
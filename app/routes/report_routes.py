@@ -0,0 +1,64 @@
+"""Sales reports, answered from the rollup tables maintained by app.reporting.
+
+Every report takes an optional [start, end) date range (default: the last 30 days)
+and includes `as_of`, the time the rollups were last refreshed.
+"""
+from datetime import date
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlmodel import Session
+from app.database import get_session
+from app import reporting
+
+router = APIRouter()
+
+
+def _range(start: Optional[date], end: Optional[date]):
+    try:
+        return reporting.default_range(start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/reports/revenue")
+def revenue_report(start: Optional[date] = None, end: Optional[date] = None, session: Session = Depends(get_session)):
+    """Orders created / completed and revenue per day, with totals."""
+    start, end = _range(start, end)
+    days = reporting.revenue_by_day(session, start, end)
+    total = {key: sum(d[key] for d in days) for key in ("orders_created", "orders_completed", "revenue")}
+    return {"start": start, "end": end, "as_of": reporting.as_of(session), "days": days, "total": total}
+
+
+@router.get("/reports/menus")
+def menu_sales_report(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    category_id: Optional[int] = None,
+    session: Session = Depends(get_session),
+):
+    """Quantity sold and revenue per menu item, highest revenue first."""
+    start, end = _range(start, end)
+    menus = reporting.sales_by_menu(session, start, end, category_id)
+    return {"start": start, "end": end, "as_of": reporting.as_of(session), "menus": menus}
+
+
+@router.get("/reports/categories")
+def category_sales_report(start: Optional[date] = None, end: Optional[date] = None, session: Session = Depends(get_session)):
+    """Quantity sold and revenue per category, highest revenue first."""
+    start, end = _range(start, end)
+    categories = reporting.sales_by_category(session, start, end)
+    return {"start": start, "end": end, "as_of": reporting.as_of(session), "categories": categories}
+
+
+@router.get("/reports/top-sellers")
+def top_sellers_report(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = Query(10, ge=1, le=100),
+    by: Literal["quantity", "revenue"] = "quantity",
+    session: Session = Depends(get_session),
+):
+    """Best-selling menu items by quantity or revenue."""
+    start, end = _range(start, end)
+    menus = reporting.top_sellers(session, start, end, limit, by)
+    return {"start": start, "end": end, "as_of": reporting.as_of(session), "menus": menus}
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Optional
+from sqlmodel import Session
+from app.database import get_session
+from app.models import Review
+from app.schemas import ReviewCreate, ReviewUpdate
+from app.pagination import cursor_headers, decode_cursor, page_size, split_page
+from app.fastjson import FastJSONResponse
+from app.crud import create_review, get_review, get_reviews_by_menu, update_review, delete_review
+
+router = APIRouter()
+
+@router.post("/reviews", response_model=Review, status_code=201)
+def create_new_review(review: ReviewCreate, session: Session = Depends(get_session)):
+    """Create a review (rating 1-5); the menu's average_rating is updated in the same transaction."""
+    try:
+        return create_review(session, review)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/menus/{menu_id}/reviews", response_model=List[Review])
+def list_menu_reviews(
+    menu_id: int,
+    limit: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
+    session: Session = Depends(get_session),
+):
+    """List a menu's reviews one keyset page at a time; the next cursor is in X-Next-Cursor."""
+    limit = page_size(limit)
+    reviews = get_reviews_by_menu(session, menu_id, limit + 1, decode_cursor(after))
+    page, next_cursor = split_page(reviews, limit)
+    return FastJSONResponse([r.model_dump() for r in page], headers=cursor_headers(next_cursor))
+
+
+@router.get("/reviews/{review_id}", response_model=Review)
+def read_review(review_id: int, session: Session = Depends(get_session)):
+    """Get a single review by id."""
+    review = get_review(session, review_id)
+    if not review:
+        raise HTTPException(status_code=404, detail="Review not found")
+    return review
+
+
+@router.put("/reviews/{review_id}", response_model=Review)
+def update_existing_review(review_id: int, review: ReviewUpdate, session: Session = Depends(get_session)):
+    """Update a review's rating or comment."""
+    updated = update_review(session, review_id, review)
+    if not updated:
+        raise HTTPException(status_code=404, detail="Review not found")
+    return updated
+
+
+@router.delete("/reviews/{review_id}", status_code=204)
+def delete_existing_review(review_id: int, session: Session = Depends(get_session)):
+    """Delete a review by id."""
+    if not delete_review(session, review_id):
+        raise HTTPException(status_code=404, detail="Review not found")
+    return {}
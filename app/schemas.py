@@ -1,4 +1,6 @@
-from typing import Optional, List
+from datetime import datetime
+from typing import Literal, Optional, List
+from pydantic import AliasChoices, Field as PydanticField
 from sqlmodel import SQLModel, Field
 
 
@@ -33,6 +35,10 @@ class MenuUpdate(SQLModel):
     description: Optional[str] = None
 
 
+class MenuBulkUpdate(MenuUpdate):
+    id: int
+
+
 class OrderItemCreate(SQLModel):
     menu_id: int
     quantity: int = 1
@@ -46,6 +52,9 @@ class OrderCreate(SQLModel):
     customer_id: Optional[int] = None
     payment_method: Optional[str] = "cash"
     items: List[OrderItemCreate]
+    # either one names the discount applied to the order total
+    discount_id: Optional[int] = None
+    discount_code: Optional[str] = None
 
 
 class OrderUpdate(SQLModel):
@@ -54,12 +63,37 @@ class OrderUpdate(SQLModel):
     current_status: Optional[str] = None
 
 
+class OrderBulkUpdate(SQLModel):
+    # target explicit ids and/or every order matching status / customer_id
+    order_ids: Optional[List[int]] = Field(default=None, max_length=1000)
+    status: Optional[str] = None
+    customer_id: Optional[int] = None
+    changes: OrderUpdate
+
+
+class OrderStatusChange(SQLModel):
+    status: str
+    note: Optional[str] = None
+
+
+class OrderStatusBatch(SQLModel):
+    # every order is expected to be in from_status; the others are skipped
+    order_ids: List[int]
+    from_status: str
+    to_status: str
+    note: Optional[str] = None
+
+
 class CustomerCreate(SQLModel):
     name: str
     phone_number: Optional[str] = None
     email: Optional[str] = None
 
 
+class CustomerImport(CustomerCreate):
+    id: Optional[int] = None
+
+
 class CustomerRead(SQLModel):
     id: Optional[int]
     name: str
@@ -78,6 +112,33 @@ class AddonCreate(SQLModel):
     price: float
 
 
+# upper bound on items per bulk request
+BULK_MAX_ITEMS = 5000
+
+
+class MenuBulkCreate(MenuBase):
+    # addons created together with the menu
+    addons: List[AddonCreate] = []
+
+
+class AddonBulkCreate(AddonCreate):
+    menu_id: int
+
+
+# rows read by app.importer; an id means "upsert this row"
+class CategoryImport(SQLModel):
+    id: Optional[int] = None
+    name: str
+
+
+class MenuImport(MenuBase):
+    id: Optional[int] = None
+
+
+class AddonImport(AddonBulkCreate):
+    id: Optional[int] = None
+
+
 class AddonRead(SQLModel):
     id: Optional[int]
     menu_id: int
@@ -90,26 +151,92 @@ class AddonUpdate(SQLModel):
     price: Optional[float] = None
 
 
+class AddonBulkUpdate(AddonUpdate):
+    id: int
+
+
+# refunded / failed payments stay on record but no longer count towards the order total
+PaymentStatus = Literal["paid", "pending", "failed", "refunded"]
+
+
 class PaymentCreate(SQLModel):
     order_id: int
-    amount: float
+    # part of the order total is fine (split / partial payments)
+    amount: float = Field(gt=0)
     method: Optional[str] = "cash"
 
 
 class PaymentRead(SQLModel):
+    # the columns are payment_method / payment_status; clients read method / status
     id: Optional[int]
     order_id: int
     amount: float
-    method: Optional[str]
-    status: Optional[str]
-    paid_at: Optional[str]
+    method: Optional[str] = PydanticField(default=None, validation_alias=AliasChoices("method", "payment_method"))
+    status: Optional[str] = PydanticField(default=None, validation_alias=AliasChoices("status", "payment_status"))
+    paid_at: Optional[datetime] = None
 
 
 class PaymentUpdate(SQLModel):
-    amount: Optional[float] = None
+    amount: Optional[float] = Field(default=None, gt=0)
     method: Optional[str] = None
-    payment_status: Optional[str] = None
-    paid_at: Optional[str] = None
+    payment_status: Optional[PaymentStatus] = None
+    paid_at: Optional[datetime] = None
+
+
+class OrderBalance(SQLModel):
+    order_id: int
+    total: float
+    paid: float
+    outstanding: float
+    settled: bool
+    payments: List[PaymentRead]
+
+
+class ReviewCreate(SQLModel):
+    customer_id: int
+    menu_id: int
+    rating: int = Field(ge=1, le=5)
+    comment: Optional[str] = None
+
+
+class ReviewUpdate(SQLModel):
+    rating: Optional[int] = Field(default=None, ge=1, le=5)
+    comment: Optional[str] = None
+
+
+class DiscountCreate(SQLModel):
+    name: str
+    code: Optional[str] = None
+    description: Optional[str] = None
+    percentage: float = Field(ge=0, le=100)
+    valid_until: Optional[datetime] = None
+
+
+class DiscountUpdate(SQLModel):
+    name: Optional[str] = None
+    code: Optional[str] = None
+    description: Optional[str] = None
+    percentage: Optional[float] = Field(default=None, ge=0, le=100)
+    valid_until: Optional[datetime] = None
+
+
+MAX_CART_QUANTITY = 99  # per line, also once an add merges into an existing line
+
+
+class CartItemAdd(SQLModel):
+    menu_id: int
+    quantity: int = Field(default=1, ge=1, le=MAX_CART_QUANTITY)
+    addon_ids: List[int] = []
+
+
+class CartItemUpdate(SQLModel):
+    # 0 removes the line
+    quantity: int = Field(ge=0, le=MAX_CART_QUANTITY)
+
+
+class CartCheckout(SQLModel):
+    payment_method: Optional[str] = "cash"
+    discount_code: Optional[str] = None
 
 
 # end
@@ -1,14 +1,17 @@
 from .database import engine, init_db
 from .models import SQLModel, Category, Menu, Customer, MenuAddon
-from sqlmodel import Session
+from sqlmodel import Session, select
 
 
 def seed():
-    """Create some initial categories, menus, customers and addons for development/testing."""
+    """Create some initial categories, menus, customers and addons for development/testing.
+
+    For real data use the importer: python -m app.importer {categories,menus,addons,customers} FILE
+    """
     init_db()
     with Session(engine) as session:
         # check existing
-        existing = session.exec("SELECT 1 FROM categories LIMIT 1").first()
+        existing = session.exec(select(Category.id).limit(1)).first()
         if existing:
             return
 
@@ -25,8 +28,8 @@ def seed():
         session.commit()
 
         # sample customers
-        cust1 = Customer(name="John Doe", phone="+628123456789")
-        cust2 = Customer(name="Jane Smith", phone="+628987654321")
+        cust1 = Customer(name="John Doe", phone_number="+628123456789")
+        cust2 = Customer(name="Jane Smith", phone_number="+628987654321")
         session.add_all([cust1, cust2])
         session.commit()
 
@@ -0,0 +1,111 @@
+"""Compare sync and ASYNC_DB modes under the same load profile.
+
+Each mode runs in its own subprocess (ASYNC_DB is read at import time) and fires
+the same mix of catalog reads and order creations at the app with a fixed
+concurrency, through httpx's in-process ASGI transport.
+
+Uses DATABASE_URL when set (point it at a Postgres copy to get meaningful numbers),
+otherwise a throwaway SQLite file. Async mode needs asyncpg / aiosqlite installed.
+
+Usage (PowerShell):
+    & ./venv/Scripts/python.exe -m dev.bench_async --requests 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def seed(url):
+    """Create tables and a small catalog if the database is empty."""
+    from sqlmodel import create_engine, SQLModel, Session, select
+    from app.models import Category, Menu, MenuAddon
+
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        if session.exec(select(Menu)).first():
+            return
+        cat = Category(name="Bench")
+        session.add(cat)
+        session.commit()
+        menus = [Menu(name=f"Menu {i}", price=10000 + i, category_id=cat.id) for i in range(50)]
+        session.add_all(menus)
+        session.commit()
+        session.add_all([MenuAddon(menu_id=m.id, name="Extra", price=2000) for m in menus])
+        session.commit()
+
+
+async def _load(n_requests, concurrency):
+    import httpx
+    from app import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with sem:
+                start = time.perf_counter()
+                if i % 10 == 0:
+                    r = await client.post("/api/orders", json={"items": [{"menu_id": 1 + i % 50, "quantity": 2}]})
+                elif i % 2:
+                    r = await client.get(f"/api/menus/{1 + i % 50}")
+                else:
+                    r = await client.get("/api/menus")
+                r.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n_requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(n_requests / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def run_mode(args):
+    """Child process entry point: environment already selects the mode."""
+    print(json.dumps(asyncio.run(_load(args.requests, args.concurrency))))
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_mode(args)
+
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    seed(url)
+
+    for mode in ("0", "1"):
+        env = dict(os.environ, DATABASE_URL=url, ASYNC_DB=mode)
+        out = subprocess.run(
+            [sys.executable, "-m", "dev.bench_async", "--child",
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency)],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{'async' if mode == '1' else 'sync ':5}  {result}")
+
+
+if __name__ == "__main__":
+    run()
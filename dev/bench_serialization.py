@@ -0,0 +1,92 @@
+"""Per-row cost of the read path before and after the fast JSON path.
+
+before: load ORM objects, validate them against List[Menu] / List[CustomerRead]
+        (what FastAPI does with response_model) and dump to JSON.
+after:  project only the schema columns into dicts and encode with app.fastjson.
+
+Runs against a throwaway SQLite file seeded with --rows menus and customers, and
+reports microseconds per row for encoding alone and for query + encoding.
+
+Usage (PowerShell):
+    & ./venv/Scripts/python.exe -m dev.bench_serialization --rows 20000
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlmodel import create_engine, SQLModel, Session, select
+
+from app.fastjson import columns_for, dumps, orjson, rows_to_dicts
+from app.models import Customer, Menu
+from app.schemas import CustomerRead
+
+
+def seed(engine, rows):
+    with Session(engine) as session:
+        session.add_all(
+            Menu(name=f"Menu {i}", price=10000 + i, category_id=None, description="x" * 40) for i in range(rows)
+        )
+        session.add_all(Customer(name=f"Customer {i}", phone_number=f"08{i:010d}") for i in range(rows))
+        session.commit()
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(engine, model, schema, rows, repeat):
+    adapter = TypeAdapter(List[schema])
+    columns = columns_for(model, None if schema is model else schema)
+
+    with Session(engine) as session:
+        objs = session.exec(select(model)).all()
+        dicts = rows_to_dicts(session.exec(select(*columns)))
+
+    def before_encode():
+        adapter.dump_json(adapter.validate_python(objs, from_attributes=True))
+
+    def after_encode():
+        dumps(dicts)
+
+    def before_full():
+        with Session(engine) as session:
+            loaded = session.exec(select(model)).all()
+            adapter.dump_json(adapter.validate_python(loaded, from_attributes=True))
+
+    def after_full():
+        with Session(engine) as session:
+            dumps(rows_to_dicts(session.exec(select(*columns))))
+
+    per_row = lambda seconds: round(seconds / rows * 1e6, 3)
+    print(f"{schema.__name__:12} encode  before {per_row(timed(before_encode, repeat)):>8} us/row"
+          f"   after {per_row(timed(after_encode, repeat)):>8} us/row")
+    print(f"{schema.__name__:12} q+enc   before {per_row(timed(before_full, repeat)):>8} us/row"
+          f"   after {per_row(timed(after_full, repeat)):>8} us/row")
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    seed(engine, args.rows)
+
+    print(f"encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}, rows: {args.rows}")
+    bench(engine, Menu, Menu, args.rows, args.repeat)
+    bench(engine, Customer, CustomerRead, args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    run()
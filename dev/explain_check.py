@@ -0,0 +1,95 @@
+"""Regression check: the main queries must be answered from indexes, not table scans.
+
+Runs EXPLAIN (Postgres) or EXPLAIN QUERY PLAN (SQLite) over the queries the API
+issues on its hot paths and exits non-zero if any plan contains a sequential scan.
+On Postgres, sequential scans are disabled for the session so that tiny dev tables
+still show whether a usable index exists at all.
+
+Uses DATABASE_URL when set, otherwise a throwaway SQLite file created from the models.
+
+Usage (PowerShell):
+    & ./venv/Scripts/python.exe -m dev.explain_check
+"""
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlmodel import create_engine, SQLModel, select
+
+from app import crud
+from app.models import (
+    Cart,
+    MenuAddon,
+    Order,
+    OrderItem,
+    OrderStatusHistory,
+    Payment,
+    Review,
+)
+
+
+def main_queries():
+    """(name, statement) pairs for the queries that must hit an index."""
+    since = datetime(2024, 1, 1)
+    return [
+        ("menus by category", crud.select_menus(category_id=1)),
+        ("addons by menu", select(MenuAddon).where(MenuAddon.menu_id == 1)),
+        ("addons by ids (order pricing)", select(MenuAddon).where(MenuAddon.id.in_([1, 2, 3]))),
+        ("customers page", crud.select_customers(limit=100, after_id=10)),
+        ("orders by customer", crud.select_orders(limit=100, customer_id=1)),
+        ("kitchen queue", select(Order).where(Order.current_status == "pending").order_by(Order.created_at)),
+        ("orders by created_at", select(Order).where(Order.created_at >= since)),
+        ("order items by order", select(OrderItem).where(OrderItem.order_id == 1)),
+        ("payments by order", select(Payment).where(Payment.order_id == 1)),
+        ("payments by paid_at (export)", select(Payment).where(Payment.paid_at >= since)),
+        ("carts by customer", select(Cart).where(Cart.customer_id == 1)),
+        ("reviews by menu", select(Review).where(Review.menu_id == 1)),
+        ("status history by order", select(OrderStatusHistory).where(OrderStatusHistory.order_id == 1)),
+    ]
+
+
+def explain(connection, statement):
+    dialect = connection.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if dialect.name == "sqlite" else "EXPLAIN "
+    rows = connection.execute(text(prefix + sql)).all()
+    # SQLite: (id, parent, notused, detail); Postgres: one text column per line
+    return [row[-1] for row in rows]
+
+
+def is_table_scan(dialect_name, line):
+    if dialect_name == "sqlite":
+        # "SCAN orders" is a full scan; "SCAN orders USING INDEX ..." walks an index
+        return bool(re.match(r"\s*SCAN \w+$", line))
+    return "Seq Scan" in line
+
+
+def run():
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "explain.db")
+        SQLModel.metadata.create_all(create_engine(url))
+    engine = create_engine(url)
+
+    failures = 0
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SET enable_seqscan = off"))
+        for name, statement in main_queries():
+            plan = explain(connection, statement)
+            scans = [line for line in plan if is_table_scan(connection.dialect.name, line)]
+            status = "FAIL" if scans else "ok"
+            print(f"[{status:4}] {name}: {' | '.join(line.strip() for line in plan)}")
+            failures += bool(scans)
+
+    if failures:
+        print(f"\n✗ {failures} quer{'y' if failures == 1 else 'ies'} fall back to a sequential scan")
+        sys.exit(1)
+    print("\n✓ All main queries use an index")
+
+
+if __name__ == "__main__":
+    run()
@@ -6,19 +6,23 @@ Useful for checking API behavior during development.
 Usage (PowerShell):
     & ./venv/Scripts/python.exe -m dev.smoke_test
 """
+import io
+
+from sqlalchemy import event, update
+from sqlalchemy.pool import StaticPool
 from sqlmodel import create_engine, SQLModel, Session
 from fastapi.testclient import TestClient
 
 import app.database as database
 import app.crud as crud
-from app import main
+from app import idempotency, importer, main
 # Import all models to ensure they are registered with SQLModel
 from app.models import (
     Category,
     Menu,
     Customer,
     MenuAddon,
-    Order
+    IdempotencyKey
 )
 
 
@@ -28,7 +32,9 @@ def setup_test_db():
     engine = create_engine(
         "sqlite:///:memory:",
         echo=True,  # Enable echo to see SQL operations
-        connect_args={"check_same_thread": False}
+        connect_args={"check_same_thread": False},
+        # one shared connection: every new connection would get its own empty database
+        poolclass=StaticPool,
     )
 
     # Override the production engine in both database and crud modules
@@ -128,10 +134,159 @@ def test_create_order(client, customer_id, menu_id, addon_id):
     assert r.status_code == 201
     # Order total should be: (menu price + addon price) * quantity
     # (2.50 + 0.50) * 2 = 6.00
-    assert float(data["total"]) == 6.00
+    assert float(data["total_after_discount"]) == 6.00
     return data["id"]
 
 
+def count_queries(engine, fn):
+    """Run fn() and return (its result, number of SQL statements it executed)."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return result, len(statements)
+
+
+def test_read_order_expanded(client, engine, order_id, menu_id):
+    """Expanded order view: nested lists in a fixed number of queries (no N+1)."""
+    print("\n-> Testing /api/orders/{id}?expand=items,payments,history")
+    client.post("/api/payments", json={"order_id": order_id, "amount": 2.00, "method": "cash"})
+    client.post("/api/payments", json={"order_id": order_id, "amount": 1.00, "method": "qris"})
+    client.post(f"/api/orders/{order_id}/status", json={"status": "preparing"})
+    client.get("/api/menus")  # warm the catalog cache, which supplies menu names
+
+    url = f"/api/orders/{order_id}?expand=items,payments,history"
+    r, queries = count_queries(engine, lambda: client.get(url))
+    data = r.json()
+    print(f"Status: {r.status_code}, queries: {queries}")
+    assert r.status_code == 200
+    assert len(data["items"]) == 1 and data["items"][0]["menu_name"] == "Espresso"
+    assert [p["method"] for p in data["payments"]] == ["cash", "qris"]
+    assert [h["status"] for h in data["history"]] == ["pending", "preparing"]
+    # the order plus one SELECT per expanded relationship
+    assert queries == 4, queries
+
+    # more rows must not mean more queries
+    bigger = client.post("/api/orders", json={"items": [{"menu_id": menu_id, "quantity": 1}] * 10}).json()
+    r, queries_bigger = count_queries(engine, lambda: client.get(f"/api/orders/{bigger['id']}?expand=items,payments,history"))
+    assert len(r.json()["items"]) == 10
+    assert queries_bigger == queries, (queries_bigger, queries)
+
+    assert client.get(f"/api/orders/{order_id}?expand=nope").status_code == 400
+    assert "items" not in client.get(f"/api/orders/{order_id}").json()
+
+
+def test_reimport_keeps_unlisted_columns(client, engine, category_id, customer_id):
+    """Upserting a menu only overwrites the columns in the file (user-017)."""
+    print("\n-> Testing menu re-import over a reviewed, unavailable menu")
+    menu = client.post(
+        "/api/menus",
+        json={"name": "Rendang", "price": 10.0, "category_id": category_id, "image_url": "rendang.png"},
+    ).json()
+    client.put(f"/api/menus/{menu['id']}", json={"is_available": False})
+    for rating in (4, 5):
+        r = client.post("/api/reviews", json={"customer_id": customer_id, "menu_id": menu["id"], "rating": rating})
+        assert r.status_code == 201, r.text
+
+    csv_text = f"id,name,price,category_id\n{menu['id']},Rendang Daging,12,{category_id}\n"
+    with Session(engine) as session:
+        report = importer.import_records(session, "menus", io.StringIO(csv_text), "csv")
+    assert report.upserted == 1 and report.error_count == 0, report.as_dict()
+
+    data = client.get(f"/api/menus/{menu['id']}").json()
+    print(f"After re-import: {data}")
+    assert data["name"] == "Rendang Daging" and float(data["price"]) == 12.0
+    assert data["is_available"] is False
+    assert data["image_url"] == "rendang.png"
+    assert (data["rating_sum"], data["rating_count"], data["average_rating"]) == (9, 2, 4.5)
+
+
+def test_idempotent_order_retry(client, engine, customer_id, menu_id):
+    """Idempotency-Key: replay, 422 on a changed body, retry after a 400 (user-023)."""
+    print("\n-> Testing /api/orders with an Idempotency-Key")
+    payload = {"customer_id": customer_id, "items": [{"menu_id": menu_id, "quantity": 1}]}
+    first = client.post("/api/orders", json=payload, headers={"Idempotency-Key": "smoke-1"})
+    assert first.status_code == 201, first.text
+    retry = client.post("/api/orders", json=payload, headers={"Idempotency-Key": "smoke-1"})
+    print(f"Retry: {retry.status_code} {retry.headers.get('Idempotent-Replayed')}")
+    assert retry.status_code == 201 and retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+
+    changed = dict(payload, items=[{"menu_id": menu_id, "quantity": 2}])
+    assert client.post("/api/orders", json=changed, headers={"Idempotency-Key": "smoke-1"}).status_code == 422
+
+    # a failed request stores nothing, so the same key can be retried
+    bad = {"customer_id": customer_id, "items": [{"menu_id": 98765, "quantity": 1}]}
+    assert client.post("/api/orders", json=bad, headers={"Idempotency-Key": "smoke-2"}).status_code == 400
+    r = client.post("/api/orders", json=payload, headers={"Idempotency-Key": "smoke-2"})
+    assert r.status_code == 201 and "Idempotent-Replayed" not in r.headers, r.text
+    assert r.json()["id"] != first.json()["id"]
+
+    # the order committed but its response was never recorded: rebuilt, not created again
+    with Session(engine) as session:
+        session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == "smoke-2")
+            .values(status_code=None, response_body=None)
+        )
+        session.commit()
+    idempotency.cache.clear()
+    again = client.post("/api/orders", json=payload, headers={"Idempotency-Key": "smoke-2"})
+    assert again.status_code == 201 and again.headers["Idempotent-Replayed"] == "true", again.text
+    assert again.json()["id"] == r.json()["id"]
+
+
+def test_split_payment_completes_order(client, customer_id, menu_id):
+    """Partial then full payment completes a ready order; overpaying is refused (user-024)."""
+    print("\n-> Testing split payments and settlement")
+    order = client.post("/api/orders", json={"customer_id": customer_id, "items": [{"menu_id": menu_id, "quantity": 2}]}).json()
+    assert float(order["total_after_discount"]) == 5.00
+    oid = order["id"]
+    for status in ("preparing", "ready"):
+        assert client.post(f"/api/orders/{oid}/status", json={"status": status}).status_code == 200
+
+    assert client.post("/api/payments", json={"order_id": oid, "amount": 2.00, "method": "cash"}).status_code == 201
+    assert client.get(f"/api/orders/{oid}").json()["current_status"] == "ready"
+    r = client.post(f"/api/orders/{oid}/status", json={"status": "completed"})
+    print(f"Complete while partly paid: {r.status_code} {r.json()}")
+    assert r.status_code == 400 and r.json()["detail"] == "Order is not fully paid"
+    assert client.put(f"/api/orders/{oid}", json={"current_status": "completed"}).status_code == 400
+
+    last = client.post("/api/payments", json={"order_id": oid, "amount": 3.00, "method": "qris"})
+    assert last.status_code == 201
+    assert client.get(f"/api/orders/{oid}").json()["current_status"] == "completed"
+    balance = client.get(f"/api/orders/{oid}/payments").json()
+    assert balance["settled"] and float(balance["outstanding"]) == 0.0
+
+    over = client.post("/api/payments", json={"order_id": oid, "amount": 0.50, "method": "cash"})
+    print(f"Overpay: {over.status_code} {over.json()}")
+    assert over.status_code == 400
+    # the completed order keeps the payments that cover it
+    assert client.delete(f"/api/payments/{last.json()['id']}").status_code == 400
+    assert client.put(f"/api/payments/{last.json()['id']}", json={"payment_status": "refunded"}).status_code == 400
+    assert client.put(f"/api/payments/{last.json()['id']}", json={"payment_status": "bogus"}).status_code == 422
+
+    # a refunded payment no longer counts
+    order = client.post("/api/orders", json={"customer_id": customer_id, "items": [{"menu_id": menu_id, "quantity": 1}]}).json()
+    refund = client.post("/api/payments", json={"order_id": order["id"], "amount": 2.50}).json()
+    assert client.put(f"/api/payments/{refund['id']}", json={"payment_status": "refunded"}).status_code == 200
+    assert float(client.get(f"/api/orders/{order['id']}/payments").json()["paid"]) == 0.0
+    assert client.post(f"/api/orders/{order['id']}/status", json={"status": "preparing"}).status_code == 200
+    assert client.post(f"/api/orders/{order['id']}/status", json={"status": "ready"}).json()["current_status"] == "ready"
+
+    # paid up front: completed as soon as it is ready
+    order = client.post("/api/orders", json={"customer_id": customer_id, "items": [{"menu_id": menu_id, "quantity": 1}]}).json()
+    assert client.post("/api/payments", json={"order_id": order["id"], "amount": 2.50}).status_code == 201
+    assert client.post(f"/api/orders/{order['id']}/status", json={"status": "preparing"}).json()["current_status"] == "preparing"
+    assert client.post(f"/api/orders/{order['id']}/status", json={"status": "ready"}).json()["current_status"] == "completed"
+
+
 def run():
     """Run the smoke test suite."""
     print("\nStarting smoke tests...\n")
@@ -160,6 +315,11 @@ def run():
             addon_id=ids["addon_id"]
         )
 
+        test_read_order_expanded(client, engine, order_id, ids["menu_id"])
+        test_reimport_keeps_unlisted_columns(client, engine, ids["category_id"], new_customer_id)
+        test_idempotent_order_retry(client, engine, new_customer_id, ids["menu_id"])
+        test_split_payment_completes_order(client, new_customer_id, ids["menu_id"])
+
         print("\n✓ All smoke tests passed!")
 
     except Exception as e: